@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Inverted author index: normalized author name -> publication ids.
+
+process_publications.py writes author_index.json with every build. It
+holds the page order of the publications, each author's publications, and
+each lab member's publications (all spellings combined). Member lookups
+therefore cost one match per distinct author name rather than a scan of
+every record, and a listing costs time proportional to its own length.
+
+Usage:
+    python3 author_index.py "Shantanu Ghosh"          # list an author's publications
+    python3 author_index.py --html "Ke Yu" [out.html] # that member's article HTML, newest first
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+from lab_members import default_matcher, normalize_name
+
+AUTHOR_INDEX_PATH = Path(__file__).parent / "author_index.json"
+INDEX_VERSION = 1
+
+def build_author_index(records):
+    """{normalized name: {"name", "publications"}} from (pub_id, authors) in page order.
+
+    "name" is the most frequent spelling of that author.
+    """
+    index = {}
+    spellings = {}
+    for pub_id, authors in records:
+        for author in authors:
+            key = normalize_name(author)
+            if not key or key == "others":
+                continue
+            entry = index.get(key)
+            if entry is None:
+                entry = index[key] = {"name": author, "publications": []}
+                spellings[key] = {}
+            if not entry["publications"] or entry["publications"][-1] != pub_id:
+                entry["publications"].append(pub_id)
+            counts = spellings[key]
+            counts[author] = counts.get(author, 0) + 1
+            if counts[author] > counts.get(entry["name"], 0):
+                entry["name"] = author
+    return index
+
+def member_publications(index, order, matcher=None):
+    """{member name: [ids in page order]}; each distinct author is matched once."""
+    matcher = matcher or default_matcher()
+    position = {pub_id: i for i, pub_id in enumerate(order)}
+    members = {}
+    for key, entry in index.items():
+        for member in matcher.members_in([key]).values():
+            members.setdefault(member, set()).update(entry["publications"])
+    return {member: sorted(ids, key=position.__getitem__) for member, ids in members.items()}
+
+def write_author_index(records, path=AUTHOR_INDEX_PATH, matcher=None):
+    """Build the index from (pub_id, authors) in page order and write it; returns it."""
+    records = list(records)
+    order = [pub_id for pub_id, _ in records]
+    index = build_author_index(records)
+    data = {
+        "version": INDEX_VERSION,
+        "publications": order,
+        "authors": index,
+        "members": member_publications(index, order, matcher),
+    }
+    atomic_write(path, json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+    return data
+
+def load_author_index(path=AUTHOR_INDEX_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def lookup(data, name):
+    """Publication ids for a member or author name (any spelling); falls back to
+    every author whose normalized name contains the query."""
+    # Any spelling of a lab member resolves to the member's combined list
+    for member in default_matcher().members_in([name]).values():
+        if member in data["members"]:
+            return data["members"][member]
+    key = normalize_name(name)
+    if key in data["authors"]:
+        return data["authors"][key]["publications"]
+    ids = set()
+    for author_key, entry in data["authors"].items():
+        if key and key in author_key:
+            ids.update(entry["publications"])
+    return [pub_id for pub_id in data["publications"] if pub_id in ids]
+
+def main():
+    html_mode = "--html" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--html"]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    if not AUTHOR_INDEX_PATH.exists():
+        print(f"✗ {AUTHOR_INDEX_PATH.name} not found (run process_publications.py first)")
+        sys.exit(1)
+
+    data = load_author_index()
+    ids = lookup(data, args[0])
+    if not ids:
+        print(f"✗ No publications for {args[0]!r}")
+        sys.exit(1)
+
+    if not html_mode:
+        from publication_store import load_publications, publication_index
+
+        publications = publication_index(load_publications())
+        for pub_id in ids:
+            year, pub = publications.get(pub_id, ("????", {"title": pub_id}))
+            print(f"  {year}  {pub['title']}")
+        print(f"✓ {len(ids)} publications")
+        return
+
+    # Article HTML comes from the last build, so the listing matches the page
+    from process_publications import year_heading
+    from publication_changes import load_snapshot
+
+    records = load_snapshot()["records"]
+    html_parts = []
+    current_year = None
+    written = 0
+    for pub_id in ids:
+        entry = records.get(pub_id)
+        if entry is None or not entry.get("html"):
+            print(f"⚠ {pub_id} is not in the last build, skipped", file=sys.stderr)
+            continue
+        if entry["year"] != current_year:
+            current_year = entry["year"]
+            html_parts.append(year_heading(current_year))
+        html_parts.append(entry["html"])
+        written += 1
+    html = "\n".join(html_parts) + "\n"
+
+    if len(args) > 1:
+        atomic_write(args[1], html)
+        print(f"✓ Wrote {written} publications to {args[1]}")
+    else:
+        sys.stdout.write(html)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Benchmark the publication pipeline on synthetic corpora of increasing size.
+
+Generates publication JSON (same schema as publications_complete.json) and a
+matching index.html at each size in a temporary directory (kept under DIR
+with --keep), times every stage, and appends the results to
+bench_results.jsonl so regressions show up across commits.
+Usage: python3 bench_pipeline.py [--sizes 100,1000,10000,50000] [--budget 30] [--keep DIR]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import add_bibtex
+import download_and_link_all_images
+import process_publications
+import update_publication_links
+import update_pubs_complete
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+FIRST_YEAR = 2000
+LAST_YEAR = 2025
+
+WORDS = (
+    "learning deep contrastive anatomy guided weakly supervised chest x-ray "
+    "segmentation generative model diffusion mammography vision language "
+    "foundation robust domain generalization explainable classifier "
+    "representation disease progression imaging genetics variational "
+    "inference bayesian graph attention transformer self-supervised "
+    "pathology histology slide retrieval counterfactual causal emphysema"
+).split()
+FIRST_NAMES = ["Shantanu", "Yanwu", "Li", "Wei", "Clare", "Shyam", "Ke", "Nihal",
+               "Matt", "Aya", "Haozhe", "Motahhare", "Adam", "Afrooz", "Katelyn"]
+LAST_NAMES = ["Ghosh", "Xu", "Sun", "Peng", "Poynton", "Visweswaran", "Yu", "Murali",
+              "Chen", "Morrison", "Perer", "Zandifar", "Eslami", "Jia", "Wang"]
+VENUES = ["IEEE Transactions on Medical Imaging", "MICCAI", "NeurIPS", "ICML",
+          "Medical Image Analysis", "ICLR", "CVPR", "MIDL", "AAAI", "Findings of ACL"]
+
+# Smallest valid PNG (1x1 transparent pixel), served by the fixture server
+PIXEL_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6300010000000500010d0a2db40000"
+    "000049454e44ae426082"
+)
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serve /img/<n>.png as a tiny PNG and 404 for everything else."""
+
+    def do_GET(self):
+        if self.path.startswith("/img/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(PIXEL_PNG)))
+            self.end_headers()
+            self.wfile.write(PIXEL_PNG)
+        else:
+            self.send_error(404)
+
+    def do_HEAD(self):
+        if self.path.startswith("/img/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(PIXEL_PNG)))
+            self.end_headers()
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def fixture_server(handler=FixtureHandler):
+    """Run a local HTTP server on an ephemeral port; yields its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def generate_corpus(n, image_base_url, seed=0):
+    """Generate n synthetic publications grouped by year, newest year first."""
+    rng = random.Random(seed)
+    years = list(range(LAST_YEAR, FIRST_YEAR - 1, -1))
+    data = {str(year): [] for year in years}
+
+    for i in range(n):
+        year = years[i % len(years)]
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + f" {i}"
+        authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(2, 9))]
+        authors.append("Kayhan Batmanghelich")
+        venue = rng.choice(VENUES)
+        key = f"{authors[0].split()[-1].lower()}{year}p{i}"
+        bibtex = (
+            f"@article{{{key},\n  title={{{title}}},\n"
+            f"  author={{{' and '.join(authors)}}},\n"
+            f"  journal={{{venue}}},\n  year={{{year}}}\n}}"
+        )
+        data[str(year)].append({
+            "title": title,
+            "authors": authors,
+            "paper_link": f"https://doi.org/10.0000/{key}",
+            "code_link": f"https://github.com/batmanlab/{key}" if i % 3 == 0 else "",
+            "preprint_link": f"https://arxiv.org/abs/{2000 + i % 9000}.{i:05d}" if i % 2 == 0 else "",
+            "image_icon_link": f"{image_base_url}/img/{i}.png" if i % 5 else "",
+            "bibtex": bibtex,
+            "venue": venue,
+        })
+
+    return {year: pubs for year, pubs in data.items() if pubs}
+
+def generate_index_html(data):
+    """Build an index.html whose publications section matches the live page markup."""
+    parts = []
+    seq_num = 1
+    for year in sorted(data.keys(), reverse=True):
+        parts.append(f'            <div id="year-pub-{year}">')
+        parts.append(f'            <h4 class="mt-4 mb-3 fw-bold">{year}</h4>')
+        for pub in data[year]:
+            links = [f'<a href="{pub["paper_link"]}"><i class="bi bi-file-earmark-text"></i> Paper</a>']
+            if pub["code_link"]:
+                links.append(f'<a href="{pub["code_link"]}"><i class="bi bi-github"></i> Code</a>')
+            authors_html = process_publications.format_authors(pub["authors"])
+            parts.append(f'''            <article class="item-row">
+                <img src="images/publications/pub_{year}_{seq_num}.png" alt="{pub["title"]} thumbnail" onerror="this.src='images/bu-logo.png'">
+                <div>
+                    <h5 class="mb-1 fw-bold">{pub["title"]}</h5>
+                    <div class="muted mb-2">
+                        {authors_html}
+                    </div>
+                    <div class="mb-1"><span class="fw-semibold">Venue:</span> {pub["venue"]}</div>
+                    <div class="meta-links mb-2">{" ".join(links)}</div>
+                </div>
+            </article>''')
+            seq_num += 1
+        parts.append('            </div>')
+
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <title>Synthetic Lab</title>
+</head>
+<body>
+    <!-- PUBLICATIONS -->
+    <section id="publication" class="my-4">
+        <div class="d-grid gap-3">
+{chr(10).join(parts)}
+        </div>
+    </section>
+
+    <!-- LAB MEMBERS -->
+    <section id="members" class="my-4"></section>
+</body>
+</html>
+'''
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, cwd=Path(__file__).parent)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def sample_titles(data, k, seed=0):
+    titles = [pub["title"] for pubs in data.values() for pub in pubs]
+    return random.Random(seed).sample(titles, min(k, len(titles)))
+
+def run_stages(data, html_content, work_dir, sample):
+    """Yield (stage, callable, calls) for every benchmarked stage."""
+    images_dir = work_dir / "images"
+    images_dir.mkdir(exist_ok=True)
+    titles = sample_titles(data, sample)
+    urls = [pub["image_icon_link"] for pubs in data.values() for pub in pubs if pub["image_icon_link"]][:sample]
+
+    def render():
+        process_publications.render_publications(data, images_dir, download=False)
+
+    html_parts, _ = process_publications.render_publications(data, images_dir, download=False)
+
+    def splice():
+        process_publications.splice_publications(html_content, html_parts)
+
+    def find_papers():
+        for title in titles:
+            update_pubs_complete.find_paper_in_html(html_content, title)
+
+    def dedupe_meta_links():
+        update_publication_links.remove_duplicate_meta_links(html_content)
+
+    def update_links():
+        update_publication_links.update_links_in_html(html_content, data)
+
+    def bibtex():
+        add_bibtex.add_bibtex_to_html(html_content, data)
+
+    def download():
+        for i, url in enumerate(urls):
+            download_and_link_all_images.download_image(url, str(images_dir / f"dl_{i}.png"))
+
+    total = sum(len(pubs) for pubs in data.values())
+    yield "render", render, total
+    yield "splice", splice, total
+    yield "find_paper_in_html", find_papers, len(titles)
+    yield "remove_duplicate_meta_links", dedupe_meta_links, total
+    yield "update_links_in_html", update_links, total
+    yield "add_bibtex_to_html", bibtex, total
+    yield "download_image", download, len(urls)
+
+@contextlib.contextmanager
+def work_directory(n, keep_dir=None):
+    """keep_dir/<n> when corpora are kept, else a temporary directory removed afterwards."""
+    if keep_dir:
+        work_dir = Path(keep_dir) / str(n)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        yield work_dir
+        return
+    with tempfile.TemporaryDirectory(prefix=f"bench_{n}_") as work_dir:
+        yield Path(work_dir)
+
+def bench(sizes, budget, sample, keep_dir=None):
+    """Run every stage at every size; returns {size: {stage: result}}."""
+    results = {}
+    predicted_over = set()
+
+    with fixture_server() as base_url:
+        for idx, n in enumerate(sizes):
+            with work_directory(n, keep_dir) as work_dir:
+                start = time.perf_counter()
+                data = generate_corpus(n, base_url)
+                html_content = generate_index_html(data)
+                gen_time = time.perf_counter() - start
+                if keep_dir:
+                    with open(work_dir / "publications_complete.json", 'w', encoding='utf-8') as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    with open(work_dir / "index.html", 'w', encoding='utf-8') as f:
+                        f.write(html_content)
+
+                print(f"\n{n} publications ({len(html_content) / 1024:.0f} KB index.html, generated in {gen_time:.2f}s)")
+                size_results = {"generate": {"seconds": round(gen_time, 4)}}
+
+                for stage, func, calls in run_stages(data, html_content, work_dir, sample):
+                    if stage in predicted_over:
+                        size_results[stage] = {"skipped": "over budget at a smaller size"}
+                        print(f"  {stage:<30} skipped")
+                        continue
+
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        start = time.perf_counter()
+                        func()
+                        elapsed = time.perf_counter() - start
+
+                    size_results[stage] = {
+                        "seconds": round(elapsed, 4),
+                        "calls": calls,
+                        "per_call_ms": round(elapsed * 1000 / calls, 4) if calls else None,
+                    }
+                    print(f"  {stage:<30} {elapsed:9.3f}s  ({calls} calls)")
+
+                    # Assume quadratic growth: skip the next size if it would blow the budget
+                    if idx + 1 < len(sizes) and elapsed * (sizes[idx + 1] / n) ** 2 > budget:
+                        predicted_over.add(stage)
+
+                results[str(n)] = size_results
+
+    return results
+
+def compare_with_previous(output_path, record):
+    """Print ratios against the last recorded run for the same sizes."""
+    if not output_path.exists():
+        return
+    with open(output_path, 'r', encoding='utf-8') as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        return
+    previous = json.loads(lines[-1])
+
+    print(f"\nCompared with {previous.get('commit') or 'previous run'}:")
+    for n, stages in record["results"].items():
+        for stage, result in stages.items():
+            old = previous.get("results", {}).get(n, {}).get(stage, {})
+            if "seconds" in result and old.get("seconds"):
+                ratio = result["seconds"] / old["seconds"]
+                marker = "  ⚠ slower" if ratio > 1.25 else ""
+                print(f"  {n:>6} {stage:<30} {ratio:5.2f}x{marker}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the publication pipeline.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated corpus sizes")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="skip a stage at the next size if it is predicted to exceed this many seconds")
+    parser.add_argument("--sample", type=int, default=200,
+                        help="titles looked up / images downloaded per size")
+    parser.add_argument("--output", default="bench_results.jsonl",
+                        help="results file (one JSON record per run)")
+    parser.add_argument("--keep", metavar="DIR", help="keep generated corpora under DIR")
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    results = bench(sizes, args.budget, args.sample, args.keep)
+
+    record = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+    output_path = Path(args.output)
+    compare_with_previous(output_path, record)
+    with open(output_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"\n✓ Results appended to {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Shared output helpers for the scripts that rewrite index.html.
+
+write_html() only touches the file when the content actually changed and,
+in dry-run mode, prints a structural diff (articles added/removed/changed)
+instead of writing. Outputs are written atomically (temp file + rename) and
+build_lock() serializes overlapping runs.
+Usage: python3 build_output.py <old.html> <new.html>
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DRY_RUN_FLAGS = ("--dry-run", "--diff")
+LOCK_PATH = Path(".build.lock")
+STAMP_PATH = Path(".build.stamp")
+
+ARTICLE_PATTERN = re.compile(r'<article class="item-row"[^>]*>.*?</article>', re.DOTALL)
+TITLE_PATTERN = re.compile(r'<h5[^>]*>(.*?)</h5>', re.DOTALL)
+
+def pop_dry_run_flag(argv=None):
+    """Remove --dry-run/--diff from argv (sys.argv by default); True if present."""
+    argv = sys.argv if argv is None else argv
+    found = False
+    for flag in DRY_RUN_FLAGS:
+        while flag in argv:
+            argv.remove(flag)
+            found = True
+    return found
+
+def article_title(article):
+    """Plain-text title of an article block, used as its identity in diffs."""
+    match = TITLE_PATTERN.search(article)
+    if not match:
+        return None
+    title = re.sub(r'<[^>]+>', '', match.group(1))
+    return re.sub(r'\s+', ' ', title).strip()
+
+def extract_articles(html_content):
+    """Map title -> normalized article markup for every publication article."""
+    articles = {}
+    for match in ARTICLE_PATTERN.finditer(html_content):
+        article = match.group(0)
+        title = article_title(article) or f"<untitled #{len(articles) + 1}>"
+        # Whitespace-only edits are not structural changes
+        articles[title] = re.sub(r'\s+', ' ', article)
+    return articles
+
+def structural_diff(old_html, new_html):
+    """Return (added, removed, changed) article titles between two pages."""
+    old_articles = extract_articles(old_html)
+    new_articles = extract_articles(new_html)
+    added = [t for t in new_articles if t not in old_articles]
+    removed = [t for t in old_articles if t not in new_articles]
+    changed = [t for t in new_articles if t in old_articles and new_articles[t] != old_articles[t]]
+    return added, removed, changed
+
+def print_diff(old_html, new_html, limit=20):
+    """Print a compact summary of what differs between two pages."""
+    added, removed, changed = structural_diff(old_html, new_html)
+    print(f"  Articles: +{len(added)} added, -{len(removed)} removed, ~{len(changed)} changed")
+    for marker, titles in (("+", added), ("-", removed), ("~", changed)):
+        for title in titles[:limit]:
+            print(f"    {marker} {title[:80]}")
+        if len(titles) > limit:
+            print(f"    {marker} ... and {len(titles) - limit} more")
+    if not (added or removed or changed):
+        print("  (changes are outside the publication articles)")
+
+@contextlib.contextmanager
+def atomic_open(path, mode='w'):
+    """Open a temp file next to path for writing; it replaces path only on success."""
+    path = Path(path)
+    encoding = None if 'b' in mode else 'utf-8'
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent or ".")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp_name, path.stat().st_mode & 0o777)
+        else:
+            os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+def atomic_write(path, data):
+    """Write str or bytes to path via a temp file in the same directory + rename."""
+    with atomic_open(path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+
+@contextlib.contextmanager
+def build_lock(lock_path=LOCK_PATH, poll_interval=0.2):
+    """Hold an exclusive lock for the duration of a build; later runs queue behind it."""
+    lock_path = Path(lock_path)
+    if fcntl is not None:
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print(f"⏳ Another build holds {lock_path}, waiting...")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
+
+    # No flock: fall back to an exclusively-created lock file
+    announced = False
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if not announced:
+                print(f"⏳ Another build holds {lock_path}, waiting...")
+                announced = True
+            time.sleep(poll_interval)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(lock_path)
+
+def file_digest(path):
+    """sha256 of a file's bytes (read in chunks), or None if it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def inputs_digest(*parts):
+    """Combined digest of build inputs (str/bytes values or file paths)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, Path):
+            h.update(bytes.fromhex(file_digest(part) or hashlib.sha256(b"").hexdigest()))
+            continue
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+def build_is_current(digest, stamp_path=STAMP_PATH):
+    """True if the last finished build used the same inputs and its outputs are untouched."""
+    stamp_path = Path(stamp_path)
+    if not stamp_path.exists():
+        return False
+    try:
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if stamp.get("inputs") != digest:
+        return False
+    return all(file_digest(path) == expected for path, expected in stamp.get("outputs", {}).items())
+
+def record_build(digest, outputs, stamp_path=STAMP_PATH):
+    """Remember the inputs and resulting output hashes of a finished build."""
+    stamp = {"inputs": digest, "outputs": {str(path): file_digest(path) for path in outputs}}
+    atomic_write(stamp_path, json.dumps(stamp, indent=2))
+
+def write_html(path, content, dry_run=False):
+    """Write content to path unless it is byte-identical; returns True if written."""
+    path = Path(path)
+    old_content = path.read_text(encoding='utf-8') if path.exists() else ""
+
+    if old_content == content:
+        print(f"✓ {path.name} unchanged, skipping write")
+        return False
+
+    if dry_run:
+        print(f"Dry run: {path.name} would change")
+        print_diff(old_content, content)
+        return False
+
+    print_diff(old_content, content)
+    atomic_write(path, content)
+    return True
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python3 build_output.py <old.html> <new.html>")
+        sys.exit(1)
+    old_html = Path(sys.argv[1]).read_text(encoding='utf-8')
+    new_html = Path(sys.argv[2]).read_text(encoding='utf-8')
+    print_diff(old_html, new_html)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Build the deployable site into dist/ from index.html and its assets.
+
+Stages: copy the site tree, ship web-optimized PDFs (see optimize_pdfs.py),
+tag publication articles with their ids, self-host subsetted fonts (see
+self_host_fonts.py), inline the critical CSS and defer the rest (see
+critical_css.py), add preload and priority hints (see resource_hints.py),
+minify the HTML, fingerprint referenced assets (see
+fingerprint_assets.py), build the search index (see search_index.py),
+generate the service worker (see service_worker.py), precompress text
+assets, check the page weight against page_budget.json (see
+page_weight.py) and, with --check-links, check every link (see
+check_links.py).
+index.html in the repo stays readable (the update scripts rely on its
+formatting); only the copy in dist/ is minified.
+Usage: python3 build_site.py [--out dist] [--no-minify] [--no-optimize-pdfs] [--lossy-pdf-images]
+                             [--check-links]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from build_output import atomic_write, build_lock
+import check_links
+import critical_css
+from fingerprint_assets import HEADERS_NAME, MANIFEST_NAME, fingerprint_site
+from minify_html import minify_html
+import optimize_pdfs
+import page_weight
+import precompress
+import resource_hints
+import search_index
+import self_host_fonts
+import service_worker
+
+SITE_FILES = ["index.html", "CNAME", "author_index.json"]
+SITE_DIRS = ["images", "files", "presentations", "js"]
+IGNORED_NAMES = {".DS_Store"}
+
+def copy_if_changed(source, target, force=False):
+    """Copy source to target unless an identical-looking copy is already there."""
+    if target.exists() and not force:
+        src_stat, dst_stat = source.stat(), target.stat()
+        if src_stat.st_size == dst_stat.st_size and src_stat.st_mtime <= dst_stat.st_mtime:
+            return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Copy then rename: the target may be hard-linked to a fingerprinted copy
+    tmp = target.with_name(f".{target.name}.tmp")
+    shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+    return True
+
+def copy_site(src_dir, out_dir, exclude=()):
+    """Mirror the site files into out_dir, except the relative paths in exclude;
+    returns the number of files copied."""
+    copied = 0
+    for name in SITE_FILES:
+        source = src_dir / name
+        if source.exists():
+            # Pages are rewritten by later stages, so always start from the source
+            copied += copy_if_changed(source, out_dir / name, force=name.endswith(".html"))
+    for name in SITE_DIRS:
+        for source in sorted((src_dir / name).rglob("*")):
+            if source.is_file() and source.name not in IGNORED_NAMES and source.relative_to(src_dir) not in exclude:
+                copied += copy_if_changed(source, out_dir / source.relative_to(src_dir))
+    return copied
+
+def stage_pdfs(src_dir, out_dir, sources, lossy=False):
+    """Ship the optimized copy of each PDF (the original where nothing was gained)."""
+    if not optimize_pdfs.available_tools():
+        print("  ⚠ No PDF optimizer installed (pikepdf, qpdf or gs), PDFs copied as-is")
+    results = optimize_pdfs.optimize_pdfs(sources, lossy=lossy)
+    for source in sources:
+        optimized, _ = results.get(source, (None, []))
+        copy_if_changed(optimized or source, out_dir / source.relative_to(src_dir))
+    if optimize_pdfs.available_tools():
+        optimize_pdfs.print_report(results, src_dir)
+
+def stage_tag_articles(out_dir):
+    records = search_index.load_records()
+    for page in sorted(out_dir.glob("*.html")):
+        html = page.read_text(encoding='utf-8')
+        tagged_html, tagged, unmatched = search_index.annotate_articles(html, records)
+        if tagged_html != html:
+            atomic_write(page, tagged_html)
+        print(f"  {page.name}: {tagged} articles tagged")
+        for title in unmatched:
+            print(f"  ⚠ Not in the publication store, search cannot find it: {title[:70]}")
+
+def stage_fonts(out_dir):
+    self_host_fonts.print_results(self_host_fonts.self_host_fonts(out_dir))
+
+def stage_css(out_dir):
+    critical_css.print_results(critical_css.split_site_css(out_dir))
+
+def stage_hints(out_dir):
+    resource_hints.print_results(resource_hints.hint_site(out_dir))
+
+def stage_minify(out_dir):
+    for page in sorted(out_dir.glob("*.html")):
+        html = page.read_text(encoding='utf-8')
+        minified = minify_html(html)
+        if minified != html:
+            atomic_write(page, minified)
+        print(f"  {page.name}: {len(html.encode()) / 1024:.1f} KB -> {len(minified.encode()) / 1024:.1f} KB")
+
+def stage_fingerprint(out_dir):
+    manifest, missing = fingerprint_site(out_dir)
+    for logical in missing:
+        print(f"  ⚠ Referenced but missing: {logical}")
+    print(f"  {len(manifest['assets'])} assets fingerprinted, manifest in {MANIFEST_NAME}")
+
+def append_header_rules(out_dir, rules):
+    # Only after fingerprinting, which rewrites _headers
+    headers = out_dir / HEADERS_NAME
+    lines = headers.read_text(encoding='utf-8').splitlines() if headers.exists() else []
+    atomic_write(headers, "\n".join(lines + rules) + "\n")
+
+def stage_search(out_dir):
+    manifest, size = search_index.write_search_index(out_dir)
+    append_header_rules(out_dir, search_index.header_rules())
+    print(f"  {len(manifest['documents'])} publications ({manifest['full_text']} with full text), "
+          f"{len(manifest['shards'])} shards, {size / 1024:.0f} KB")
+
+def stage_service_worker(out_dir):
+    precache, cacheable = service_worker.write_service_worker(out_dir)
+    append_header_rules(out_dir, service_worker.header_rules())
+    print(f"  {service_worker.WORKER_NAME}: {service_worker.describe(precache, cacheable)}")
+
+def stage_precompress(out_dir):
+    results = precompress.precompress_tree(out_dir)
+    precompress.print_summary(results, out_dir)
+
+def stage_weight(out_dir):
+    """Report the page weight; returns the budgets exceeded."""
+    return page_weight.check(out_dir)
+
+def stage_links(out_dir):
+    """Check local and external links; returns the number of broken ones."""
+    problems, checked, fetched = check_links.check_site(out_dir)
+    check_links.print_problems(problems)
+    print(f"  {checked} external links, {fetched} fetched, {checked - fetched} from cache")
+    return len(problems["missing"]) + len(problems["broken"])
+
+def build(src_dir, out_dir, minify=True, optimize=True, links=False, lossy_pdfs=False):
+    """Build the site; returns the reasons it is not fit to deploy (exceeded budgets, broken links)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pdfs = sorted((src_dir / "files").glob("*.pdf")) if optimize else []
+
+    print("Copying site files...")
+    print(f"  {copy_site(src_dir, out_dir, exclude={pdf.relative_to(src_dir) for pdf in pdfs})} files updated")
+
+    if pdfs:
+        print("Optimizing PDFs...")
+        stage_pdfs(src_dir, out_dir, pdfs, lossy=lossy_pdfs)
+
+    print("Tagging publication articles...")
+    stage_tag_articles(out_dir)
+
+    print("Self-hosting fonts...")
+    stage_fonts(out_dir)
+
+    print("Splitting critical CSS...")
+    stage_css(out_dir)
+
+    print("Adding resource hints...")
+    stage_hints(out_dir)
+
+    if minify:
+        print("Minifying HTML...")
+        stage_minify(out_dir)
+
+    print("Fingerprinting assets...")
+    stage_fingerprint(out_dir)
+
+    print("Building search index...")
+    stage_search(out_dir)
+
+    print("Generating service worker...")
+    stage_service_worker(out_dir)
+
+    print("Precompressing text assets...")
+    stage_precompress(out_dir)
+
+    print("Measuring page weight...")
+    problems = [f"over budget: {message}" for message in stage_weight(out_dir)]
+
+    if links:
+        print("Checking links...")
+        broken = stage_links(out_dir)
+        if broken:
+            problems.append(f"{broken} broken links")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the deployable site into dist/.")
+    parser.add_argument("--out", default="dist", help="output directory")
+    parser.add_argument("--no-minify", action="store_true", help="copy HTML unminified")
+    parser.add_argument("--no-optimize-pdfs", action="store_true", help="copy PDFs as they are")
+    parser.add_argument("--lossy-pdf-images", action="store_true",
+                        help="let Ghostscript downsample and re-encode PDF images (300 dpi)")
+    parser.add_argument("--check-links", action="store_true", help="check local and external links, fail if any are broken")
+    args = parser.parse_args()
+
+    src_dir = Path(__file__).parent.resolve()
+    out_dir = Path(args.out)
+    with build_lock():
+        problems = build(src_dir, out_dir, minify=not args.no_minify, optimize=not args.no_optimize_pdfs,
+                         links=args.check_links, lossy_pdfs=args.lossy_pdf_images)
+    if problems:
+        for problem in problems:
+            print(f"✗ {problem}")
+        print(f"✗ Site built in {out_dir}, but it should not be deployed")
+        sys.exit(1)
+    print(f"✓ Site built in {out_dir}")
+
+if __name__ == "__main__":
+    main()
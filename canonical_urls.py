@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+One canonical spelling for every URL the build touches.
+
+canonical_url() repairs known typos ("hhttps://"), lowercases scheme and
+host, maps host aliases (batman-lab.com -> www.batman-lab.com), drops
+default ports and normalizes percent-encoding (escapes uppercased,
+unreserved characters decoded, spaces and non-ASCII encoded). Fetchers and
+HTTP caches key on the result, so the same asset is never fetched twice
+under two spellings, and malformed links fail before any network work.
+Usage: python3 canonical_urls.py <url> [...]
+"""
+
+import re
+import sys
+from urllib.parse import quote, urlsplit, urlunsplit
+
+# Hosts that serve the same content under another name
+HOST_ALIASES = {
+    "batman-lab.com": "www.batman-lab.com",
+}
+
+# Typos seen in hand-edited data, fixed before parsing
+SCHEME_FIXES = [
+    (re.compile(r'^h+ttps?(?=://)', re.IGNORECASE), lambda m: "https" if m.group().lower().endswith("s") else "http"),
+    (re.compile(r'^(https?):/(?=[^/])', re.IGNORECASE), r'\1://'),
+    (re.compile(r'^(https?)//', re.IGNORECASE), r'\1://'),
+]
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+ESCAPE = re.compile(r'%([0-9a-fA-F]{2})')
+UNRESERVED = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+# Characters left alone when encoding (reserved delimiters and existing escapes)
+PATH_SAFE = "/%:@!$&'()*+,;=~"
+QUERY_SAFE = PATH_SAFE + "?"
+
+class InvalidURL(ValueError):
+    """Raised for links that cannot be made into a usable URL."""
+
+def _normalize_escapes(text, safe):
+    def fix(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in UNRESERVED else "%" + match.group(1).upper()
+    return quote(ESCAPE.sub(fix, text), safe=safe)
+
+def canonical_url(url):
+    """Canonical form of url; "" for empty/None. Relative site paths are only re-encoded.
+
+    Raises InvalidURL for absolute URLs without a usable scheme or host.
+    """
+    if url is None:
+        return ""
+    url = url.strip()
+    if not url:
+        return ""
+    for pattern, replacement in SCHEME_FIXES:
+        url = pattern.sub(replacement, url, count=1)
+    if url.startswith("www."):
+        url = "https://" + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if not scheme:
+        # Site-relative path (files/..., images/...)
+        if parts.netloc:
+            scheme = "https"
+        else:
+            return urlunsplit(("", "", _normalize_escapes(parts.path, PATH_SAFE),
+                               _normalize_escapes(parts.query, QUERY_SAFE), parts.fragment))
+    if scheme in ("mailto", "data", "tel"):
+        return url
+    if scheme not in ("http", "https"):
+        raise InvalidURL(f"unsupported scheme {parts.scheme!r} in {url!r}")
+
+    try:
+        host = (parts.hostname or "").rstrip(".").encode("idna").decode("ascii")
+    except UnicodeError:
+        host = ""
+    if not re.fullmatch(r'[a-z0-9][a-z0-9.\-]*', host):
+        raise InvalidURL(f"no valid host in {url!r}")
+    host = HOST_ALIASES.get(host, host)
+    netloc = host
+    try:
+        port = parts.port
+    except ValueError:
+        raise InvalidURL(f"bad port in {url!r}")
+    if port is not None and str(port) != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+
+    path = _normalize_escapes(parts.path, PATH_SAFE) or "/"
+    query = _normalize_escapes(parts.query, QUERY_SAFE)
+    return urlunsplit((scheme, netloc, path, query, parts.fragment))
+
+def url_problem(url):
+    """None if url is empty or canonicalizes cleanly, else a description of what is wrong."""
+    try:
+        canonical_url(url)
+    except InvalidURL as e:
+        return str(e)
+    return None
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 canonical_urls.py <url> [...]")
+        sys.exit(1)
+    for url in sys.argv[1:]:
+        try:
+            print(canonical_url(url))
+        except InvalidURL as e:
+            print(f"✗ {e}")
+
+if __name__ == "__main__":
+    main()
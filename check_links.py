@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Check every link on the built site: local files, in-page anchors and
+external URLs.
+
+Local paths are resolved against the output tree (dist/ by default), so
+they are checked as they will be served, fingerprinted names included, and
+#anchors against the ids on the page. External links from the pages and
+the paper/preprint/code/project links in the publication store are checked
+over HTTP: HEAD first, then a one-byte ranged GET for servers that do not
+answer HEAD properly. Requests go through a thread pool and reuse one
+keep-alive connection per host and thread, with at most PER_HOST requests
+to a host at a time.
+
+Results are cached in .cache/link-check.json by canonical URL: working
+links for OK_TTL, broken ones for BROKEN_TTL, network errors for
+ERROR_TTL. A rerun only fetches what has expired; --refresh ignores the
+cache.
+
+Usage:
+    python3 check_links.py [--out dist] [--no-external] [--refresh] [--workers 16]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import re
+import socket
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from build_output import atomic_write
+from canonical_urls import canonical_url
+from fingerprint_assets import ATTRIBUTE_PATTERN, is_local, logical_path
+from publication_model import LINK_FIELDS, records_from_data
+from publication_store import CACHE_DIR, load_publications
+from url_failures import DAY, GONE_STATUSES, HOUR, USER_AGENT, describe
+
+RESULTS_PATH = CACHE_DIR / "link-check.json"
+OK_TTL = 7 * DAY
+BROKEN_TTL = DAY
+ERROR_TTL = HOUR
+WORKERS = 16
+PER_HOST = 4
+TIMEOUT = 10
+MAX_REDIRECTS = 5
+MAX_BODY = 64 * 1024
+# Statuses that usually mean "no robots" rather than "gone"
+BLOCKED_STATUSES = {401, 403, 429, 999}
+
+TAG_PATTERN = re.compile(r'<[a-zA-Z](?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+REL_PATTERN = re.compile(r'\brel=(["\'])([^"\']*)\1', re.IGNORECASE)
+ID_PATTERN = re.compile(r'\bid=(["\'])([^"\']+)\1')
+# <link rel=...> values that name an origin, not a document
+ORIGIN_RELS = {"preconnect", "dns-prefetch"}
+
+def page_links(html):
+    """(local URLs, external URLs, fragment-only URLs) referenced by a page."""
+    local, external, anchors = set(), set(), set()
+    for tag in TAG_PATTERN.findall(html):
+        rel = REL_PATTERN.search(tag)
+        if rel and ORIGIN_RELS & set(rel.group(2).lower().split()):
+            continue
+        for match in ATTRIBUTE_PATTERN.finditer(tag):
+            url = match.group(3).strip()
+            if url.startswith("#"):
+                anchors.add(url)
+            elif is_local(url):
+                local.add(url)
+            elif urlsplit(url).scheme in ("http", "https"):
+                external.add(url)
+    return local, external, anchors
+
+def missing_local(page, html, out_dir):
+    """Local URLs and #anchors of a page that do not resolve in out_dir."""
+    local, _, anchors = page_links(html)
+    missing = []
+    for url in sorted(local):
+        path = logical_path(url)
+        if url.startswith("/"):
+            target = out_dir / path
+        else:
+            target = page.parent / path
+        if target.is_dir():
+            target = target / "index.html"
+        if not target.is_file():
+            missing.append(url)
+    ids = {match.group(2) for match in ID_PATTERN.finditer(html)}
+    missing.extend(sorted(url for url in anchors if len(url) > 1 and url[1:] not in ids))
+    return missing
+
+def store_links(json_path=None):
+    """{url: [publication ids]} for every link in the publication store."""
+    data = load_publications(json_path) if json_path else load_publications()
+    links = {}
+    for pub in records_from_data(data):
+        for field in LINK_FIELDS:
+            url = getattr(pub, field)
+            if urlsplit(url).scheme in ("http", "https"):
+                links.setdefault(url, []).append(pub.id)
+    return links
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, one per host and thread; PER_HOST requests per host at a time."""
+
+    def __init__(self, timeout=TIMEOUT, per_host=PER_HOST):
+        self.timeout = timeout
+        self.per_host = per_host
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.opened = []
+        self.down = {}  # origin -> error, for hosts that cannot be resolved or refuse connections
+        self.context = ssl.create_default_context()
+
+    def _slot(self, origin):
+        with self.lock:
+            if origin not in self.slots:
+                self.slots[origin] = threading.BoundedSemaphore(self.per_host)
+            return self.slots[origin]
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self.local, "connections", None)
+        if connections is None:
+            connections = self.local.connections = {}
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            if scheme == "https":
+                connection = http.client.HTTPSConnection(netloc, timeout=self.timeout, context=self.context)
+            else:
+                connection = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            connections[(scheme, netloc)] = connection
+            with self.lock:
+                self.opened.append(connection)
+        return connection
+
+    def _drop(self, scheme, netloc):
+        connection = self.local.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        for connection in self.opened:
+            connection.close()
+
+    def request(self, method, url, headers=None):
+        """(status, headers) for one request; at most MAX_BODY bytes of the body are read."""
+        parts = urlsplit(url)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers = {"User-Agent": USER_AGENT, "Accept": "*/*", **(headers or {})}
+        origin = (parts.scheme, parts.netloc)
+        if origin in self.down:
+            raise OSError(self.down[origin])
+        with self._slot(origin):
+            # A kept-alive connection may have been closed by the server: retry once on a fresh one
+            for attempt in (1, 2):
+                connection = self._connection(parts.scheme, parts.netloc)
+                try:
+                    connection.request(method, target, headers=headers)
+                    response = connection.getresponse()
+                    response.read(MAX_BODY)
+                except (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError):
+                    self._drop(parts.scheme, parts.netloc)
+                    if attempt == 2:
+                        raise
+                    continue
+                except (socket.gaierror, ConnectionRefusedError) as e:
+                    # Every other URL on this host would fail the same way
+                    self.down[origin] = str(e)
+                    self._drop(parts.scheme, parts.netloc)
+                    raise
+                except (OSError, http.client.HTTPException):
+                    self._drop(parts.scheme, parts.netloc)
+                    raise
+                if response.will_close or not response.isclosed():
+                    # Closing beats downloading the rest of a body that ignored Range
+                    self._drop(parts.scheme, parts.netloc)
+                return response.status, response.headers
+
+def check_url(pool, url):
+    """Check one URL: {"status", "reason", "final_url"}; status None for network errors."""
+    current = url
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers = pool.request("HEAD", current)
+            if status >= 400 and status not in GONE_STATUSES:
+                # Some servers reject or mishandle HEAD; ask for one byte instead
+                status, headers = pool.request("GET", current, {"Range": "bytes=0-0"})
+            if status in (301, 302, 303, 307, 308) and headers.get("Location"):
+                current = urljoin(current, headers["Location"])
+                continue
+            return {"status": status, "reason": http.client.responses.get(status, ""), "final_url": current}
+        return {"status": None, "reason": "too many redirects", "final_url": current}
+    except (socket.timeout, TimeoutError):
+        return {"status": None, "reason": "timed out", "final_url": current}
+    except ssl.SSLError as e:
+        return {"status": None, "reason": f"TLS error: {e.reason or e}", "final_url": current}
+    except (OSError, http.client.HTTPException) as e:
+        return {"status": None, "reason": str(e) or type(e).__name__, "final_url": current}
+
+def verdict(result):
+    """"ok", "blocked" (the server refuses robots), "broken" or "error"."""
+    status = result["status"]
+    if status is None:
+        return "error"
+    if status < 400:
+        return "ok"
+    if status in BLOCKED_STATUSES:
+        return "blocked"
+    return "broken" if status < 500 else "error"
+
+def result_ttl(result):
+    return {"ok": OK_TTL, "blocked": BROKEN_TTL, "broken": BROKEN_TTL}.get(verdict(result), ERROR_TTL)
+
+class LinkCache:
+    """Canonical URL -> last check result with "checked_at"; entries expire by result_ttl."""
+
+    def __init__(self, path=RESULTS_PATH, refresh=False):
+        self.path = path
+        self.refresh = refresh
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lookup(self, url, now=None):
+        entry = self.entries.get(url)
+        now = time.time() if now is None else now
+        if self.refresh or entry is None or entry["checked_at"] + result_ttl(entry) <= now:
+            return None
+        return entry
+
+    def store(self, url, result, now=None):
+        self.entries[url] = {**result, "checked_at": time.time() if now is None else now}
+
+    def save(self):
+        now = time.time()
+        self.entries = {url: entry for url, entry in self.entries.items()
+                        if entry["checked_at"] + result_ttl(entry) > now}
+        CACHE_DIR.mkdir(exist_ok=True)
+        atomic_write(self.path, json.dumps(self.entries, indent=2, sort_keys=True) + "\n")
+
+def check_urls(urls, cache=None, workers=WORKERS, timeout=TIMEOUT):
+    """{url: result} for external URLs; cached results are reused, the rest fetched concurrently.
+
+    Returns (results, number fetched).
+    """
+    keys = {}
+    for url in urls:
+        try:
+            # Fragments never reach the server
+            keys[url] = canonical_url(url).split("#")[0]
+        except ValueError:
+            keys[url] = url
+    results = {}
+    pending = set()
+    for key in set(keys.values()):
+        entry = cache.lookup(key) if cache is not None else None
+        if entry is not None:
+            results[key] = entry
+        else:
+            pending.add(key)
+    if pending:
+        pool = ConnectionPool(timeout)
+        # Interleave hosts so one slow host does not hold every worker
+        by_host = {}
+        for key in sorted(pending):
+            by_host.setdefault(urlsplit(key).netloc, []).append(key)
+        ordered = [key for group in itertools.zip_longest(*by_host.values()) for key in group if key]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for key, result in zip(ordered, executor.map(lambda key: check_url(pool, key), ordered)):
+                results[key] = result
+                if cache is not None:
+                    cache.store(key, result)
+        pool.close()
+    return {url: results[key] for url, key in keys.items()}, len(pending)
+
+def check_site(out_dir, external=True, refresh=False, workers=WORKERS, json_path=None):
+    """Check out_dir's pages (and the store's links); returns {problem kind: [(url, where, detail)]}."""
+    out_dir = Path(out_dir)
+    problems = {"missing": [], "broken": [], "error": [], "blocked": []}
+    sources = {}
+    for page in sorted(out_dir.glob("*.html")):
+        html = page.read_text(encoding='utf-8')
+        for url in missing_local(page, html, out_dir):
+            problems["missing"].append((url, page.name, "not in " + str(out_dir)))
+        for url in page_links(html)[1]:
+            sources.setdefault(url, []).append(page.name)
+    if not external:
+        return problems, 0, 0
+
+    for url, ids in store_links(json_path).items():
+        sources.setdefault(url, []).extend(ids)
+    cache = LinkCache(refresh=refresh)
+    results, fetched = check_urls(sources, cache, workers)
+    cache.save()
+    for url, result in sorted(results.items()):
+        kind = verdict(result)
+        if kind != "ok":
+            problems[kind].append((url, ", ".join(sources[url][:3]), describe(result["status"], result["reason"])))
+    return problems, len(results), fetched
+
+def print_problems(problems):
+    labels = {
+        "missing": "✗ Missing local file or anchor",
+        "broken": "✗ Broken",
+        "error": "⚠ Unreachable",
+        "blocked": "⚠ Refused by server (may work in a browser)",
+    }
+    for kind, label in labels.items():
+        for url, where, detail in problems[kind]:
+            print(f"  {label}: {url} ({detail}; in {where})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the links of the built site.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    parser.add_argument("--no-external", action="store_true", help="only check local files and anchors")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached results")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent requests")
+    args = parser.parse_args()
+
+    if not Path(args.out).is_dir():
+        print(f"✗ {args.out} not found (run python3 build_site.py first)")
+        sys.exit(1)
+    started = time.monotonic()
+    problems, checked, fetched = check_site(args.out, external=not args.no_external,
+                                            refresh=args.refresh, workers=args.workers)
+    print_problems(problems)
+    if not args.no_external:
+        print(f"  {checked} external links, {fetched} fetched, {checked - fetched} from cache")
+    failed = len(problems["missing"]) + len(problems["broken"])
+    print(f"{'✗' if failed else '✓'} {failed} broken links, {len(problems['error']) + len(problems['blocked'])} "
+          f"warnings in {time.monotonic() - started:.1f}s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# pytest collects test_*.py; test_download.py is a manual network check, not a test
+collect_ignore = ["test_download.py"]
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Hoist repeated inline styles into classes and inline only the critical CSS.
+
+Two passes over each built page:
+
+  - Inline style attributes that occur at least MIN_REPEATS times (the
+    BibTeX <pre> blocks, the lab member photos) become one class each,
+    named after a hash of the declarations so the name is stable between
+    builds. The rules get !important, which keeps them winning over the
+    stylesheet the way inline styles do. Properties in KEEP_INLINE stay in
+    the style attribute: the page's scripts read and toggle them there
+    (element.style.display).
+  - The <style> blocks in <head> (plus the hoisted rules) are written to
+    css/<page>.css, loaded without blocking rendering (media="print",
+    switched to "all" on load, with a <noscript> fallback). The page keeps
+    an inline <style> with just the rules that can match the content above
+    the fold: everything outside <section>s (navigation, header) and the
+    ABOVE_THE_FOLD sections. A selector can match when every class, id and
+    element name it mentions occurs there. The deferred stylesheet repeats
+    the critical rules, so once it loads the cascade is the original one.
+
+Usage: python3 critical_css.py [--out dist]
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+from check_links import TAG_PATTERN
+from fingerprint_assets import CSS_URL_PATTERN, is_local
+from minify_html import minify_css
+
+ABOVE_THE_FOLD = ("bio", "universities", "research")
+MIN_REPEATS = 2
+KEEP_INLINE = {"display"}
+CSS_DIR = "css"
+# At-rules whose block holds rules rather than declarations
+GROUPING_AT_RULES = ("@media", "@supports", "@layer", "@container", "@document")
+
+STYLE_ATTRIBUTE = re.compile(r'\sstyle=(["\'])(.*?)\1', re.DOTALL)
+CLASS_ATTRIBUTE = re.compile(r'\bclass=(["\'])(.*?)\1', re.DOTALL)
+HEAD_STYLE = re.compile(r'[ \t]*<style\b[^>]*>(.*?)</style\s*>\s*', re.DOTALL | re.IGNORECASE)
+SECTION = re.compile(r'<section\b[^>]*\bid=["\']?([\w-]+)[^>]*>.*?</section\s*>', re.DOTALL | re.IGNORECASE)
+ELEMENT_NAME = re.compile(r'<([a-zA-Z][a-zA-Z0-9-]*)')
+SELECTOR_NAME = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+
+def split_top_level(text, separator):
+    """Split on separator outside quotes, parentheses and brackets."""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != "\\":
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+def declarations(style):
+    """[(property, value)] of a style attribute."""
+    result = []
+    for declaration in split_top_level(style, ";"):
+        name, colon, value = declaration.partition(":")
+        if colon and name.strip() and value.strip():
+            result.append((name.strip().lower(), value.strip()))
+    return result
+
+def hoisted_class(key):
+    return "s-" + hashlib.sha256(key.encode()).hexdigest()[:6]
+
+def hoist_inline_styles(page):
+    """Move repeated inline declarations into classes; returns (page, css rules, attributes hoisted)."""
+    def split(style):
+        kept = [(name, value) for name, value in declarations(style) if name in KEEP_INLINE]
+        moved = [(name, value) for name, value in declarations(style) if name not in KEEP_INLINE]
+        key = ";".join(f"{name}:{minify_css(value)}" for name, value in moved)
+        return kept, key
+
+    counts = {}
+    for tag in TAG_PATTERN.findall(page):
+        style = STYLE_ATTRIBUTE.search(tag)
+        if style:
+            key = split(style.group(2))[1]
+            if key:
+                counts[key] = counts.get(key, 0) + 1
+    hoist = {key for key, count in counts.items() if count >= MIN_REPEATS}
+    if not hoist:
+        return page, [], 0
+
+    hoisted = 0
+
+    def rewrite(match):
+        nonlocal hoisted
+        tag = match.group(0)
+        style = STYLE_ATTRIBUTE.search(tag)
+        if not style:
+            return tag
+        kept, key = split(style.group(2))
+        if key not in hoist:
+            return tag
+        hoisted += 1
+        name = hoisted_class(key)
+        inline = "; ".join(f"{prop}: {value}" for prop, value in kept)
+        tag = tag[:style.start()] + (f' style="{inline};"' if inline else "") + tag[style.end():]
+        existing = CLASS_ATTRIBUTE.search(tag)
+        if existing:
+            quote = existing.group(1)
+            return tag[:existing.start()] + f'class={quote}{existing.group(2)} {name}{quote}' + tag[existing.end():]
+        return re.sub(r'^(<[a-zA-Z][\w-]*)', rf'\1 class="{name}"', tag)
+
+    page = TAG_PATTERN.sub(rewrite, page)
+    rules = []
+    for key in sorted(hoist):
+        body = ";".join(f"{declaration}!important" if "!important" not in declaration else declaration
+                        for declaration in key.split(";"))
+        rules.append(f".{hoisted_class(key)}{{{body}}}")
+    return page, rules, hoisted
+
+def css_rules(css):
+    """Top-level [(prelude, block)] of a stylesheet; block is None for statements like @import."""
+    rules = []
+    i = 0
+    n = len(css)
+    while i < n:
+        # Prelude: up to "{" or ";" outside strings and parentheses
+        depth = 0
+        quote = None
+        j = i
+        while j < n:
+            char = css[j]
+            if quote:
+                if char == quote and css[j - 1] != "\\":
+                    quote = None
+            elif char in "\"'":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif depth == 0 and char in "{;":
+                break
+            j += 1
+        prelude = css[i:j].strip()
+        if j >= n:
+            break
+        if css[j] == ";":
+            if prelude:
+                rules.append((prelude, None))
+            i = j + 1
+            continue
+        # Block: up to the matching "}"
+        level = 1
+        k = j + 1
+        quote = None
+        while k < n and level:
+            char = css[k]
+            if quote:
+                if char == quote and css[k - 1] != "\\":
+                    quote = None
+            elif char in "\"'":
+                quote = char
+            elif char == "{":
+                level += 1
+            elif char == "}":
+                level -= 1
+            k += 1
+        rules.append((prelude, css[j + 1:k - 1]))
+        i = k
+    return rules
+
+def page_names(fragment):
+    """Class names, ids and element names occurring in an HTML fragment."""
+    names = {"." + name for match in CLASS_ATTRIBUTE.finditer(fragment) for name in match.group(2).split()}
+    names |= {"#" + match.group(2) for match in re.finditer(r'\bid=(["\'])([^"\']+)\1', fragment)}
+    names |= {match.group(1).lower() for match in ELEMENT_NAME.finditer(fragment)}
+    return names
+
+def selector_can_match(selector, names):
+    """True when every class, id and element name in the selector occurs in names."""
+    # Attribute selectors and pseudo-class arguments say nothing about presence
+    selector = re.sub(r'\[[^\]]*\]', ' ', selector)
+    while re.search(r'\([^()]*\)', selector):
+        selector = re.sub(r'\([^()]*\)', '', selector)
+    selector = re.sub(r'::?[\w-]+', '', selector)
+    for prefix, name in SELECTOR_NAME.findall(selector):
+        token = prefix + name if prefix else name.lower()
+        if token not in names:
+            return False
+    return True
+
+def split_rules(css, names):
+    """(critical, deferred) CSS: the rules that can apply to the elements in names, and the rest of the sheet.
+
+    Both keep the original order; deferred repeats the critical style rules so
+    the cascade is unchanged once it loads. Other at-rules with a block
+    (@font-face, @keyframes) only go inline: they are small, needed as soon as
+    something refers to them, and declaring a font twice would fetch it twice.
+    Statements such as @import only go to the deferred sheet.
+    """
+    critical = []
+    deferred = []
+    for prelude, block in css_rules(css):
+        if block is None:
+            deferred.append(prelude + ";")
+        elif not prelude.startswith("@"):
+            rule = f"{prelude}{{{block}}}"
+            deferred.append(rule)
+            if any(selector_can_match(selector, names) for selector in split_top_level(prelude, ",")):
+                critical.append(rule)
+        elif prelude.lower().startswith(GROUPING_AT_RULES):
+            inner_critical, inner_deferred = split_rules(block, names)
+            if inner_critical:
+                critical.append(f"{prelude}{{{inner_critical}}}")
+            if inner_deferred:
+                deferred.append(f"{prelude}{{{inner_deferred}}}")
+        else:
+            critical.append(f"{prelude}{{{block}}}")
+    return "".join(critical), "".join(deferred)
+
+def rebase_urls(css, prefix):
+    """Prefix the local url()s of css, for a sheet that lives in a subdirectory of the page."""
+    def rebase(match):
+        url = match.group(2)
+        if not is_local(url) or url.startswith("/"):
+            return match.group(0)
+        return f"url({match.group(1)}{prefix}{url}{match.group(1)})"
+    return CSS_URL_PATTERN.sub(rebase, css)
+
+def above_the_fold(page):
+    """The markup rendered first: everything outside <section>s plus the ABOVE_THE_FOLD sections."""
+    body_start = page.lower().find("<body")
+    body = page[body_start:] if body_start >= 0 else page
+    parts = []
+    position = 0
+    for match in SECTION.finditer(body):
+        parts.append(body[position:match.start()])
+        if match.group(1) in ABOVE_THE_FOLD:
+            parts.append(match.group(0))
+        position = match.end()
+    parts.append(body[position:])
+    return "".join(parts)
+
+def split_page_css(page_path, out_dir):
+    """Hoist inline styles and defer non-critical CSS for one page.
+
+    Returns {"hoisted", "classes", "full", "critical"} (sizes in bytes), or None without head styles.
+    """
+    page = page_path.read_text(encoding='utf-8')
+    head_end = page.lower().find("</head>")
+    styles = list(HEAD_STYLE.finditer(page, 0, head_end if head_end >= 0 else len(page)))
+    if not styles:
+        return None
+    page, hoisted_rules, hoisted = hoist_inline_styles(page)
+    head_end = page.lower().find("</head>")
+    styles = list(HEAD_STYLE.finditer(page, 0, head_end))
+
+    full = minify_css("\n".join(match.group(1) for match in styles) + "\n" + "\n".join(hoisted_rules))
+    critical, deferred = split_rules(full, page_names(above_the_fold(page)))
+    css_name = f"{CSS_DIR}/{page_path.stem}.css"
+    (out_dir / CSS_DIR).mkdir(parents=True, exist_ok=True)
+    atomic_write(out_dir / css_name, rebase_urls(deferred, "../") + "\n")
+
+    replacement = (f'    <style>{critical}</style>\n'
+                   f'    <link rel="stylesheet" href="{css_name}" media="print" onload="this.media=\'all\'">\n'
+                   f'    <noscript><link rel="stylesheet" href="{css_name}"></noscript>\n')
+    for match in reversed(styles[1:]):
+        page = page[:match.start()] + page[match.end():]
+    page = page[:styles[0].start()] + replacement + page[styles[0].end():]
+    atomic_write(page_path, page)
+    return {"hoisted": hoisted, "classes": len(hoisted_rules), "full": len(full.encode()),
+            "critical": len(critical.encode())}
+
+def split_site_css(out_dir):
+    """Run split_page_css on every page in out_dir; returns {page name: result}."""
+    out_dir = Path(out_dir)
+    return {page.name: split_page_css(page, out_dir) for page in sorted(out_dir.glob("*.html"))}
+
+def print_results(results):
+    for page, result in results.items():
+        if result is None:
+            print(f"  {page}: no inline stylesheet")
+            continue
+        print(f"  {page}: {result['hoisted']} inline styles -> {result['classes']} classes, "
+              f"{result['critical'] / 1024:.1f} KB of {result['full'] / 1024:.1f} KB CSS inlined, "
+              f"rest deferred to {CSS_DIR}/{Path(page).stem}.css")
+
+def main():
+    parser = argparse.ArgumentParser(description="Hoist inline styles and inline only the critical CSS.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    args = parser.parse_args()
+    if not Path(args.out).is_dir():
+        print(f"✗ {args.out} not found (run python3 build_site.py first)")
+        sys.exit(1)
+    print_results(split_site_css(args.out))
+    print("✓ Done")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Find (and optionally merge) near-duplicate publications in the store.
+
+Titles are normalized (accents, dashes, "\\&" vs "&", punctuation, case) and
+cut into character shingles; MinHash signatures bucketed with LSH give the
+candidate pairs, so the pass stays far below quadratic on large corpora.
+Candidates are confirmed by exact shingle Jaccard similarity. Publications
+sharing a paper/preprint link are reported too, but only near-identical
+titles are ever merged.
+Usage: python3 dedupe_publications.py [json_file] [--merge] [--dry-run] [--threshold 0.8]
+"""
+
+import argparse
+import re
+import sys
+import unicodedata
+import zlib
+from pathlib import Path
+
+from build_output import build_lock
+from publication_store import CANONICAL_PATH, OPTIONAL_FIELDS, SchemaError, load_publications, save_publications
+
+SHINGLE_SIZE = 4
+SLOT_BITS = 6
+NUM_PERM = 1 << SLOT_BITS  # signature length
+BANDS = 10                 # 10 bands x 6 rows: ~95% of pairs at 0.8 similarity collide, ~1% at 0.35
+ROWS = 6
+THRESHOLD = 0.8
+MAX_LINK_GROUP = 20        # a link shared by more entries than this is a placeholder, not a duplicate
+ESTIMATE_MARGIN = 0.2      # only candidates whose signatures agree this closely get an exact check
+MIX = 0x9E3779B1           # odd multiplier: spreads crc32 values over the high bits
+VALUE_BITS = 32 - SLOT_BITS
+
+def normalize_title(title):
+    """Lowercase ASCII words only: 'Explaining the Black-box Smoothly — A \\& B' -> 'explaining the black box smoothly a and b'."""
+    text = title.replace("\\&", "&").replace("&amp;", "&").replace("&", " and ")
+    text = re.sub(r'<[^>]+>|\\[a-zA-Z]+|[{}]', ' ', text)
+    text = re.sub(r'[‐-―\-]', ' ', text)
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hashed character shingles of text."""
+    if len(text) <= size:
+        return {zlib.crc32(text.encode())}
+    return {zlib.crc32(text[i:i + size].encode()) for i in range(len(text) - size + 1)}
+
+def minhash(hashes):
+    """MinHash signature of a set of shingle hashes (one-permutation hashing).
+
+    Each hash goes to one of NUM_PERM slots by its top bits and the slot
+    keeps the smallest remainder, so a signature costs one pass over the
+    shingles instead of NUM_PERM. Empty slots borrow from the next filled
+    one (densification) so short titles still band consistently.
+    """
+    slots = [None] * NUM_PERM
+    for h in hashes:
+        h = (h * MIX) & 0xFFFFFFFF
+        slot, value = h >> VALUE_BITS, h & ((1 << VALUE_BITS) - 1)
+        if slots[slot] is None or value < slots[slot]:
+            slots[slot] = value
+    signature = list(slots)
+    for i, value in enumerate(slots):
+        if value is None:
+            step = 1
+            while slots[(i + step) % NUM_PERM] is None:
+                step += 1
+            signature[i] = slots[(i + step) % NUM_PERM] + (step << VALUE_BITS)
+    return tuple(signature)
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+def estimated_similarity(sig_a, sig_b):
+    """Fraction of matching signature slots (an estimate of the Jaccard similarity)."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+def normalize_link(url):
+    url = (url or "").strip().lower()
+    url = re.sub(r'^https?://(www\.)?', '', url)
+    return url.rstrip("/")
+
+def find_duplicates(publications, threshold=THRESHOLD):
+    """Likely duplicate pairs among [(id, year, pub)].
+
+    Returns dicts {"a", "b", "similarity", "reason"} with reason "title"
+    (shingle similarity >= threshold) or "link" (same paper/preprint link).
+    """
+    shingle_sets = []
+    signatures = []
+    buckets = {}
+    for index, (_, _, pub) in enumerate(publications):
+        hashes = shingles(normalize_title(pub.get("title") or ""))
+        shingle_sets.append(hashes)
+        signature = minhash(hashes)
+        signatures.append(signature)
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS:(band + 1) * ROWS])
+            buckets.setdefault(key, []).append(index)
+
+    candidates = set()
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                candidates.add((first, second))
+
+    pairs = []
+    for first, second in sorted(candidates):
+        if estimated_similarity(signatures[first], signatures[second]) < threshold - ESTIMATE_MARGIN:
+            continue
+        similarity = jaccard(shingle_sets[first], shingle_sets[second])
+        if similarity >= threshold:
+            pairs.append({"a": publications[first][0], "b": publications[second][0],
+                          "similarity": similarity, "reason": "title"})
+
+    # Same link, different title: usually a copy-paste slip worth a look
+    by_link = {}
+    for index, (_, _, pub) in enumerate(publications):
+        for field in ("paper_link", "preprint_link"):
+            link = normalize_link(pub.get(field))
+            if link:
+                by_link.setdefault(link, set()).add(index)
+    title_pairs = {(p["a"], p["b"]) for p in pairs}
+    for link, members in sorted(by_link.items()):
+        members = sorted(members)
+        if len(members) < 2 or len(members) > MAX_LINK_GROUP:
+            continue
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                ids = (publications[first][0], publications[second][0])
+                if ids not in title_pairs:
+                    pairs.append({"a": ids[0], "b": ids[1], "reason": "link", "link": link,
+                                  "similarity": jaccard(shingle_sets[first], shingle_sets[second])})
+    return pairs
+
+def merge_duplicates(data, pairs):
+    """Merge title duplicates in place; returns [(kept_id, [merged_ids])].
+
+    Each group keeps the entry with the most fields filled in (newest first
+    on ties) and copies over any field only the others have.
+    """
+    parent = {}
+
+    def find(pub_id):
+        while parent.get(pub_id, pub_id) != pub_id:
+            pub_id = parent[pub_id]
+        return pub_id
+
+    for pair in pairs:
+        if pair["reason"] == "title":
+            root_a, root_b = find(pair["a"]), find(pair["b"])
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    groups = {}
+    order = {}
+    for year in sorted(data, reverse=True):
+        for pub in data[year]:
+            order[pub["id"]] = len(order)
+            groups.setdefault(find(pub["id"]), []).append(pub)
+
+    def filled(pub):
+        return sum(1 for field in OPTIONAL_FIELDS if pub.get(field))
+
+    merged = []
+    dropped = set()
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        keep = max(members, key=lambda pub: (filled(pub), -order[pub["id"]]))
+        others = [pub for pub in members if pub is not keep]
+        for other in others:
+            for field, value in other.items():
+                if value and not keep.get(field):
+                    keep[field] = value
+            dropped.add(id(other))
+        merged.append((keep["id"], [pub["id"] for pub in others]))
+
+    for year in list(data):
+        data[year] = [pub for pub in data[year] if id(pub) not in dropped]
+        if not data[year]:
+            del data[year]
+    return merged
+
+def main():
+    parser = argparse.ArgumentParser(description="Report or merge near-duplicate publications.")
+    parser.add_argument("json_file", nargs="?", default=str(CANONICAL_PATH))
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="title similarity (0-1) that counts as a duplicate")
+    parser.add_argument("--merge", action="store_true", help="merge title duplicates and save the store")
+    parser.add_argument("--dry-run", action="store_true", help="with --merge, report without saving")
+    args = parser.parse_args()
+
+    path = Path(args.json_file)
+    try:
+        data = load_publications(path)
+    except SchemaError as e:
+        print(f"✗ {path.name}: {e}")
+        sys.exit(1)
+
+    publications = [(pub["id"], year, pub) for year in sorted(data, reverse=True) for pub in data[year]]
+    titles = {pub_id: pub["title"] for pub_id, _, pub in publications}
+    pairs = find_duplicates(publications, args.threshold)
+
+    if not pairs:
+        print(f"✓ No likely duplicates among {len(publications)} publications")
+        return
+    for pair in pairs:
+        if pair["reason"] == "title":
+            print(f"⚠ {pair['similarity']:.0%} similar titles:")
+        else:
+            print(f"⚠ Same link ({pair['link']}), {pair['similarity']:.0%} similar titles:")
+        print(f"    {pair['a']}: {titles[pair['a']]}")
+        print(f"    {pair['b']}: {titles[pair['b']]}")
+
+    if not args.merge:
+        return
+    merged = merge_duplicates(data, pairs)
+    for keep, others in merged:
+        print(f"✓ Merged {', '.join(others)} into {keep}")
+    if not merged:
+        print("Nothing to merge (only shared links, which need a manual look)")
+    elif args.dry_run:
+        print(f"Dry run: {path.name} not written")
+    else:
+        save_publications(data, path)
+        print(f"✓ Saved {path.name}")
+
+if __name__ == "__main__":
+    with build_lock():
+        main()
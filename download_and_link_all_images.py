@@ -1,24 +1,30 @@
 #!/usr/bin/env python3
 """
 Download ALL image icons from JSON and link them to CORRESPONDING publications in index.html
+URLs that failed recently are skipped (see url_failures.py).
+Usage: python3 download_and_link_all_images.py [--dry-run] [--recheck-failed]
 """
 
-import json
 import re
 import os
+import time
 from pathlib import Path
 from urllib.parse import urlparse
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 
-def download_image(url, save_path):
-    """Download an image from URL to save_path."""
+from build_output import build_lock, pop_dry_run_flag, write_html
+from canonical_urls import canonical_url
+from publication_store import CANONICAL_PATH, load_publications
+from url_failures import FailureCache, FetchFailed, fetch, format_wait, pop_recheck_flag
+
+def download_image(url, save_path, failures=None):
+    """Download an image from URL to save_path.
+
+    With a FailureCache, URLs that failed recently are skipped without a request.
+    """
     try:
-        # Fix URL if it has double 'h'
-        if url.startswith('hhttps'):
-            url = url[1:]
-        
-        if not url or url == "":
+        # Canonical form (fixes 'hhttps', host aliases, encoding)
+        url = canonical_url(url)
+        if not url:
             return None
         
         # Create directory if it doesn't exist
@@ -37,18 +43,22 @@ def download_image(url, save_path):
             save_path = os.path.splitext(save_path)[0] + ext
         
         # Download with urllib
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
-        with urlopen(req, timeout=30) as response:
-            content_type = response.headers.get('content-type', '')
-            if 'image/jpeg' in content_type and not save_path.endswith('.jpg'):
-                save_path = os.path.splitext(save_path)[0] + '.jpg'
-            
-            with open(save_path, 'wb') as f:
-                f.write(response.read())
+        body, content_type = fetch(url, failures, timeout=30, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
+        if 'image/jpeg' in content_type and not save_path.endswith('.jpg'):
+            save_path = os.path.splitext(save_path)[0] + '.jpg'
+        
+        with open(save_path, 'wb') as f:
+            f.write(body)
         
         print(f"✓ Downloaded: {os.path.basename(save_path)}")
         return save_path
-    except (URLError, HTTPError, Exception) as e:
+    except FetchFailed as e:
+        if e.cached:
+            print(f"✗ Skipped {url[:60]}... ({e}, failed recently; retry in {format_wait(e.retry_at - time.time())})")
+        else:
+            print(f"✗ Failed to download {url[:60]}...: {e}")
+        return None
+    except Exception as e:
         print(f"✗ Failed to download {url[:60] if url else 'empty URL'}...: {e}")
         return None
 
@@ -63,7 +73,7 @@ def find_paper_article_block(html_content, title):
     # Escape special regex characters but allow flexible matching
     escaped_title = re.escape(title)
     # Match article block containing this exact title in h5
-    pattern = rf'(<article class="item-row">.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
+    pattern = rf'(<article class="item-row"[^>]*>.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
     match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
     return match
 
@@ -77,12 +87,12 @@ def update_image_src(html_content, title, image_path):
     # Find the article block by matching the h5 tag with the title
     # The structure is: <article><img src="..."><div><h5>title</h5>...
     # We need to find the img tag in the same article as the h5 with this title
-    pattern = rf'(<article class="item-row">\s*<img src=")[^"]+(" alt="[^"]*" onerror="[^"]*">\s*<div>\s*<h5[^>]*>{escaped_title}</h5>)'
+    pattern = rf'(<article class="item-row"[^>]*>\s*<img src=")[^"]+(" alt="[^"]*" onerror="[^"]*">\s*<div>\s*<h5[^>]*>{escaped_title}</h5>)'
     match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
     
     if not match:
         # Try a more flexible pattern - match any img before the h5 with this title in the same article
-        pattern2 = rf'(<article class="item-row">.*?<img src=")[^"]+(" alt="[^"]*" onerror="[^"]*">.*?<h5[^>]*>{escaped_title}</h5>)'
+        pattern2 = rf'(<article class="item-row"[^>]*>.*?<img src=")[^"]+(" alt="[^"]*" onerror="[^"]*">.*?<h5[^>]*>{escaped_title}</h5>)'
         match = re.search(pattern2, html_content, re.DOTALL | re.IGNORECASE)
     
     if not match:
@@ -95,19 +105,19 @@ def update_image_src(html_content, title, image_path):
     return updated_content, True
 
 def main():
+    dry_run = pop_dry_run_flag()
+    failures = FailureCache(recheck=pop_recheck_flag())
     base_dir = Path(__file__).parent
     index_html_path = base_dir / "index.html"
     images_dir = base_dir / "images" / "publications"
     images_dir.mkdir(parents=True, exist_ok=True)
     
     # Load JSON
-    json_file = base_dir / "publications_complete.json"
-    if not json_file.exists():
-        print(f"✗ JSON file not found: {json_file}")
+    if not CANONICAL_PATH.exists():
+        print(f"✗ JSON file not found: {CANONICAL_PATH}")
         return
     
-    with open(json_file, 'r', encoding='utf-8') as f:
-        full_json_data = json.load(f)
+    full_json_data = load_publications()
     
     print(f"✓ Loaded JSON with {sum(len(pubs) for pubs in full_json_data.values())} publications")
     
@@ -135,7 +145,7 @@ def main():
             if not title:
                 continue
             
-            if not img_url or img_url == "":
+            if not img_url:
                 # Use placeholder for papers without image URLs
                 relative_path = "images/bu-logo.png"
                 html_content, updated = update_image_src(html_content, title, relative_path)
@@ -154,7 +164,7 @@ def main():
             relative_path = f"images/publications/{img_filename}"
             
             # Download image
-            downloaded_path = download_image(img_url, str(img_path))
+            downloaded_path = download_image(img_url, str(img_path), failures)
             if downloaded_path:
                 downloaded_count += 1
                 # Update path to use actual downloaded filename
@@ -168,6 +178,8 @@ def main():
             else:
                 failed_count += 1
     
+    failures.save()
+    
     print(f"\n{'=' * 60}")
     print(f"Summary:")
     print(f"  Downloaded: {downloaded_count} images")
@@ -178,10 +190,11 @@ def main():
     
     # Write updated HTML
     print(f"\nWriting updated HTML to {index_html_path}...")
-    with open(index_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    if not write_html(index_html_path, html_content, dry_run):
+        return
     
     print("✓ Successfully updated index.html")
 
 if __name__ == "__main__":
-    main()
+    with build_lock():
+        main()
@@ -10,6 +10,8 @@ import urllib.parse
 from pathlib import Path
 from urllib.error import URLError, HTTPError
 
+from build_output import pop_dry_run_flag, write_html
+
 html_path = Path("/Users/kayhan/Documents/Projects/newWebSite/index.html")
 files_dir = Path("/Users/kayhan/Documents/Projects/newWebSite/files")
 
@@ -67,7 +69,5 @@ for pdf_url, local_path in url_to_local.items():
     updated_html = updated_html.replace(f'href="{pdf_url}"', f'href="{local_path}"')
 
 # Write updated HTML
-with open(html_path, 'w', encoding='utf-8') as f:
-    f.write(updated_html)
-
-print(f"\nUpdated {html_path} with local file paths")
+if write_html(html_path, updated_html, pop_dry_run_flag()):
+    print(f"\nUpdated {html_path} with local file paths")
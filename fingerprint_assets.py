@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Fingerprint the assets referenced by the built HTML for immutable caching.
+
+Every local file referenced from dist/*.html (images, PDFs, JSON/CSS/JS
+bundles) gets a content-hashed copy (name.<hash>.ext), references in the
+HTML are rewritten to the hashed names, and so are the url()s inside the
+hashed copies of stylesheets (whose assets are fingerprinted as well).
+asset-manifest.json maps the logical names to the hashed ones. The original
+files stay in place so existing inbound links keep working. A _headers file
+marks the hashed files as cacheable for a year on hosts that read it.
+Usage: python3 fingerprint_assets.py [dist]
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+from build_output import atomic_write
+
+MANIFEST_NAME = "asset-manifest.json"
+HEADERS_NAME = "_headers"
+HASH_LENGTH = 10
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# Attribute values, srcset lists and inline JS fallbacks such as this.src='...'
+ATTRIBUTE_PATTERN = re.compile(r'\b(src|href|poster|data-src)=(["\'])([^"\']+)\2', re.IGNORECASE)
+SRCSET_PATTERN = re.compile(r'\b(srcset|imagesrcset)=(["\'])([^"\']+)\2', re.IGNORECASE)
+INLINE_SRC_PATTERN = re.compile(r"(this\.src=)(['\"])([^'\"]+)\2")
+CSS_URL_PATTERN = re.compile(r'url\((["\']?)([^)"\']+)\1\)')
+
+def is_local(url):
+    """True for relative paths inside the site (not external, data: or anchors)."""
+    if not url or url.startswith(("#", "data:", "mailto:", "tel:", "javascript:", "//")):
+        return False
+    return not urlsplit(url).scheme
+
+def logical_path(url):
+    """Site-relative file path for a local URL (query/fragment and ./ stripped)."""
+    path = unquote(urlsplit(url).path)
+    return path.lstrip("/").removeprefix("./")
+
+def hashed_name(path, digest):
+    """images/foo.png -> images/foo.<hash>.png"""
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}"))
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def find_references(html):
+    """All local asset URLs referenced by html."""
+    urls = set()
+    for match in ATTRIBUTE_PATTERN.finditer(html):
+        urls.add(match.group(3))
+    for match in SRCSET_PATTERN.finditer(html):
+        for candidate in match.group(3).split(","):
+            if candidate.strip():
+                urls.add(candidate.strip().split()[0])
+    for match in INLINE_SRC_PATTERN.finditer(html):
+        urls.add(match.group(3))
+    for match in CSS_URL_PATTERN.finditer(html):
+        urls.add(match.group(2))
+    return {url for url in urls if is_local(url)}
+
+def rewrite_references(html, mapping):
+    """Replace local URLs with their fingerprinted names using mapping {logical: hashed}."""
+
+    def replace_url(url):
+        if not is_local(url):
+            return url
+        hashed = mapping.get(logical_path(url))
+        if not hashed:
+            return url
+        parts = urlsplit(url)
+        rewritten = quote(hashed)
+        if parts.query:
+            rewritten += "?" + parts.query
+        if parts.fragment:
+            rewritten += "#" + parts.fragment
+        return rewritten
+
+    html = ATTRIBUTE_PATTERN.sub(lambda m: f'{m.group(1)}={m.group(2)}{replace_url(m.group(3))}{m.group(2)}', html)
+    html = SRCSET_PATTERN.sub(lambda m: f'{m.group(1)}={m.group(2)}' + ", ".join(
+        " ".join([replace_url(c.strip().split()[0])] + c.strip().split()[1:])
+        for c in m.group(3).split(",") if c.strip()
+    ) + m.group(2), html)
+    html = INLINE_SRC_PATTERN.sub(lambda m: f'{m.group(1)}{m.group(2)}{replace_url(m.group(3))}{m.group(2)}', html)
+    html = CSS_URL_PATTERN.sub(lambda m: f'url({m.group(1)}{replace_url(m.group(2))}{m.group(1)})', html)
+    return html
+
+def stylesheet_path(url, sheet):
+    """Site-relative path of a local url() in the stylesheet at site path sheet."""
+    if url.startswith("/"):
+        return logical_path(url)
+    return posixpath.normpath(posixpath.join(posixpath.dirname(sheet), logical_path(url)))
+
+def stylesheet_references(css, sheet):
+    """Site-relative paths of the local assets the stylesheet at site path sheet loads."""
+    return {stylesheet_path(m.group(2), sheet) for m in CSS_URL_PATTERN.finditer(css) if is_local(m.group(2))}
+
+def rewrite_stylesheet(css, sheet, mapping):
+    """Point the url()s of the stylesheet at site path sheet to their fingerprinted names."""
+
+    def replace(match):
+        url = match.group(2)
+        hashed = mapping.get(stylesheet_path(url, sheet)) if is_local(url) else None
+        if not hashed:
+            return match.group(0)
+        parts = urlsplit(url)
+        rewritten = quote("/" + hashed if url.startswith("/") else posixpath.relpath(hashed, posixpath.dirname(sheet) or "."))
+        if parts.query:
+            rewritten += "?" + parts.query
+        if parts.fragment:
+            rewritten += "#" + parts.fragment
+        return f'url({match.group(1)}{rewritten}{match.group(1)})'
+
+    return CSS_URL_PATTERN.sub(replace, css)
+
+def load_manifest(out_dir):
+    path = Path(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {"assets": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def link_or_copy(source, target):
+    """Hard-link when possible (no extra disk space), otherwise copy."""
+    if target.exists():
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def fingerprint_site(out_dir, extra_assets=()):
+    """Fingerprint assets referenced by out_dir/*.html plus extra_assets; returns the manifest."""
+    out_dir = Path(out_dir)
+    previous = load_manifest(out_dir).get("assets", {})
+    pages = sorted(out_dir.glob("*.html"))
+
+    references = set(extra_assets)
+    for page in pages:
+        references |= {logical_path(url) for url in find_references(page.read_text(encoding='utf-8'))}
+    # Assets loaded by stylesheets, which are hashed after their url()s point at hashed names
+    stylesheets = {logical for logical in references if logical.endswith(".css") and (out_dir / logical).is_file()}
+    for sheet in stylesheets:
+        references |= stylesheet_references((out_dir / sheet).read_text(encoding='utf-8'), sheet)
+
+    assets = {}
+    missing = []
+    mapping = {}
+    for logical in sorted(references, key=lambda logical: (logical in stylesheets, logical)):
+        source = out_dir / logical
+        if not source.is_file():
+            missing.append(logical)
+            continue
+        if logical in stylesheets:
+            # The hashed copy gets the rewritten url()s; the original keeps plain names
+            css = rewrite_stylesheet(source.read_text(encoding='utf-8'), logical, mapping).encode('utf-8')
+            digest = hashlib.sha256(css).hexdigest()
+            hashed = hashed_name(logical, digest)
+            if not (out_dir / hashed).exists():
+                atomic_write(out_dir / hashed, css)
+            size = len(css)
+        else:
+            digest = file_sha256(source)
+            hashed = hashed_name(logical, digest)
+            link_or_copy(source, out_dir / hashed)
+            size = source.stat().st_size
+        assets[logical] = {"file": hashed, "sha256": digest, "size": size}
+        mapping[logical] = hashed
+
+    for page in pages:
+        html = page.read_text(encoding='utf-8')
+        rewritten = rewrite_references(html, mapping)
+        if rewritten != html:
+            atomic_write(page, rewritten)
+
+    # Drop hashed copies from earlier builds that nothing references any more,
+    # with the .gz/.br siblings precompress.py wrote for them
+    current_files = set(mapping.values())
+    for entry in previous.values():
+        if entry["file"] in current_files:
+            continue
+        stale = out_dir / entry["file"]
+        for path in (stale, stale.with_name(stale.name + ".gz"), stale.with_name(stale.name + ".br")):
+            if path.exists():
+                path.unlink()
+
+    manifest = {"version": 1, "assets": assets}
+    atomic_write(out_dir / MANIFEST_NAME, json.dumps(manifest, indent=2, ensure_ascii=False) + "\n")
+    write_headers(out_dir, mapping.values())
+
+    return manifest, missing
+
+def write_headers(out_dir, hashed_files):
+    """Cache-Control rules for hosts that support a _headers file (Netlify, Cloudflare Pages)."""
+    lines = []
+    for hashed in sorted(hashed_files):
+        lines.append("/" + quote(hashed))
+        lines.append(f"  Cache-Control: {IMMUTABLE_CACHE}")
+    lines.append("/" + MANIFEST_NAME)
+    lines.append("  Cache-Control: no-cache")
+    atomic_write(Path(out_dir) / HEADERS_NAME, "\n".join(lines) + "\n")
+
+def main():
+    out_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("dist")
+    if not out_dir.is_dir():
+        print(f"✗ {out_dir} is not a directory (run build_site.py first)")
+        sys.exit(1)
+    manifest, missing = fingerprint_site(out_dir)
+    for logical in missing:
+        print(f"⚠ Referenced but missing: {logical}")
+    print(f"✓ Fingerprinted {len(manifest['assets'])} assets, manifest in {out_dir / MANIFEST_NAME}")
+
+if __name__ == "__main__":
+    main()
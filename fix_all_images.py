@@ -3,7 +3,6 @@
 Script to download ALL image icons from JSON and link them correctly in index.html
 """
 
-import json
 import re
 import os
 from pathlib import Path
@@ -11,14 +10,16 @@ from urllib.parse import urlparse
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
+from build_output import build_lock, pop_dry_run_flag, write_html
+from canonical_urls import canonical_url
+from publication_store import CANONICAL_PATH, load_publications
+
 def download_image(url, save_path):
     """Download an image from URL to save_path."""
     try:
-        # Fix URL if it has double 'h' (like in Anatomy-Guided)
-        if url.startswith('hhttps'):
-            url = url[1:]
-        
-        if not url or url == "":
+        # Canonical form (fixes 'hhttps', host aliases, encoding)
+        url = canonical_url(url)
+        if not url:
             return None
         
         # Create directory if it doesn't exist
@@ -65,7 +66,7 @@ def find_paper_in_html(html_content, title):
     # Escape special regex characters in title
     escaped_title = re.escape(title)
     # Match the article block containing this title (case insensitive)
-    pattern = rf'(<article class="item-row">.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
+    pattern = rf'(<article class="item-row"[^>]*>.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
     match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
     return match
 
@@ -91,34 +92,19 @@ def update_image_in_html(html_content, title, image_path):
     return html_content, True
 
 def main():
+    dry_run = pop_dry_run_flag()
     base_dir = Path(__file__).parent
     index_html_path = base_dir / "index.html"
     images_dir = base_dir / "images" / "publications"
     images_dir.mkdir(parents=True, exist_ok=True)
     
-    # Try to load JSON from various possible files
-    json_files = [
-        base_dir / "publications_complete.json",
-        base_dir / "publications_user_data.json",
-        base_dir / "publications_full.json",
-        base_dir / "publications_data.json",
-    ]
-    
-    full_json_data = None
-    for json_file in json_files:
-        if json_file.exists():
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    full_json_data = json.load(f)
-                print(f"✓ Loaded JSON from {json_file.name}")
-                break
-            except Exception as e:
-                print(f"⚠ Error loading {json_file.name}: {e}")
-                continue
-    
-    if not full_json_data:
-        print("✗ No valid JSON file found.")
+    # Load the canonical publication store
+    try:
+        full_json_data = load_publications()
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not load {CANONICAL_PATH.name}: {e}")
         return
+    print(f"✓ Loaded JSON from {CANONICAL_PATH.name}")
     
     # Read HTML
     print(f"\nReading {index_html_path}...")
@@ -143,7 +129,7 @@ def main():
             if not title:
                 continue
             
-            if not img_url or img_url == "":
+            if not img_url:
                 print(f"⚠ No image URL for: {title[:60]}... (will use placeholder)")
                 # Use placeholder image for papers without image URLs
                 relative_path = "images/bu-logo.png"
@@ -186,10 +172,11 @@ def main():
     
     # Write updated HTML
     print(f"\nWriting updated HTML to {index_html_path}...")
-    with open(index_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    if not write_html(index_html_path, html_content, dry_run):
+        return
     
     print("✓ Successfully updated index.html")
 
 if __name__ == "__main__":
-    main()
+    with build_lock():
+        main()
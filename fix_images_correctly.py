@@ -3,7 +3,6 @@
 Correctly download ALL images and link them to CORRESPONDING publications
 """
 
-import json
 import re
 import os
 from pathlib import Path
@@ -11,13 +10,16 @@ from urllib.parse import urlparse
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
+from build_output import build_lock, pop_dry_run_flag, write_html
+from canonical_urls import canonical_url
+from publication_store import load_publications
+
 def download_image(url, save_path):
     """Download an image from URL to save_path."""
     try:
-        if url.startswith('hhttps'):
-            url = url[1:]
-        
-        if not url or url == "":
+        # Canonical form (fixes 'hhttps', host aliases, encoding)
+        url = canonical_url(url)
+        if not url:
             return None
         
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
@@ -63,7 +65,7 @@ def update_image_for_paper(html_content, title, image_path):
     # Find the article that contains an h5 with this exact title
     # Pattern: <article>...<img src="CURRENT">...<h5>TITLE</h5>...</article>
     # We'll match from article start to h5, then replace the img src
-    pattern = rf'(<article class="item-row">\s*<img src=")[^"]+(" alt="[^"]*" onerror="[^"]*">\s*<div>\s*<h5[^>]*>{escaped_title}</h5>)'
+    pattern = rf'(<article class="item-row"[^>]*>\s*<img src=")[^"]+(" alt="[^"]*" onerror="[^"]*">\s*<div>\s*<h5[^>]*>{escaped_title}</h5>)'
     
     match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
     if match:
@@ -76,15 +78,14 @@ def update_image_for_paper(html_content, title, image_path):
         return html_content, False
 
 def main():
+    dry_run = pop_dry_run_flag()
     base_dir = Path(__file__).parent
     index_html_path = base_dir / "index.html"
     images_dir = base_dir / "images" / "publications"
     images_dir.mkdir(parents=True, exist_ok=True)
     
     # Load JSON
-    json_file = base_dir / "publications_complete.json"
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_publications()
     
     print(f"✓ Loaded JSON: {sum(len(pubs) for pubs in data.values())} publications")
     
@@ -111,7 +112,7 @@ def main():
             if not title:
                 continue
             
-            if not img_url or img_url == "":
+            if not img_url:
                 # Use placeholder
                 html_content, updated = update_image_for_paper(html_content, title, "images/bu-logo.png")
                 if updated:
@@ -151,10 +152,9 @@ def main():
     print(f"{'=' * 60}")
     
     # Write HTML
-    with open(index_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print("✓ Updated index.html")
+    if write_html(index_html_path, html_content, dry_run):
+        print("✓ Updated index.html")
 
 if __name__ == "__main__":
-    main()
+    with build_lock():
+        main()
@@ -7,15 +7,11 @@ import json
 import html
 from pathlib import Path
 
-def format_authors(authors, highlight_name="Kayhan Batmanghelich"):
-    """Format authors list, highlighting the specified name."""
-    formatted = []
-    for author in authors:
-        if highlight_name.lower() in author.lower():
-            formatted.append(f"<b>{html.escape(author)}</b>")
-        else:
-            formatted.append(html.escape(author))
-    return ", ".join(formatted)
+from lab_members import default_matcher
+
+def format_authors(authors, matcher=None):
+    """Format authors list, highlighting lab members (lab_members.json)."""
+    return (matcher or default_matcher()).highlight(authors, escape=True)
 
 def generate_publications_html():
     """Generate HTML for publications section."""
@@ -95,7 +91,8 @@ def main():
         f.write(html_content)
     
     print(f"Publications HTML generated and saved to: {output_file}")
-    print(f"\nTotal publications: {html_content.count('<article class=\"item-row\">')}")
+    article_count = html_content.count('<article class="item-row">')
+    print(f"\nTotal publications: {article_count}")
     print("\nYou can now copy this HTML into your index.html file in the publications section.")
 
 if __name__ == "__main__":
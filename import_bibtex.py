@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Bulk-import a BibTeX export into the publication store.
+
+The parser is a single forward scan (regex-driven tokenizer, brace matching
+in C via re) that handles @string macros, "#" concatenation, quoted and
+braced values and common LaTeX accents. Each entry becomes a publication
+with title, authors, venue, year and the entry itself as its bibtex field.
+Entries that already exist (same title or citation key) only get their
+empty fields filled in; hand-edited values are never overwritten. Parsed files are cached in
+.cache/ by content hash, so re-importing the same export is instant.
+Usage: python3 import_bibtex.py <export.bib> [--dry-run]
+"""
+
+import pickle
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+from build_output import atomic_write, build_lock, file_digest, pop_dry_run_flag
+from publication_store import (
+    CACHE_DIR,
+    CANONICAL_PATH,
+    SchemaError,
+    assign_ids,
+    derive_id,
+    load_publications,
+    save_publications,
+)
+
+PARSE_CACHE_VERSION = 1
+
+ENTRY_START = re.compile(r'@\s*([A-Za-z]+)\s*([{(])')
+KEY = re.compile(r'\s*([^,\s{}()]*)\s*,')
+FIELD_NAME = re.compile(r'\s*([A-Za-z][\w\-:.+/]*)\s*=\s*')
+BRACE = re.compile(r'[{}]')
+QUOTED_END = re.compile(r'[{}"]')
+BARE_VALUE = re.compile(r'[\w\-:.+/]+')
+SEPARATOR = re.compile(r'\s*([,#})]?)')
+
+MONTHS = {m: m.capitalize() for m in
+          ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")}
+
+# Venue field by entry type (first one present wins)
+VENUE_FIELDS = ("journal", "booktitle", "series", "school", "institution", "howpublished", "publisher")
+
+# LaTeX accent commands -> Unicode combining marks
+ACCENTS = {'"': "\u0308", "'": "\u0301", "`": "\u0300", "^": "\u0302", "~": "\u0303",
+           "=": "\u0304", ".": "\u0307", "c": "\u0327", "u": "\u0306", "v": "\u030c",
+           "H": "\u030b", "k": "\u0328", "r": "\u030a"}
+SYMBOL_ACCENT = re.compile(r'\\(["\'`^~=.])\s*\{?\\?([A-Za-z])\}?')
+LETTER_ACCENT = re.compile(r'\\([cuvHkr])(?:\s*\{\\?([A-Za-z])\}|\s+\\?([A-Za-z]))')
+SPECIAL_LETTERS = {"ss": "ß", "o": "ø", "O": "Ø", "ae": "æ", "AE": "Æ", "oe": "œ", "OE": "Œ",
+                   "aa": "å", "AA": "Å", "l": "ł", "L": "Ł", "i": "ı"}
+SPECIAL_LETTER = re.compile(r'\\(ss|ae|AE|oe|OE|aa|AA|[oOlLi])(?![A-Za-z])\s*')
+ESCAPED = re.compile(r'\\([&%$#_{}])')
+
+class BibtexError(ValueError):
+    """Raised for malformed BibTeX, with the line number."""
+
+    def __init__(self, message, text, pos):
+        self.line = text.count("\n", 0, pos) + 1
+        super().__init__(f"line {self.line}: {message}")
+
+def _braced(text, pos):
+    """End (exclusive) of the {...} group starting at text[pos]."""
+    depth = 0
+    for match in BRACE.finditer(text, pos):
+        depth += 1 if match.group() == "{" else -1
+        if depth == 0:
+            return match.end()
+    raise BibtexError("unbalanced braces", text, pos)
+
+def _quoted(text, pos):
+    """End (exclusive) of the "..." string starting at text[pos]; braces may nest quotes."""
+    depth = 0
+    for match in QUOTED_END.finditer(text, pos + 1):
+        char = match.group()
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif depth == 0:
+            return match.end()
+    raise BibtexError("unterminated string", text, pos)
+
+def _value(text, pos, macros):
+    """Parse a (possibly concatenated) field value; returns (raw_value, end)."""
+    parts = []
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        char = text[pos:pos + 1]
+        if char == "{":
+            end = _braced(text, pos)
+            parts.append(text[pos + 1:end - 1])
+        elif char == '"':
+            end = _quoted(text, pos)
+            parts.append(text[pos + 1:end - 1])
+        else:
+            match = BARE_VALUE.match(text, pos)
+            if not match:
+                raise BibtexError("expected a field value", text, pos)
+            end = match.end()
+            word = match.group()
+            parts.append(word if word.isdigit() else macros.get(word.lower(), word))
+        separator = SEPARATOR.match(text, end)
+        if separator.group(1) != "#":
+            return "".join(parts), end
+        pos = separator.end()
+
+def iter_entries(text):
+    """Yield {"type", "key", "fields", "source"} for every entry in text."""
+    macros = dict(MONTHS)
+    pos = 0
+    while True:
+        start = ENTRY_START.search(text, pos)
+        if not start:
+            return
+        entry_type = start.group(1).lower()
+        close = "}" if start.group(2) == "{" else ")"
+        pos = start.end()
+
+        if entry_type in ("comment", "preamble"):
+            pos = _braced(text, start.end() - 1) if start.group(2) == "{" else text.find(")", pos) + 1
+            continue
+
+        if entry_type == "string":
+            name = FIELD_NAME.match(text, pos)
+            if not name:
+                raise BibtexError("malformed @string", text, pos)
+            value, pos = _value(text, name.end(), macros)
+            macros[name.group(1).lower()] = value
+            pos = SEPARATOR.match(text, pos).end()
+            continue
+
+        key = KEY.match(text, pos)
+        if not key:
+            raise BibtexError(f"@{entry_type} without a citation key", text, pos)
+        pos = key.end()
+        fields = {}
+        while True:
+            name = FIELD_NAME.match(text, pos)
+            if not name:
+                # Allow a trailing comma before the closing brace
+                rest = SEPARATOR.match(text, pos)
+                if rest.group(1) == close:
+                    pos = rest.end()
+                    break
+                raise BibtexError(f"expected a field in @{entry_type}{{{key.group(1)}}}", text, pos)
+            value, pos = _value(text, name.end(), macros)
+            fields[name.group(1).lower()] = value
+            separator = SEPARATOR.match(text, pos)
+            pos = separator.end()
+            if separator.group(1) == close:
+                break
+            if separator.group(1) != ",":
+                raise BibtexError(f"expected ',' or '{close}' in @{entry_type}{{{key.group(1)}}}", text, pos)
+
+        yield {"type": entry_type, "key": key.group(1), "fields": fields,
+               "source": text[start.start():pos].strip()}
+
+def parse_bibtex(text):
+    return list(iter_entries(text))
+
+def parse_file(path, use_cache=True):
+    """Parsed entries of a .bib file, cached in .cache/ by content hash."""
+    path = Path(path)
+    cache_path = CACHE_DIR / f"bibtex-{file_digest(path)[:16]}.pickle"
+    if use_cache and cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                cache = pickle.load(f)
+            if cache.get("version") == PARSE_CACHE_VERSION:
+                return cache["entries"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            pass
+
+    entries = parse_bibtex(path.read_text(encoding='utf-8'))
+    if use_cache:
+        CACHE_DIR.mkdir(exist_ok=True)
+        atomic_write(cache_path, pickle.dumps({"version": PARSE_CACHE_VERSION, "entries": entries},
+                                              protocol=pickle.HIGHEST_PROTOCOL))
+    return entries
+
+def latex_to_text(value):
+    """Plain text for a BibTeX field: accents to Unicode, case-protecting braces dropped."""
+    value = SYMBOL_ACCENT.sub(lambda m: m.group(2) + ACCENTS[m.group(1)], value)
+    value = LETTER_ACCENT.sub(lambda m: (m.group(2) or m.group(3)) + ACCENTS[m.group(1)], value)
+    value = SPECIAL_LETTER.sub(lambda m: SPECIAL_LETTERS[m.group(1)], value)
+    value = ESCAPED.sub(r'\1', value)
+    value = value.replace("{", "").replace("}", "").replace("~", " ")
+    return unicodedata.normalize("NFC", re.sub(r'\s+', ' ', value).strip())
+
+def split_names(value):
+    """Split an author field on top-level " and "; returns names as "First Last"."""
+    names = []
+    depth = 0
+    start = 0
+    for match in re.finditer(r'[{}]|\s+and\s+', value):
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+        elif depth == 0:
+            names.append(value[start:match.start()])
+            start = match.end()
+    names.append(value[start:])
+
+    authors = []
+    for name in names:
+        name = latex_to_text(name)
+        if not name or name.lower() == "others":
+            continue
+        parts = [part.strip() for part in name.split(",")]
+        if len(parts) == 2:
+            name = f"{parts[1]} {parts[0]}"
+        elif len(parts) == 3:  # von Last, Jr, First
+            name = f"{parts[2]} {parts[0]} {parts[1]}"
+        authors.append(name.strip())
+    return authors
+
+def entry_to_publication(entry):
+    """(year, publication dict) for a parsed entry, or (None, None) without title/year."""
+    fields = entry["fields"]
+    title = latex_to_text(fields.get("title", ""))
+    year = re.search(r'\d{4}', fields.get("year", ""))
+    if not title or not year:
+        return None, None
+
+    pub = {"title": title, "authors": split_names(fields.get("author") or fields.get("editor") or "")}
+    for field in VENUE_FIELDS:
+        if fields.get(field):
+            pub["venue"] = latex_to_text(fields[field])
+            break
+    if fields.get("doi"):
+        doi = fields["doi"].strip()
+        pub["paper_link"] = doi if doi.startswith("http") else f"https://doi.org/{doi}"
+    elif fields.get("url"):
+        pub["paper_link"] = fields["url"].strip()
+    pub["bibtex"] = entry["source"]
+    return year.group(), pub
+
+def _citation_key(bibtex):
+    start = ENTRY_START.search(bibtex or "")
+    key = start and KEY.match(bibtex, start.end())
+    return key.group(1) if key else None
+
+def _normalized(bibtex):
+    return re.sub(r'\s+', ' ', (bibtex or "").replace('\\n', '\n')).strip()
+
+def import_entries(data, entries):
+    """Merge parsed entries into store data; returns (added, updated, skipped) counts.
+
+    An entry matches an existing publication by derived id (year + title)
+    or, since titles in the store are often edited, by citation key. Keys
+    that several publications share only match on identical BibTeX.
+    """
+    by_id = {}
+    by_key = {}
+    for year, pubs in data.items():
+        for pub in pubs:
+            by_id[derive_id(pub, year)] = pub
+            key = _citation_key(pub.get("bibtex"))
+            if key:
+                by_key.setdefault(key, []).append(pub)
+
+    added = updated = skipped = 0
+    for entry in entries:
+        year, pub = entry_to_publication(entry)
+        if pub is None:
+            print(f"⚠ Skipping @{entry['type']}{{{entry['key']}}}: no title or year")
+            skipped += 1
+            continue
+        match = by_id.get(derive_id(pub, year))
+        if match is None:
+            candidates = by_key.get(entry["key"], [])
+            if len(candidates) > 1:
+                source = _normalized(entry["source"])
+                candidates = [c for c in candidates if _normalized(c.get("bibtex")) == source]
+            match = candidates[0] if len(candidates) == 1 else None
+        if match is None:
+            data.setdefault(year, []).append(pub)
+            by_id[derive_id(pub, year)] = pub
+            by_key.setdefault(entry["key"], []).append(pub)
+            added += 1
+            continue
+        # Only fill gaps; hand-maintained values win
+        filled = [field for field, value in pub.items() if value and not match.get(field)]
+        for field in filled:
+            match[field] = pub[field]
+        if filled:
+            updated += 1
+    assign_ids(data)
+    return added, updated, skipped
+
+def main():
+    dry_run = pop_dry_run_flag()
+    if len(sys.argv) < 2:
+        print("Usage: python3 import_bibtex.py <export.bib> [--dry-run]")
+        sys.exit(1)
+
+    bib_path = Path(sys.argv[1])
+    try:
+        entries = parse_file(bib_path)
+    except BibtexError as e:
+        print(f"✗ {bib_path.name}: {e}")
+        sys.exit(1)
+    print(f"✓ Parsed {len(entries)} entries from {bib_path.name}")
+
+    data = load_publications(CANONICAL_PATH)
+    added, updated, skipped = import_entries(data, entries)
+    print(f"  {added} new, {updated} updated, {skipped} skipped")
+    if dry_run:
+        print("Dry run: publications_complete.json not written")
+        return
+    if added or updated:
+        try:
+            save_publications(data, CANONICAL_PATH)
+        except SchemaError as e:
+            print(f"✗ Import would break the store: {e}")
+            sys.exit(1)
+        print(f"✓ Saved {CANONICAL_PATH.name}")
+
+if __name__ == "__main__":
+    with build_lock():
+        main()
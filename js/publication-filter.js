@@ -0,0 +1,89 @@
+// Filters the publication list with SiteSearch (js/search.js).
+// Articles are looked up once, by the data-pub-id that build_site.py adds
+// in dist/; a query only shows or hides the articles its results name, so
+// filtering never walks the page. The box stays hidden when the page has
+// no tagged articles (e.g. index.html opened from the repo).
+(function () {
+    const box = document.getElementById("pubSearchBox");
+    const input = document.getElementById("pubSearch");
+    const status = document.getElementById("pubSearchStatus");
+    if (!box || !input || !window.SiteSearch) {
+        return;
+    }
+
+    const articles = new Map(); // id -> articles (a paper may be listed twice)
+    const all = [...document.querySelectorAll("#publication article.item-row")];
+    for (const article of all) {
+        const id = article.dataset.pubId;
+        if (id) {
+            articles.set(id, [...(articles.get(id) || []), article]);
+        }
+    }
+    if (!articles.size) {
+        return;
+    }
+    const years = [...document.querySelectorAll('[id^="year-pub-"]')];
+    box.hidden = false;
+
+    let shown = null;        // articles currently visible while filtering
+    let savedDisplay = null; // year containers' display before filtering
+    let latest = 0;
+
+    function clear() {
+        if (!shown) {
+            return;
+        }
+        for (const article of all) {
+            article.hidden = false;
+        }
+        years.forEach((container, i) => {
+            container.style.display = savedDisplay[i];
+        });
+        shown = null;
+        status.textContent = "";
+    }
+
+    function show(matches) {
+        if (!shown) {
+            savedDisplay = years.map(container => container.style.display);
+            for (const article of all) {
+                article.hidden = true;
+            }
+            shown = [];
+        }
+        for (const article of shown) {
+            article.hidden = true;
+        }
+        for (const article of matches) {
+            article.hidden = false;
+        }
+        shown = matches;
+        const visibleYears = new Set(matches.map(article => article.closest('[id^="year-pub-"]')));
+        for (const container of years) {
+            container.style.display = visibleYears.has(container) ? "block" : "none";
+        }
+        status.textContent = matches.length + " of " + all.length + " publications";
+    }
+
+    function update() {
+        const query = input.value;
+        const request = ++latest;
+        if (!window.SiteSearch.terms(query).length) {
+            clear();
+            return;
+        }
+        window.SiteSearch.search(query).then(results => {
+            if (request !== latest) {
+                return; // a newer query is already in flight
+            }
+            show(results.flatMap(result => articles.get(result.doc.id) || []));
+        }).catch(() => {
+            if (request === latest) {
+                clear();
+                status.textContent = "Search is unavailable right now.";
+            }
+        });
+    }
+
+    input.addEventListener("input", update);
+})();
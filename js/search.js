@@ -0,0 +1,153 @@
+// Site search over the static index built by search_index.py.
+// index.json is fetched on the first query; each term shard is fetched the
+// first time a query needs it and kept in memory. Every query word must
+// match; the last one may be a prefix, so results update while typing.
+// author:, venue: and year: restrict a word to that field.
+//
+//   SiteSearch.search("tensor fact").then(results => ...)
+//   SiteSearch.search("author:ghosh year:2024")
+//   // results: [{score, doc: {id, title, year}}], best first
+(function () {
+    const BASE = "search/";
+    const MIN_TERM = 2;
+    const MAX_TERM = 24;
+    const STOPWORDS = new Set((
+        "a an and are as at be but by for from has have in into is it its of on or that the " +
+        "their there these this those to was were which with we our can not also been such than " +
+        "then they via using use used between both each more most other some only over under"
+    ).split(" "));
+    // Query qualifier -> term prefix of the field-only terms
+    const FIELD_PREFIXES = new Map([["author", "a"], ["venue", "v"], ["year", "y"]]);
+
+    let manifest = null;
+    const shards = new Map();
+
+    function fetchJSON(name) {
+        return fetch(BASE + name).then(response => {
+            if (!response.ok) {
+                throw new Error("search index: " + name + " " + response.status);
+            }
+            return response.json();
+        });
+    }
+
+    function loadManifest() {
+        if (!manifest) {
+            manifest = fetchJSON("index.json").catch(error => {
+                manifest = null;
+                throw error;
+            });
+        }
+        return manifest;
+    }
+
+    // Front-coded blocks -> terms (see search_index.py)
+    function decodeBlocks(blocks) {
+        const terms = [];
+        for (const block of blocks) {
+            const parts = block.split(" ");
+            let term = parts[0];
+            terms.push(term);
+            for (let i = 1; i < parts.length; i++) {
+                term = term.slice(0, parts[i].charCodeAt(0) - 48) + parts[i].slice(1);
+                terms.push(term);
+            }
+        }
+        return terms;
+    }
+
+    function loadShard(index, key) {
+        if (!shards.has(key)) {
+            shards.set(key, fetchJSON(index.shards[key]).then(shard => ({
+                terms: decodeBlocks(shard.blocks),
+                postings: shard.postings,
+            })));
+        }
+        return shards.get(key);
+    }
+
+    function plainTerms(text) {
+        const words = text.normalize("NFKD").replace(/[^\x00-\x7f]/g, "").toLowerCase().match(/[a-z0-9]+/g) || [];
+        return words.filter(word => word.length >= MIN_TERM && word.length <= MAX_TERM &&
+            !STOPWORDS.has(word) && !(/^\d+$/.test(word) && word.length !== 4));
+    }
+
+    function queryTerms(text) {
+        const words = [];
+        for (const chunk of text.split(/\s+/)) {
+            const colon = chunk.indexOf(":");
+            const prefix = colon > 0 && colon < chunk.length - 1 &&
+                FIELD_PREFIXES.get(chunk.slice(0, colon).toLowerCase());
+            if (prefix) {
+                words.push(...plainTerms(chunk.slice(colon + 1)).map(term => prefix + ":" + term));
+            } else {
+                words.push(...plainTerms(chunk));
+            }
+        }
+        return words;
+    }
+
+    // First index in the sorted terms that is >= word
+    function lowerBound(terms, word) {
+        let lo = 0;
+        let hi = terms.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (terms[mid] < word) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return lo;
+    }
+
+    // {doc: score} for one word; a prefix matching several terms counts its best one
+    function wordScores(index, word, prefix) {
+        const keys = Object.keys(index.shards).filter(key =>
+            word.startsWith(key) || (prefix && key.startsWith(word)));
+        return Promise.all(keys.map(key => loadShard(index, key))).then(loaded => {
+            const scores = new Map();
+            for (const shard of loaded) {
+                for (let t = lowerBound(shard.terms, word); t < shard.terms.length; t++) {
+                    const term = shard.terms[t];
+                    if (term !== word && !(prefix && term.startsWith(word))) {
+                        break;
+                    }
+                    const flat = shard.postings[t];
+                    let doc = 0;
+                    for (let j = 0; j < flat.length; j += 2) {
+                        doc += flat[j];
+                        scores.set(doc, Math.max(scores.get(doc) || 0, flat[j + 1]));
+                    }
+                }
+            }
+            return scores;
+        });
+    }
+
+    function search(text) {
+        const words = queryTerms(text);
+        if (!words.length) {
+            return Promise.resolve([]);
+        }
+        return loadManifest().then(index =>
+            Promise.all(words.map((word, i) => wordScores(index, word, i === words.length - 1))).then(perWord => {
+                let totals = perWord[0];
+                for (const scores of perWord.slice(1)) {
+                    const next = new Map();
+                    for (const [doc, score] of scores) {
+                        if (totals.has(doc)) {
+                            next.set(doc, totals.get(doc) + score);
+                        }
+                    }
+                    totals = next;
+                }
+                return [...totals]
+                    .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+                    .map(([doc, score]) => ({score, doc: index.documents[doc]}));
+            }));
+    }
+
+    window.SiteSearch = {search, terms: queryTerms};
+})();
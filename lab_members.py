@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Lab members whose names are highlighted in author lists.
+
+lab_members.json lists current and past members (with aliases for other
+spellings). All names are compiled once into a single anchored regex over
+normalized names (accents folded, case and punctuation ignored, middle
+names/initials optional), so an author list is highlighted in one pass
+instead of testing every author against every member.
+Usage: python3 lab_members.py [json_file]   # show which spellings match each member
+"""
+
+import functools
+import html
+import json
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+LAB_MEMBERS_PATH = Path(__file__).parent / "lab_members.json"
+DEFAULT_MEMBERS = [{"name": "Kayhan Batmanghelich"}]
+
+# Joins normalized names so one regex pass covers a whole author list
+SEPARATOR = "\x1f"
+
+@functools.lru_cache(maxsize=65536)
+def normalize_name(name):
+    """'Kayhan N. Batmanghelich' -> 'kayhan n batmanghelich'."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+def name_pattern(name):
+    """Regex for a normalized name: first and last name fixed, anything in between optional."""
+    tokens = normalize_name(name).split()
+    if len(tokens) == 1:
+        return re.escape(tokens[0])
+    return rf"{re.escape(tokens[0])}(?: [a-z0-9]+)* {re.escape(tokens[-1])}"
+
+class AuthorMatcher:
+    """All lab member names compiled into one regex."""
+
+    def __init__(self, members):
+        self.members = []
+        alternatives = []
+        for member in members:
+            for spelling in [member["name"]] + list(member.get("aliases", [])):
+                alternatives.append(f"(?P<m{len(self.members)}>{name_pattern(spelling)})")
+                self.members.append(member["name"])
+        body = "|".join(alternatives) or "(?!)"
+        self.pattern = re.compile(rf"(?:^|{SEPARATOR})(?:{body})(?={SEPARATOR}|$)")
+
+    def members_in(self, authors):
+        """{author index: member name} for the lab members in an author list."""
+        normalized = [normalize_name(author) for author in authors]
+        starts = {}
+        offset = 0
+        for index, name in enumerate(normalized):
+            starts[offset] = index
+            offset += len(name) + 1
+        found = {}
+        for match in self.pattern.finditer(SEPARATOR.join(normalized)):
+            group = match.lastgroup
+            found[starts[match.start(group)]] = self.members[int(group[1:])]
+        return found
+
+    def highlight(self, authors, escape=False):
+        """Comma-separated author list with lab members in <b>."""
+        members = self.members_in(authors)
+        formatted = []
+        for index, author in enumerate(authors):
+            text = html.escape(author) if escape else author
+            formatted.append(f"<b>{text}</b>" if index in members else text)
+        return ", ".join(formatted)
+
+def load_members(path=LAB_MEMBERS_PATH):
+    path = Path(path)
+    if not path.exists():
+        return DEFAULT_MEMBERS
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["members"]
+
+@functools.lru_cache(maxsize=None)
+def default_matcher():
+    """Matcher for lab_members.json, compiled once per process."""
+    return AuthorMatcher(load_members())
+
+def main():
+    from publication_store import CANONICAL_PATH, iter_publications, load_publications
+
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else CANONICAL_PATH
+    data = load_publications(path)
+    matcher = default_matcher()
+    spellings = {}
+    for _, pub in iter_publications(data):
+        for index, member in matcher.members_in(pub["authors"]).items():
+            spellings.setdefault(member, {}).setdefault(pub["authors"][index], 0)
+            spellings[member][pub["authors"][index]] += 1
+
+    for member in load_members():
+        found = spellings.get(member["name"], {})
+        if not found:
+            print(f"⚠ {member['name']}: no publications")
+            continue
+        print(f"✓ {member['name']}: {sum(found.values())} publications")
+        for spelling, count in sorted(found.items(), key=lambda item: -item[1]):
+            print(f"    {spelling} ({count})")
+
+if __name__ == "__main__":
+    main()
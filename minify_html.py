@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Minify generated HTML: collapse whitespace, drop comments and redundant attributes.
+
+Content of <pre>, <textarea> and <script> is kept verbatim; <style> blocks get
+a conservative CSS minification.
+Usage: python3 minify_html.py <input.html> [output.html]
+"""
+
+import re
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+
+# Elements whose content must not be touched (or only CSS-minified)
+RAW_PATTERN = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+
+# Whitespace next to these tags never renders, so it can go entirely
+BLOCK_TAGS = (
+    "html|head|body|meta|link|title|style|script|noscript|header|footer|main|nav|"
+    "section|article|aside|div|p|h[1-6]|ul|ol|li|dl|dt|dd|table|thead|tbody|tr|th|td|"
+    "form|fieldset|hr|br|figure|figcaption|blockquote|pre|option|select|iframe|!doctype"
+)
+SPACE_BEFORE_BLOCK = re.compile(rf'\s+(<(?:/)?(?:{BLOCK_TAGS})\b)', re.IGNORECASE)
+SPACE_AFTER_BLOCK = re.compile(rf'(<(?:/)?(?:{BLOCK_TAGS})\b[^>]*>)\s+', re.IGNORECASE)
+
+COMMENT_PATTERN = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+
+# Attributes that only restate the browser default
+REDUNDANT_ATTRIBUTES = [
+    (re.compile(r'(<script\b[^>]*?)\s+type=["\']text/javascript["\']', re.IGNORECASE), r'\1'),
+    (re.compile(r'(<style\b[^>]*?)\s+type=["\']text/css["\']', re.IGNORECASE), r'\1'),
+    (re.compile(r'(<link\b[^>]*?)\s+type=["\']text/css["\']', re.IGNORECASE), r'\1'),
+    (re.compile(r'(<form\b[^>]*?)\s+method=["\']get["\']', re.IGNORECASE), r'\1'),
+    (re.compile(r'(<input\b[^>]*?)\s+type=["\']text["\']', re.IGNORECASE), r'\1'),
+]
+
+STYLE_ATTRIBUTE = re.compile(r'\bstyle="([^"]*)"')
+
+# An opening tag (attribute values may contain '>'), or a whitespace run in text
+TAG_OR_SPACE = re.compile(r'(<[a-zA-Z](?:[^>"\']|"[^"]*"|\'[^\']*\')*>)|\s+')
+
+def minify_css(css):
+    """Strip comments and collapse whitespace around CSS punctuation."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+def strip_redundant_attributes(tag):
+    """Drop default-valued attributes and squeeze inline style declarations."""
+    for pattern, replacement in REDUNDANT_ATTRIBUTES:
+        tag = pattern.sub(replacement, tag)
+    return STYLE_ATTRIBUTE.sub(lambda m: f'style="{minify_css(m.group(1)).rstrip(";")}"', tag)
+
+def _collapse(match):
+    tag = match.group(1)
+    if tag is None:
+        return ' '
+    # Leave attribute values alone; only squeeze the space between attributes
+    parts = re.split(r'("[^"]*"|\'[^\']*\')', tag)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\s+', ' ', parts[i])
+    parts[-1] = re.sub(r'\s*(/?>)$', r'\1', parts[-1])
+    return strip_redundant_attributes(''.join(parts))
+
+def minify_html(html):
+    """Return a minified copy of html."""
+    raw_blocks = []
+
+    def stash(match):
+        open_tag, tag_name, body, close_tag = match.groups()
+        if tag_name.lower() == 'style':
+            body = minify_css(body)
+        elif tag_name.lower() == 'script' and body.strip():
+            body = body.strip()
+        raw_blocks.append(strip_redundant_attributes(open_tag) + body + close_tag)
+        return f'\x00{len(raw_blocks) - 1}\x00'
+
+    html = COMMENT_PATTERN.sub('', html)
+    html = RAW_PATTERN.sub(stash, html)
+
+    html = TAG_OR_SPACE.sub(_collapse, html)
+    html = SPACE_BEFORE_BLOCK.sub(r'\1', html)
+    html = SPACE_AFTER_BLOCK.sub(r'\1', html)
+
+    # Stashed blocks are all block-level or invisible, so no space is needed around them
+    html = re.sub(r'\s*(\x00\d+\x00)\s*', r'\1', html)
+    html = re.sub(r'\x00(\d+)\x00', lambda m: raw_blocks[int(m.group(1))], html)
+
+    return html.strip() + "\n"
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 minify_html.py <input.html> [output.html]")
+        sys.exit(1)
+
+    source = Path(sys.argv[1])
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else source
+    html = source.read_text(encoding='utf-8')
+    minified = minify_html(html)
+    atomic_write(target, minified)
+
+    print(f"✓ Minified {source.name}: {len(html.encode()) / 1024:.1f} KB -> {len(minified.encode()) / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Web-optimized copies of the PDFs in files/.
+
+Each PDF is optionally rewritten by Ghostscript, losslessly: duplicate
+images are merged, JPEGs are passed through untouched and other images are
+recompressed with Flate at their own resolution. With --lossy, Ghostscript
+instead downsamples embedded images to 300 dpi and re-encodes them (JPEG
+at print quality); this changes the figures and nothing checks how they
+look, so it is opt-in. The PDF is then linearized ("fast web view": page
+one can be shown before the rest arrives) and its streams recompressed,
+with pikepdf or the qpdf command line. Every tool is optional and the
+steps run with whatever is installed. A step's output is kept only if it
+is not bigger than its input (linearizing may add up to 1%). The originals
+in files/ are never modified; build_site.py ships the optimized copies in
+dist/.
+
+Results are cached in .cache/pdf-optimized by the source's sha256 and the
+tools used, so each PDF is processed once.
+Usage: python3 optimize_pdfs.py [--lossy | --no-ghostscript] [pdf ...]   (default: every PDF in files/)
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_output import atomic_write, file_digest
+from publication_store import BASE_DIR, CACHE_DIR
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+FILES_DIR = BASE_DIR / "files"
+OPTIMIZED_DIR = CACHE_DIR / "pdf-optimized"
+OPTIMIZER_VERSION = 2
+LINEARIZE_OVERHEAD = 1.01  # a linearized copy may be this much bigger and still win
+IMAGE_DPI = 300
+STEP_TIMEOUT = 300
+
+def ghostscript():
+    return shutil.which("gs") or shutil.which("gswin64c")
+
+def available_tools(rewrite=True, lossy=False):
+    """Names of the optimizers that will run, in order."""
+    tools = []
+    if rewrite and ghostscript():
+        tools.append("gs-lossy" if lossy else "gs")
+    if pikepdf is not None:
+        tools.append("pikepdf")
+    elif shutil.which("qpdf"):
+        tools.append("qpdf")
+    return tools
+
+# Keep every image as it is: no downsampling, JPEGs copied, the rest Flate (lossless)
+LOSSLESS_IMAGES = [
+    "-dPassThroughJPEGImages=true", "-dPassThroughJPXImages=true",
+    *(f"-dDownsample{kind}Images=false" for kind in ("Color", "Gray", "Mono")),
+    "-dAutoFilterColorImages=false", "-dColorImageFilter=/FlateEncode",
+    "-dAutoFilterGrayImages=false", "-dGrayImageFilter=/FlateEncode",
+]
+DOWNSAMPLED_IMAGES = [
+    "-dPDFSETTINGS=/printer", f"-dColorImageResolution={IMAGE_DPI}", f"-dGrayImageResolution={IMAGE_DPI}",
+    f"-dMonoImageResolution={IMAGE_DPI * 2}",
+]
+
+def rewrite_pdf(source, target, lossy=False):
+    subprocess.run([ghostscript(), "-q", "-dNOPAUSE", "-dBATCH", "-dSAFER", "-sDEVICE=pdfwrite",
+                    "-dCompatibilityLevel=1.5", "-dDetectDuplicateImages=true",
+                    *(DOWNSAMPLED_IMAGES if lossy else LOSSLESS_IMAGES),
+                    f"-sOutputFile={target}", str(source)],
+                   check=True, capture_output=True, timeout=STEP_TIMEOUT)
+
+def linearize(source, target):
+    if pikepdf is not None:
+        with pikepdf.open(source) as pdf:
+            pdf.save(target, linearize=True, compress_streams=True, recompress_flate=True,
+                     object_stream_mode=pikepdf.ObjectStreamMode.generate)
+        return
+    result = subprocess.run(["qpdf", "--linearize", "--object-streams=generate", "--compress-streams=y",
+                             "--recompress-flate", "--compression-level=9", str(source), str(target)],
+                            capture_output=True, timeout=STEP_TIMEOUT)
+    # Exit code 3: finished with warnings (common for slightly damaged PDFs)
+    if result.returncode not in (0, 3):
+        raise subprocess.CalledProcessError(result.returncode, "qpdf", result.stderr)
+
+def cache_key(digest, tools):
+    return f"{digest[:32]}-v{OPTIMIZER_VERSION}-{'+'.join(tools) or 'none'}"
+
+def cached_result(digest, tools):
+    """Path of the file to ship for this source: the optimized copy, or None to
+    ship the original. Raises KeyError when not processed yet."""
+    key = cache_key(digest, tools)
+    if (OPTIMIZED_DIR / f"{key}.pdf").exists():
+        return OPTIMIZED_DIR / f"{key}.pdf"
+    if (OPTIMIZED_DIR / f"{key}.same").exists():
+        return None
+    raise KeyError(key)
+
+def optimize_pdf(source, digest, tools):
+    """Run the optimizers on source and cache the result; returns (path or None, errors).
+
+    Runs in a worker process.
+    """
+    source = Path(source)
+    errors = []
+    best, best_size = source, source.stat().st_size
+    with tempfile.TemporaryDirectory() as tmp:
+        if "gs" in tools or "gs-lossy" in tools:
+            rewritten = Path(tmp) / "rewritten.pdf"
+            try:
+                rewrite_pdf(best, rewritten, lossy="gs-lossy" in tools)
+                if rewritten.stat().st_size < best_size:
+                    best, best_size = rewritten, rewritten.stat().st_size
+            except (OSError, subprocess.SubprocessError) as e:
+                errors.append(f"gs: {e}")
+        if "pikepdf" in tools or "qpdf" in tools:
+            linearized = Path(tmp) / "linearized.pdf"
+            try:
+                linearize(best, linearized)
+                if linearized.stat().st_size <= best_size * LINEARIZE_OVERHEAD:
+                    best, best_size = linearized, linearized.stat().st_size
+            except Exception as e:  # pikepdf raises its own PdfError
+                errors.append(f"linearize: {e}")
+
+        OPTIMIZED_DIR.mkdir(parents=True, exist_ok=True)
+        key = cache_key(digest, tools)
+        if best == source:
+            if not errors:
+                atomic_write(OPTIMIZED_DIR / f"{key}.same", "")
+            return None, errors
+        target = OPTIMIZED_DIR / f"{key}.pdf"
+        atomic_write(target, best.read_bytes())
+        return target, errors
+
+def optimize_pdfs(paths, rewrite=True, lossy=False, workers=None):
+    """{source path: (optimized path or None, errors)}; uncached PDFs go through a process pool."""
+    tools = available_tools(rewrite, lossy)
+    results = {}
+    pending = {}
+    for path in paths:
+        digest = file_digest(path)
+        if digest is None:
+            continue
+        try:
+            results[path] = (cached_result(digest, tools), [])
+        except KeyError:
+            pending[path] = digest
+    if pending and tools:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(optimize_pdf, path, digest, tools) for path, digest in pending.items()}
+            for path, future in futures.items():
+                results[path] = future.result()
+    else:
+        results.update((path, (None, [])) for path in pending)
+    return results
+
+def print_report(results, root=BASE_DIR):
+    """Per-file sizes and the bytes saved; returns the total saved."""
+    total_before = total_after = 0
+    for source, (optimized, errors) in sorted(results.items()):
+        before = source.stat().st_size
+        after = optimized.stat().st_size if optimized else before
+        total_before += before
+        total_after += after
+        name = source.relative_to(root) if source.is_relative_to(root) else source
+        if optimized:
+            print(f"  {name}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB (saved {(before - after) / 1024:.0f} KB)")
+        else:
+            print(f"  {name}: {before / 1024:.0f} KB, unchanged")
+        for error in errors:
+            print(f"    ⚠ {error}")
+    saved = total_before - total_after
+    print(f"  Total: {total_before / 1024:.0f} KB -> {total_after / 1024:.0f} KB, saved {saved / 1024:.0f} KB")
+    return saved
+
+def main():
+    args = sys.argv[1:]
+    flags = {"--lossy", "--no-ghostscript"}
+    rewrite = "--no-ghostscript" not in args
+    lossy = "--lossy" in args
+    paths = [Path(arg).resolve() for arg in args if arg not in flags] or sorted(FILES_DIR.glob("*.pdf"))
+    tools = available_tools(rewrite, lossy)
+    if not tools:
+        print("⚠ No PDF optimizer installed (pikepdf, qpdf or gs); nothing to do")
+        return
+    print(f"Optimizing {len(paths)} PDFs with {', '.join(tools)}...")
+    print_report(optimize_pdfs(paths, rewrite, lossy))
+    print("✓ Optimized copies cached in " + str(OPTIMIZED_DIR.relative_to(BASE_DIR)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Page-weight report for the built page, checked against budgets.
+
+Adds up what a browser downloads for dist/index.html: the HTML, every image
+it references (for a srcset, the candidate a VIEWPORT_WIDTH-wide window at
+DEVICE_PIXEL_RATIO would pick), scripts, stylesheets and the fonts those
+stylesheets (or the page's own <style>) load. Each is counted raw and
+compressed, once, in the page section (<section id=...>) that first
+references it; everything outside a section (head, navigation, footer)
+counts as "page". Images with
+loading="lazy" are reported apart from the initial load. Local sizes come
+from the output tree, compressed sizes from the .br/.gz siblings written by
+precompress.py. External stylesheets and scripts are fetched once and
+cached in .cache/page-weight-external.json; failures go through the
+negative cache in url_failures.py. The search index loads on demand and is
+not counted.
+
+Budgets live in page_budget.json: "total", "initial", "html" and each entry
+of "sections" and "kinds" may set "raw_kb" and/or "compressed_kb". The
+report exits non-zero when any is exceeded.
+
+Usage: python3 page_weight.py [--out dist] [--offline]
+"""
+
+import argparse
+import gzip
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from build_output import atomic_write
+from check_links import TAG_PATTERN
+from fingerprint_assets import is_local, logical_path
+from precompress import COMPRESSIBLE_SUFFIXES, gzip_bytes
+from publication_store import BASE_DIR, CACHE_DIR
+from url_failures import DAY, FailureCache, FetchFailed, USER_AGENT, fetch
+
+BUDGETS_PATH = BASE_DIR / "page_budget.json"
+EXTERNAL_PATH = CACHE_DIR / "page-weight-external.json"
+EXTERNAL_TTL = 7 * DAY
+VIEWPORT_WIDTH = 1280
+DEVICE_PIXEL_RATIO = 2
+KINDS = ("html", "image", "script", "style", "font")
+
+ATTRIBUTE = re.compile(r'\b([\w-]+)=(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+SECTION_START = re.compile(r'<section\b[^>]*\bid=["\']?([\w-]+)', re.IGNORECASE)
+FONT_FACE = re.compile(r'@font-face\s*{([^}]*)}', re.IGNORECASE)
+FONT_SOURCE = re.compile(r'url\((["\']?)([^)"\']+)\1\)\s*(?:format\((["\']?)([\w-]+)\3\))?')
+UNICODE_RANGE = re.compile(r'unicode-range\s*:([^;}]*)', re.IGNORECASE)
+INLINE_STYLE = re.compile(r'<style\b[^>]*>(.*?)</style\s*>', re.DOTALL | re.IGNORECASE)
+
+def attributes(tag):
+    return {match.group(1).lower(): next(value for value in match.groups()[1:] if value is not None)
+            for match in ATTRIBUTE.finditer(tag)}
+
+def section_spans(html):
+    """[(start, end, section id)] for each top-level <section>."""
+    spans = []
+    for match in SECTION_START.finditer(html):
+        end = html.find("</section", match.end())
+        spans.append((match.start(), len(html) if end < 0 else end, match.group(1)))
+    return spans
+
+def slot_width(sizes, viewport=VIEWPORT_WIDTH):
+    """CSS px width from the default (last) entry of a sizes attribute."""
+    default = sizes.split(",")[-1].strip() if sizes else ""
+    match = re.fullmatch(r'([\d.]+)(px|vw)', default)
+    if not match:
+        return viewport
+    value = float(match.group(1))
+    return value if match.group(2) == "px" else viewport * value / 100
+
+def choose_candidate(srcset, sizes="", viewport=VIEWPORT_WIDTH, dpr=DEVICE_PIXEL_RATIO):
+    """The srcset URL a browser would pick: the smallest candidate that is big enough."""
+    candidates = []
+    for candidate in srcset.split(","):
+        parts = candidate.split()
+        if not parts:
+            continue
+        descriptor = parts[1] if len(parts) > 1 else "1x"
+        try:
+            candidates.append((float(descriptor[:-1]), descriptor[-1], parts[0]))
+        except ValueError:
+            continue
+    if not candidates:
+        return None
+    target = slot_width(sizes, viewport) * dpr if candidates[0][1] == "w" else dpr
+    candidates.sort()
+    for value, _, url in candidates:
+        if value >= target:
+            return url
+    return candidates[-1][2]
+
+def page_resources(html):
+    """[(kind, url, section, eager)] for each resource the page loads, first reference only."""
+    spans = section_spans(html)
+    seen = set()
+    resources = []
+    preloads = []
+    for match in TAG_PATTERN.finditer(html):
+        tag = match.group(0)
+        name = re.match(r'<([a-zA-Z]+)', tag).group(1).lower()
+        attrs = attributes(tag)
+        found = []
+        if name == "img":
+            url = choose_candidate(attrs["srcset"], attrs.get("sizes", "")) if attrs.get("srcset") else None
+            found.append(("image", url or attrs.get("src"), attrs.get("loading", "").lower() != "lazy"))
+        elif name == "video" and attrs.get("poster"):
+            found.append(("image", attrs["poster"], True))
+        elif name == "script" and attrs.get("src"):
+            found.append(("script", attrs["src"], True))
+        elif name == "link" and attrs.get("href"):
+            rel = set(attrs.get("rel", "").lower().split())
+            if "stylesheet" in rel:
+                found.append(("style", attrs["href"], True))
+            elif "icon" in rel:
+                found.append(("image", attrs["href"], True))
+            elif "preload" in rel and attrs.get("as") in ("font", "image", "script", "style"):
+                # Counted where the page uses it, if it does (see resource_hints.py)
+                preloads.append((attrs["as"], attrs["href"]))
+        section = next((section_id for start, end, section_id in spans if start <= match.start() < end), "page")
+        for kind, url, eager in found:
+            if url and not url.startswith("data:") and url not in seen:
+                seen.add(url)
+                resources.append((kind, url, section, eager))
+    # Fonts declared in the page's own <style> blocks (see self_host_fonts.py)
+    for css in INLINE_STYLE.findall(html):
+        for url in stylesheet_fonts(css, ""):
+            if url not in seen:
+                seen.add(url)
+                resources.append(("font", url, "page", True))
+    for kind, url in preloads:
+        if not url.startswith("data:") and url not in seen:
+            seen.add(url)
+            resources.append((kind, url, "page", True))
+    return resources
+
+def local_size(out_dir, url):
+    """(raw, compressed) bytes of a local file as served, or None if missing."""
+    path = out_dir / logical_path(url)
+    if not path.is_file():
+        return None
+    raw = path.stat().st_size
+    siblings = [sibling.stat().st_size for sibling in (path.with_name(path.name + ".br"), path.with_name(path.name + ".gz"))
+                if sibling.exists()]
+    if siblings:
+        return raw, min(siblings)
+    if path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+        return raw, min(raw, len(gzip_bytes(path.read_bytes())))
+    return raw, raw
+
+def covers_latin(block):
+    """True unless an @font-face's unicode-range leaves out basic Latin (only such fonts load here)."""
+    match = UNICODE_RANGE.search(block)
+    if not match:
+        return True
+    for part in match.group(1).split(","):
+        bounds = part.strip().upper().removeprefix("U+").split("-")
+        try:
+            # U+4?? is the range U+400-4FF
+            low = int(bounds[0].replace("?", "0"), 16)
+            high = int(bounds[-1].replace("?", "F"), 16)
+        except ValueError:
+            continue
+        if low <= ord("a") <= high:
+            return True
+    return False
+
+def stylesheet_fonts(css, base_url):
+    """Font URLs a stylesheet loads for Latin text: the first woff2 (or first) source of each @font-face."""
+    fonts = []
+    for block in FONT_FACE.findall(css):
+        if not covers_latin(block):
+            continue
+        sources = FONT_SOURCE.findall(block)
+        if not sources:
+            continue
+        chosen = next((source for source in sources if source[3] == "woff2"), sources[0])
+        fonts.append(urljoin(base_url, chosen[1]))
+    return fonts
+
+class ExternalSizes:
+    """URL -> {"raw", "compressed", "fonts", "fetched_at"} for external resources, cached for EXTERNAL_TTL."""
+
+    def __init__(self, path=EXTERNAL_PATH, offline=False):
+        self.path = path
+        self.offline = offline
+        self.dirty = False
+        self.failures = FailureCache()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, url, kind):
+        """The entry for url, fetching it when stale; None if unavailable."""
+        entry = self.entries.get(url)
+        if entry is not None and (self.offline or entry["fetched_at"] + EXTERNAL_TTL > time.time()):
+            return entry
+        if self.offline:
+            return None
+        try:
+            body, _ = fetch(url, self.failures, timeout=5,
+                            headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+        except FetchFailed:
+            return entry
+        data = gzip.decompress(body) if body[:2] == b"\x1f\x8b" else body
+        fonts = stylesheet_fonts(data.decode("utf-8", "replace"), url) if kind == "style" else []
+        entry = self.entries[url] = {"raw": len(data), "compressed": len(body), "fonts": fonts,
+                                     "fetched_at": time.time()}
+        self.dirty = True
+        return entry
+
+    def save(self):
+        self.failures.save()
+        if self.dirty:
+            CACHE_DIR.mkdir(exist_ok=True)
+            atomic_write(self.path, json.dumps(self.entries, indent=2, sort_keys=True) + "\n")
+            self.dirty = False
+
+def measure(out_dir, page="index.html", offline=False):
+    """Weight of one built page: {"items": [...], "unknown": [(kind, url)]}.
+
+    Each item is {"kind", "url", "section", "eager", "raw", "compressed"};
+    the page's own HTML is split into one "html" item per section.
+    """
+    out_dir = Path(out_dir)
+    html = (out_dir / page).read_text(encoding='utf-8')
+    items = []
+    # HTML per section; each slice is compressed on its own, so the parts
+    # only approximate the page's real compressed size, which is used for the total
+    spans = section_spans(html)
+    outside = []
+    position = 0
+    for start, end, name in spans:
+        outside.append(html[position:start])
+        part = html[start:end].encode()
+        items.append({"kind": "html", "url": page, "section": name, "eager": True,
+                      "raw": len(part), "compressed": len(gzip_bytes(part))})
+        position = end
+    outside.append(html[position:])
+    rest = "".join(outside).encode()
+    items.append({"kind": "html", "url": page, "section": "page", "eager": True,
+                  "raw": len(rest), "compressed": len(gzip_bytes(rest))})
+
+    external = ExternalSizes(offline=offline)
+    unknown = []
+    for kind, url, section, eager in page_resources(html):
+        if is_local(url):
+            sizes = local_size(out_dir, url)
+            if sizes is None:
+                unknown.append((kind, url))
+                continue
+            items.append({"kind": kind, "url": url, "section": section, "eager": eager,
+                          "raw": sizes[0], "compressed": sizes[1]})
+            continue
+        if urlsplit(url).scheme not in ("http", "https"):
+            continue
+        entry = external.get(url, kind)
+        if entry is None:
+            unknown.append((kind, url))
+            continue
+        items.append({"kind": kind, "url": url, "section": section, "eager": eager,
+                      "raw": entry["raw"], "compressed": entry["compressed"]})
+        for font in entry["fonts"]:
+            font_entry = external.get(font, "font")
+            if font_entry is None:
+                unknown.append(("font", font))
+            else:
+                items.append({"kind": "font", "url": font, "section": section, "eager": True,
+                              "raw": font_entry["raw"], "compressed": font_entry["compressed"]})
+    external.save()
+
+    # The real compressed HTML size, spread over the sections in proportion
+    served = local_size(out_dir, page)
+    html_items = [item for item in items if item["kind"] == "html"]
+    estimated = sum(item["compressed"] for item in html_items)
+    if served and estimated:
+        for item in html_items:
+            item["compressed"] = round(item["compressed"] * served[1] / estimated)
+    return {"items": items, "unknown": unknown}
+
+def totals(items):
+    return {"count": len(items), "raw": sum(item["raw"] for item in items),
+            "compressed": sum(item["compressed"] for item in items)}
+
+def summarize(report):
+    """{scope: totals} for "total", "initial", every kind and every section ("section:<id>")."""
+    items = report["items"]
+    summary = {"total": totals(items), "initial": totals([item for item in items if item["eager"]])}
+    for kind in KINDS:
+        summary[kind] = totals([item for item in items if item["kind"] == kind])
+    for section in dict.fromkeys(item["section"] for item in items):
+        summary[f"section:{section}"] = totals([item for item in items if item["section"] == section])
+    return summary
+
+def load_budgets(path=BUDGETS_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def over_budget(summary, budgets):
+    """Messages for every budget exceeded."""
+    scopes = [(scope, budgets[scope]) for scope in ("total", "initial") if scope in budgets]
+    scopes += [(kind, limits) for kind, limits in budgets.get("kinds", {}).items()]
+    if "html" in budgets:
+        scopes.append(("html", budgets["html"]))
+    scopes += [(f"section:{name}", limits) for name, limits in budgets.get("sections", {}).items()]
+    messages = []
+    for scope, limits in scopes:
+        measured = summary.get(scope, {"raw": 0, "compressed": 0})
+        for key in ("raw", "compressed"):
+            limit = limits.get(f"{key}_kb")
+            if limit is not None and measured[key] > limit * 1024:
+                messages.append(f"{scope.removeprefix('section:')}: {key} {format_size(measured[key])} "
+                                f"exceeds the budget of {format_size(limit * 1024)}")
+    return messages
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.2f} MB"
+    return f"{size / 1024:.1f} KB"
+
+def print_report(summary, unknown):
+    def line(label, entry):
+        print(f"  {label:<22} {entry['count']:>4}  {format_size(entry['raw']):>10}  {format_size(entry['compressed']):>10}")
+
+    print(f"  {'':<22} {'files':>4}  {'raw':>10}  {'compressed':>10}")
+    for scope, entry in summary.items():
+        if scope.startswith("section:"):
+            line(f"section {scope.removeprefix('section:')}", entry)
+    for kind in KINDS:
+        if summary[kind]["count"]:
+            line(kind, summary[kind])
+    line("initial load", summary["initial"])
+    line("total", summary["total"])
+    for kind, url in unknown:
+        print(f"  ⚠ Not measured ({kind}): {url}")
+
+def check(out_dir, offline=False, budgets_path=BUDGETS_PATH):
+    """Measure, print the report; returns the over-budget messages."""
+    report = measure(out_dir, offline=offline)
+    summary = summarize(report)
+    print_report(summary, report["unknown"])
+    return over_budget(summary, load_budgets(budgets_path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the page weight of the built site.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    parser.add_argument("--offline", action="store_true", help="use cached sizes for external resources only")
+    args = parser.parse_args()
+
+    if not (Path(args.out) / "index.html").exists():
+        print(f"✗ {args.out}/index.html not found (run python3 build_site.py first)")
+        sys.exit(1)
+    problems = check(args.out, offline=args.offline)
+    for problem in problems:
+        print(f"✗ Over budget: {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"✓ Within the budgets in {BUDGETS_PATH.name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+Plain text of the PDFs in files/, for the site search index.
+
+The built-in extractor is pure Python. It resolves objects (including
+compressed object streams), walks the page tree in order and interprets
+the text operators of each page's content streams. Strings are decoded
+through the font's ToUnicode CMap, or for simple fonts through its
+encoding and /Differences. When pdftotext, PyMuPDF, pdfminer.six or pypdf
+is installed, the first of those available is used instead and the
+built-in extractor is only the fallback. Encrypted PDFs, fonts without a
+usable mapping and PDFs no extractor can parse yield no text rather than
+garbage.
+
+Text is cached in .cache/pdf-text by the PDF's sha256, so only new or
+changed PDFs are extracted; those run in a process pool.
+Usage: python3 pdf_text.py [pdf ...]   (default: every PDF in files/; prints word counts)
+"""
+
+import re
+import shutil
+import subprocess
+import sys
+import unicodedata
+import zlib
+from base64 import a85decode
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_output import atomic_write, file_digest
+from publication_store import BASE_DIR, CACHE_DIR
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_text
+except ImportError:
+    pdfminer_text = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+FILES_DIR = BASE_DIR / "files"
+TEXT_DIR = CACHE_DIR / "pdf-text"
+EXTRACTOR_VERSION = 2
+TJ_SPACE = 120  # TJ adjustments (thousandths of an em) wider than this are word gaps
+
+class Ref(tuple):
+    """Indirect reference (object number)."""
+
+class Name(str):
+    """PDF name object (without the slash)."""
+
+class Operator(bytes):
+    """Content stream operator or bare keyword."""
+
+TOKEN = re.compile(rb'''
+    (?P<space>[\x00\t\n\x0c\r ]+|%[^\r\n]*)
+  | (?P<dict><<|>>)
+  | (?P<array>[\[\]{}])
+  | (?P<hex><[0-9A-Fa-f\x00\t\n\x0c\r ]*>)
+  | (?P<name>/[^\x00\t\n\x0c\r ()<>\[\]{}/%]*)
+  | (?P<number>[+-]?(?:\d+\.?\d*|\.\d+)(?![^\x00\t\n\x0c\r ()<>\[\]{}/%]))
+  | (?P<string>\()
+  | (?P<keyword>[^\x00\t\n\x0c\r ()<>\[\]{}/%]+)
+''', re.VERBOSE)
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+NAME_ESCAPE = re.compile(rb'#([0-9A-Fa-f]{2})')
+
+def _literal_string(data, pos):
+    """(bytes, end) of the literal string whose "(" is at pos - 1."""
+    out = bytearray()
+    depth = 1
+    n = len(data)
+    while pos < n:
+        c = data[pos]
+        if c == 0x5C:  # backslash
+            pos += 1
+            nxt = data[pos:pos + 1]
+            if nxt in ESCAPES:
+                out += ESCAPES[nxt]
+                pos += 1
+            elif nxt.isdigit() and nxt in b"01234567":
+                octal = re.match(rb'[0-7]{1,3}', data[pos:pos + 3]).group()
+                out.append(int(octal, 8) & 0xFF)
+                pos += len(octal)
+            elif nxt in (b"\r", b"\n"):
+                pos += 2 if data[pos:pos + 2] == b"\r\n" else 1
+            else:
+                out += nxt
+                pos += 1
+            continue
+        if c == 0x28:
+            depth += 1
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), pos + 1
+        out.append(c)
+        pos += 1
+    return bytes(out), pos
+
+def tokens(data, pos=0):
+    """Yield (kind, value, end) PDF tokens from pos."""
+    n = len(data)
+    while pos < n:
+        match = TOKEN.match(data, pos)
+        if match is None:
+            pos += 1
+            continue
+        kind = match.lastgroup
+        pos = match.end()
+        if kind == "space":
+            continue
+        value = match.group()
+        if kind == "string":
+            value, pos = _literal_string(data, pos)
+        elif kind == "hex":
+            digits = re.sub(rb'[^0-9A-Fa-f]', b'', value)
+            value = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+            kind = "string"
+        elif kind == "name":
+            value = Name(NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), value[1:]).decode('latin-1'))
+        elif kind == "number":
+            value = float(value) if b"." in value else int(value)
+        yield kind, value, pos
+
+def parse_value(data, pos=0):
+    """(value, end) of the PDF object starting at pos; raises ValueError at end of data."""
+    stack = [[]]
+    for kind, value, end in tokens(data, pos):
+        if kind == "dict" and value == b"<<" or kind == "array" and value in (b"[", b"{"):
+            stack.append([kind])
+            continue
+        if kind == "dict" or kind == "array":
+            items = stack.pop()
+            if items[0] == "dict":
+                items = items[1:]
+                value = {items[i]: items[i + 1] for i in range(0, len(items) - 1, 2) if isinstance(items[i], Name)}
+            else:
+                value = items[1:]
+        elif kind == "keyword":
+            if value == b"R" and len(stack[-1]) >= 2 and isinstance(stack[-1][-1], int) and isinstance(stack[-1][-2], int):
+                gen = stack[-1].pop()
+                value = Ref((stack[-1].pop(), gen))
+            elif value in (b"true", b"false"):
+                value = value == b"true"
+            elif value == b"null":
+                value = None
+            else:
+                value = Operator(value)
+        if len(stack) == 1:
+            # A number may be the start of "n g R"
+            if isinstance(value, int) and not isinstance(value, bool):
+                following = re.match(rb'\s+(\d+)\s+R\b', data[end:end + 24])
+                if following:
+                    return Ref((value, int(following.group(1)))), end + following.end()
+            return value, end
+        stack[-1].append(value)
+    raise ValueError("unexpected end of PDF data")
+
+def decode_stream(dictionary, raw):
+    """Decoded stream bytes; None for filters this module does not handle."""
+    filters = dictionary.get("Filter") or []
+    if not isinstance(filters, list):
+        filters = [filters]
+    params = dictionary.get("DecodeParms")
+    for name in filters:
+        if name in ("FlateDecode", "Fl"):
+            try:
+                raw = zlib.decompressobj().decompress(raw)
+            except zlib.error:
+                return None
+            predictor = params.get("Predictor", 1) if isinstance(params, dict) else 1
+            if predictor >= 10:
+                raw = _unpredict(raw, params.get("Columns", 1) * params.get("Colors", 1))
+        elif name in ("ASCII85Decode", "A85"):
+            raw = a85decode(raw.strip().removesuffix(b"~>"), adobe=False)
+        elif name in ("ASCIIHexDecode", "AHx"):
+            digits = re.sub(rb'[^0-9A-Fa-f]', b'', raw.split(b">")[0])
+            raw = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+        else:
+            return None
+    return raw
+
+def _unpredict(data, columns):
+    """Undo PNG row predictors (used by xref and object streams)."""
+    out = bytearray()
+    previous = bytearray(columns)
+    for i in range(0, len(data) - columns, columns + 1):
+        kind, row = data[i], bytearray(data[i + 1:i + 1 + columns])
+        if kind == 2:
+            row = bytearray((a + b) & 0xFF for a, b in zip(row, previous))
+        elif kind == 1:
+            for j in range(1, len(row)):
+                row[j] = (row[j] + row[j - 1]) & 0xFF
+        out += row
+        previous = row
+    return bytes(out)
+
+class PDFDocument:
+    """Just enough of a PDF reader to get at pages, fonts and content streams."""
+
+    OBJECT = re.compile(rb'(?<![0-9])(\d+)\s+(\d+)\s+obj\b')
+
+    def __init__(self, data):
+        self.data = data
+        self.offsets = {}
+        for match in self.OBJECT.finditer(data):
+            self.offsets[int(match.group(1))] = match.end()
+        self.cache = {}
+        self.compressed = {}
+        for number in list(self.offsets):
+            value = self.get(number)
+            if isinstance(value, tuple) and value[0].get("Type") == "ObjStm":
+                self._index_object_stream(*value)
+
+    def _index_object_stream(self, dictionary, raw):
+        body = decode_stream(dictionary, raw)
+        if body is None:
+            return
+        first = dictionary.get("First", 0)
+        header = [int(x) for x in body[:first].split()]
+        for i in range(0, len(header) - 1, 2):
+            number, offset = header[i], header[i + 1]
+            if number not in self.offsets:
+                self.compressed[number] = (body, first + offset)
+
+    def get(self, number):
+        """The object: a value, or (dict, raw stream bytes) for streams."""
+        if number in self.cache:
+            return self.cache[number]
+        self.cache[number] = None  # guards against reference cycles
+        value = None
+        try:
+            if number in self.offsets:
+                pos = self.offsets[number]
+                value, end = parse_value(self.data, pos)
+                if isinstance(value, dict):
+                    stream = re.match(rb'\s*stream\r?\n', self.data[end:end + 16])
+                    if stream:
+                        value = (value, self._stream_bytes(value, end + stream.end()))
+            elif number in self.compressed:
+                body, pos = self.compressed[number]
+                value, _ = parse_value(body, pos)
+        except (ValueError, IndexError):
+            value = None
+        self.cache[number] = value
+        return value
+
+    def _stream_bytes(self, dictionary, start):
+        length = self.resolve(dictionary.get("Length"))
+        if isinstance(length, int) and self.data[start + length:start + length + 32].lstrip().startswith(b"endstream"):
+            return self.data[start:start + length]
+        end = self.data.find(b"endstream", start)
+        return self.data[start:end if end >= 0 else len(self.data)].rstrip(b"\r\n")
+
+    def resolve(self, value):
+        seen = 0
+        while isinstance(value, Ref) and seen < 32:
+            value = self.get(value[0])
+            seen += 1
+        return value
+
+    def resolve_dict(self, value):
+        value = self.resolve(value)
+        if isinstance(value, tuple):
+            value = value[0]
+        return value if isinstance(value, dict) else {}
+
+    def stream(self, value):
+        """Decoded bytes of a stream object (or None)."""
+        value = self.resolve(value)
+        if not isinstance(value, tuple):
+            return None
+        return decode_stream(*value)
+
+    def encrypted(self):
+        return re.search(rb'/Encrypt\s+\d+\s+\d+\s+R', self.data) is not None
+
+    def catalog(self):
+        found = {}
+        for number in sorted(set(self.offsets) | set(self.compressed)):
+            value = self.resolve_dict(Ref((number, 0)))
+            if value.get("Type") == "Catalog":
+                found = value
+        return found
+
+    def pages(self):
+        """Page dictionaries in page order, with inherited /Resources filled in."""
+        root = self.resolve_dict(self.catalog().get("Pages"))
+        pages = []
+        stack = [(root, None, 0)]
+        while stack:
+            node, inherited, depth = stack.pop()
+            resources = node.get("Resources", inherited)
+            if node.get("Type") == "Page" or "Kids" not in node:
+                pages.append(dict(node, Resources=resources))
+            elif depth < 64:
+                kids = self.resolve(node.get("Kids")) or []
+                for kid in reversed(kids):
+                    stack.append((self.resolve_dict(kid), resources, depth + 1))
+        return pages
+
+    def page_content(self, page):
+        contents = self.resolve(page.get("Contents"))
+        if isinstance(contents, tuple):
+            contents = [page.get("Contents")]
+        parts = []
+        for part in contents if isinstance(contents, list) else []:
+            data = self.stream(part)
+            if data:
+                parts.append(data)
+        return b"\n".join(parts)
+
+# Glyph names used in /Differences arrays, beyond the single-letter ones
+GLYPH_NAMES = {
+    "space": " ", "fi": "fi", "fl": "fl", "ff": "ff", "ffi": "ffi", "ffl": "ffl",
+    "hyphen": "-", "endash": "–", "emdash": "—", "minus": "-", "period": ".", "comma": ",",
+    "colon": ":", "semicolon": ";", "quoteright": "’", "quoteleft": "‘", "quotedblleft": "“",
+    "quotedblright": "”", "quotesingle": "'", "parenleft": "(", "parenright": ")",
+    "bracketleft": "[", "bracketright": "]", "slash": "/", "percent": "%", "ampersand": "&",
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "germandbls": "ß", "dotlessi": "ı",
+}
+BASE_ENCODINGS = {"WinAnsiEncoding": "cp1252", "MacRomanEncoding": "mac_roman"}
+
+def glyph_text(name):
+    if len(name) == 1:
+        return name
+    if name in GLYPH_NAMES:
+        return GLYPH_NAMES[name]
+    match = re.fullmatch(r'(?:uni|u)([0-9A-Fa-f]{4,6})', name)
+    if match:
+        return chr(int(match.group(1), 16))
+    base = name.split(".")[0].split("_")[0]
+    if base != name:
+        return glyph_text(base)
+    try:
+        return unicodedata.lookup(name.upper())
+    except KeyError:
+        return ""
+
+def parse_cmap(data):
+    """(code width in bytes, {code bytes: text}) from a ToUnicode CMap."""
+    mapping = {}
+    width = 1
+    space = re.search(rb'begincodespacerange\s*<([0-9A-Fa-f]+)>', data)
+    if space:
+        width = max(1, len(space.group(1)) // 2)
+
+    def text(hex_digits):
+        raw = bytes.fromhex(hex_digits.decode())
+        try:
+            return raw.decode("utf-16-be")
+        except UnicodeDecodeError:
+            return ""
+
+    for block in re.findall(rb'beginbfchar(.*?)endbfchar', data, re.DOTALL):
+        for src, dst in re.findall(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]*)>', block):
+            mapping[bytes.fromhex(src.decode())] = text(dst)
+    for block in re.findall(rb'beginbfrange(.*?)endbfrange', data, re.DOTALL):
+        for lo, hi, dst in re.findall(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]*>|\[[^\]]*\])', block):
+            start, stop = int(lo, 16), int(hi, 16)
+            size = len(lo) // 2
+            if stop - start > 0xFFFF:
+                continue
+            if dst.startswith(b"["):
+                targets = re.findall(rb'<([0-9A-Fa-f]*)>', dst)
+                for offset, target in enumerate(targets[:stop - start + 1]):
+                    mapping[(start + offset).to_bytes(size, "big")] = text(target)
+            else:
+                base = bytes.fromhex(dst[1:-1].decode())
+                prefix, last = base[:-2], int.from_bytes(base[-2:], "big")
+                for offset in range(stop - start + 1):
+                    try:
+                        mapping[(start + offset).to_bytes(size, "big")] = (prefix + (last + offset).to_bytes(2, "big")).decode("utf-16-be")
+                    except (UnicodeDecodeError, OverflowError):
+                        pass
+    return width, mapping
+
+# TeX's OT1 text encoding (Computer Modern fonts embedded without /Encoding)
+TEX_FONT = re.compile(r'^(?:[A-Z]{6}\+)?(?:CMR|CMBX|CMTI|CMSL|CMSS|CMCSC|SFRM|SFBX|SFTI|SFSL|SFSS)')
+OT1_CODES = {0x0B: "ff", 0x0C: "fi", 0x0D: "fl", 0x0E: "ffi", 0x0F: "ffl", 0x10: "ı",
+             0x19: "ß", 0x1A: "æ", 0x1B: "œ", 0x1C: "ø", 0x22: "”", 0x5C: "“",
+             0x7B: "–", 0x7C: "—"}
+
+class Font:
+    """Turns string operands into text (and glyph advances) for one font."""
+
+    def __init__(self, document, dictionary):
+        self.width = 1
+        self.cmap = None
+        self.table = None
+        self.codec = "latin-1"
+        self.widths = {}
+        self.default_width = 500
+        cmap = document.stream(dictionary.get("ToUnicode"))
+        if cmap:
+            self.width, self.cmap = parse_cmap(cmap)
+        if dictionary.get("Subtype") == "Type0":
+            self.width = 2 if self.cmap is None or self.width < 2 else self.width
+            descendants = document.resolve(dictionary.get("DescendantFonts")) or []
+            if descendants:
+                self._cid_widths(document, document.resolve_dict(descendants[0]))
+            return
+
+        first = document.resolve(dictionary.get("FirstChar"))
+        widths = document.resolve(dictionary.get("Widths"))
+        if isinstance(first, int) and isinstance(widths, list):
+            self.widths = {first + i: document.resolve(w) for i, w in enumerate(widths)
+                           if isinstance(document.resolve(w), (int, float))}
+        encoding = document.resolve(dictionary.get("Encoding"))
+        if isinstance(encoding, tuple):
+            encoding = encoding[0]
+        if isinstance(encoding, dict):
+            self.codec = BASE_ENCODINGS.get(encoding.get("BaseEncoding"), "latin-1")
+            differences = document.resolve(encoding.get("Differences")) or []
+            self.table = {}
+            code = 0
+            for item in differences:
+                if isinstance(item, int):
+                    code = item
+                elif isinstance(item, Name):
+                    self.table[code] = glyph_text(item)
+                    code += 1
+        elif isinstance(encoding, Name):
+            self.codec = BASE_ENCODINGS.get(encoding, "latin-1")
+        elif TEX_FONT.match(str(dictionary.get("BaseFont", ""))):
+            self.table = OT1_CODES
+
+    def _cid_widths(self, document, descendant):
+        self.default_width = descendant.get("DW", 1000)
+        spec = document.resolve(descendant.get("W")) or []
+        i = 0
+        while i + 1 < len(spec):
+            start, item = spec[i], document.resolve(spec[i + 1])
+            if isinstance(item, list):
+                for offset, w in enumerate(item):
+                    self.widths[start + offset] = w
+                i += 2
+            elif i + 2 < len(spec) and isinstance(item, int):
+                for code in range(start, min(item, start + 0xFFFF) + 1):
+                    self.widths[code] = spec[i + 2]
+                i += 3
+            else:
+                break
+
+    def codes(self, raw):
+        w = self.width
+        return [raw[i:i + w] for i in range(0, len(raw) - w + 1, w)]
+
+    def decode(self, raw):
+        if self.cmap is not None:
+            return "".join(self.cmap.get(code, "") for code in self.codes(raw))
+        if self.width == 2:
+            return ""  # CID font without ToUnicode: glyph ids only
+        if self.table:
+            return "".join(self.table.get(b) if b in self.table else bytes([b]).decode(self.codec, "replace") for b in raw)
+        return raw.decode(self.codec, "replace")
+
+    def advance(self, raw):
+        """Width of raw in thousandths of an em."""
+        return sum(self.widths.get(int.from_bytes(code, "big"), self.default_width) for code in self.codes(raw))
+
+class TextCursor:
+    """Tracks where the last glyph ended, to tell word gaps and line breaks
+    from the positioning operators that merely continue a word."""
+
+    def __init__(self):
+        self.line = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]  # text line matrix
+        self.x = self.y = None                     # end of the last text shown
+        self.size = 1.0
+        self.leading = 0.0
+
+    def em(self):
+        return abs(self.size * self.line[0]) or 1.0
+
+    def move_to(self, matrix):
+        """Set a new line matrix; returns the separator to emit ("", " " or "\n")."""
+        self.line = matrix
+        if self.x is None:
+            return ""
+        x, y = matrix[4], matrix[5]
+        height = abs(self.size * matrix[3]) or 1.0
+        if abs(y - self.y) > 0.5 * height:
+            separator = "\n"
+        elif x - self.x > 0.15 * self.em() or x < self.x - self.em():
+            separator = " "
+        else:
+            separator = ""
+        self.x = self.y = None
+        return separator
+
+    def translate(self, tx, ty):
+        a, b, c, d, e, f = self.line
+        return self.move_to([a, b, c, d, e + tx * a + ty * c, f + tx * b + ty * d])
+
+    def shown(self, thousandths):
+        """Advance past shown text (or a TJ adjustment, negative to the right)."""
+        if self.x is None:
+            self.x, self.y = self.line[4], self.line[5]
+        self.x += thousandths / 1000 * self.em()
+        self.line = self.line[:4] + [self.x, self.line[5]]
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+def content_text(data, fonts):
+    """Text of one content stream; fonts maps resource names to Font objects."""
+    out = []
+    operands = []
+    arrays = []  # open [ ] (and << >>) operands, innermost last
+    font = None
+    cursor = TextCursor()
+    stream = tokens(data)
+    for kind, value, end in stream:
+        if kind in ("array", "dict"):
+            if value in (b"[", b"{", b"<<"):
+                arrays.append([])
+            elif arrays:
+                closed = arrays.pop()
+                (arrays[-1] if arrays else operands).append(closed)
+            continue
+        if kind != "keyword" or arrays:
+            (arrays[-1] if arrays else operands).append(value)
+            continue
+        op = value
+        if op == b"ID":
+            # Inline image data: skip to EI
+            stop = re.compile(rb'\sEI(?=[\s]|$)').search(data, end)
+            stream = tokens(data, stop.end() if stop else len(data))
+        elif op == b"Tf" and len(operands) >= 2:
+            font = fonts.get(operands[-2])
+            cursor.size = _number(operands[-1]) or 1.0
+        elif op == b"TL" and operands:
+            cursor.leading = _number(operands[-1])
+        elif op in (b"Td", b"TD") and len(operands) >= 2:
+            if op == b"TD":
+                cursor.leading = -_number(operands[-1])
+            out.append(cursor.translate(_number(operands[-2]), _number(operands[-1])))
+        elif op == b"Tm" and len(operands) >= 6:
+            out.append(cursor.move_to([_number(v) for v in operands[-6:]]))
+        elif op == b"T*":
+            out.append(cursor.translate(0, -cursor.leading))
+        elif op in (b"Tj", b"'", b'"') and operands and isinstance(operands[-1], bytes) and font:
+            if op != b"Tj":
+                out.append(cursor.translate(0, -cursor.leading) or "\n")
+            out.append(font.decode(operands[-1]))
+            cursor.shown(font.advance(operands[-1]))
+        elif op == b"TJ" and operands and isinstance(operands[-1], list) and font:
+            for item in operands[-1]:
+                if isinstance(item, bytes):
+                    out.append(font.decode(item))
+                    cursor.shown(font.advance(item))
+                elif isinstance(item, (int, float)):
+                    if item < -TJ_SPACE:
+                        out.append(" ")
+                    cursor.shown(-item)
+        elif op == b"BT":
+            cursor.line = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+        operands = []
+    return "".join(out)
+
+def builtin_text(data):
+    """Text of PDF bytes with the pure-Python extractor ("" if it cannot be read)."""
+    document = PDFDocument(data)
+    if document.encrypted():
+        return ""
+    pages = []
+    font_cache = {}
+    for page in document.pages():
+        resources = document.resolve_dict(page.get("Resources"))
+        fonts = {}
+        for name, ref in document.resolve_dict(resources.get("Font")).items():
+            key = ref if isinstance(ref, Ref) else id(ref)
+            if key not in font_cache:
+                font_cache[key] = Font(document, document.resolve_dict(ref))
+            fonts[name] = font_cache[key]
+        pages.append(content_text(document.page_content(page), fonts))
+    return "\n\f".join(pages)
+
+def tidy(text):
+    """Join hyphenated line breaks and collapse whitespace runs."""
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r'(\w)\n?-\n(?=[a-z])', r'\1', text)
+    text = re.sub(r'[ \t\r\x0b]+', ' ', text)
+    return re.sub(r'\s*\n\s*', '\n', text).strip()
+
+def extract_text(pdf_path):
+    """Text of a PDF, preferring pdftotext, PyMuPDF, pdfminer.six or pypdf when installed."""
+    if shutil.which("pdftotext"):
+        result = subprocess.run(["pdftotext", "-q", "-enc", "UTF-8", str(pdf_path), "-"],
+                                capture_output=True, timeout=120)
+        if result.returncode == 0:
+            return tidy(result.stdout.decode("utf-8", "replace"))
+    if fitz is not None:
+        try:
+            with fitz.open(pdf_path) as document:
+                return tidy("\n".join(page.get_text() for page in document))
+        except Exception:
+            pass
+    if pdfminer_text is not None:
+        try:
+            return tidy(pdfminer_text(str(pdf_path)))
+        except Exception:
+            pass
+    if PdfReader is not None:
+        try:
+            reader = PdfReader(str(pdf_path))
+            if not reader.is_encrypted:
+                return tidy("\n\f".join(page.extract_text() or "" for page in reader.pages))
+        except Exception:
+            pass
+    return tidy(builtin_text(Path(pdf_path).read_bytes()))
+
+def cache_path(digest):
+    return TEXT_DIR / f"{digest[:32]}-v{EXTRACTOR_VERSION}.txt"
+
+def extract_to_cache(pdf_path, digest):
+    """Extract one PDF's text into the cache; returns the text. Runs in a worker process."""
+    try:
+        text = extract_text(pdf_path)
+    except Exception as e:
+        # One unreadable PDF must not abort the build; it just has no full text
+        print(f"⚠ {Path(pdf_path).name}: no text extracted ({type(e).__name__}: {e})")
+        text = ""
+    TEXT_DIR.mkdir(parents=True, exist_ok=True)
+    atomic_write(cache_path(digest), text)
+    return text
+
+def pdf_texts(pdf_paths, workers=None):
+    """{pdf path: text}; only PDFs not in the cache are extracted (in a process pool)."""
+    texts = {}
+    pending = {}
+    for pdf_path in pdf_paths:
+        digest = file_digest(pdf_path)
+        if digest is None:
+            continue
+        cached = cache_path(digest)
+        if cached.exists():
+            texts[pdf_path] = cached.read_text(encoding='utf-8')
+        else:
+            pending[pdf_path] = digest
+    if len(pending) == 1:
+        pdf_path, digest = pending.popitem()
+        texts[pdf_path] = extract_to_cache(pdf_path, digest)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pdf_path: pool.submit(extract_to_cache, pdf_path, digest) for pdf_path, digest in pending.items()}
+            for pdf_path, future in futures.items():
+                texts[pdf_path] = future.result()
+    return texts
+
+def main():
+    pdf_paths = [Path(arg) for arg in sys.argv[1:]] or sorted(FILES_DIR.glob("*.pdf"))
+    texts = pdf_texts(pdf_paths)
+    for pdf_path in pdf_paths:
+        text = texts.get(pdf_path)
+        if text is None:
+            print(f"✗ {pdf_path}: not found")
+        elif not text:
+            print(f"⚠ {pdf_path.name}: no extractable text")
+        else:
+            print(f"✓ {pdf_path.name}: {len(text.split())} words")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Publication thumbnails from the local PDFs in files/.
+
+A publication without an image_icon_link gets a thumbnail made from its PDF.
+Its paper or preprint link must point into files/, or end in the name of a
+file there (e.g. .../uploads/2021/07/MLHC21.pdf -> files/MLHC21.pdf). The
+thumbnail is the first embedded figure: the first image XObject in the
+file that is large enough and not a banner. JPEG figures are copied as-is,
+8-bit RGB/gray Flate images are rewritten as PNG, all in pure Python. When
+no figure qualifies, the first page is rasterized with PyMuPDF or pdftoppm
+if either is available. Pillow, if installed, scales every thumbnail down
+to THUMB_WIDTH.
+
+Results are cached in .cache/pdf-thumbnails by the PDF's sha256, including
+"nothing found", so an unchanged PDF is never processed twice. Uncached PDFs
+are processed in a process pool.
+Usage: python3 pdf_thumbnails.py [pdf ...]   (default: every PDF in files/)
+"""
+
+import io
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from build_output import atomic_write, file_digest
+from publication_store import BASE_DIR, CACHE_DIR
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+FILES_DIR = BASE_DIR / "files"
+THUMB_DIR = CACHE_DIR / "pdf-thumbnails"
+EXTRACTOR_VERSION = 2      # bump to invalidate cached thumbnails
+THUMB_WIDTH = 600
+MIN_SIDE = 120             # smaller images are logos and icons
+MAX_ASPECT = 4             # wider/taller ones are banners and rules
+MIN_BYTES_PER_PIXEL = 0.01 # compressed smaller than this, an image is blank (a fill or a mask base)
+
+IMAGE_SUBTYPE = re.compile(rb'/Subtype\s*/Image\b')
+NUMBER = rb'\s*(\d+)'
+REFERENCE = re.compile(rb'(\d+)\s+(\d+)\s+R')
+MASK_REFERENCE = re.compile(rb'/S?Mask\s+(\d+)\s+\d+\s+R')
+OBJECT_NUMBER = re.compile(rb'(?<!\d)(\d+)\s+\d+$')
+COMPONENTS = {b"DeviceRGB": 3, b"DeviceGray": 1, b"CalRGB": 3, b"CalGray": 1}
+PNG_COLOR_TYPES = {1: 0, 3: 2}  # components -> PNG colour type
+
+def local_pdf(links, files_dir=FILES_DIR):
+    """The PDF in files_dir that one of links points to, or None."""
+    for link in links:
+        if not link:
+            continue
+        path = unquote(urlsplit(link).path)
+        if not path.lower().endswith(".pdf"):
+            continue
+        candidate = files_dir / Path(path).name
+        if candidate.is_file():
+            return candidate
+    return None
+
+def files_signature(files_dir=FILES_DIR):
+    """Names, sizes and mtimes of the local PDFs: cheap change detection for build stamps."""
+    return "\n".join(f"{path.name} {path.stat().st_size} {path.stat().st_mtime_ns}"
+                     for path in sorted(files_dir.glob("*.pdf")))
+
+def _int(dictionary, key, default=None):
+    match = re.search(rb'/' + key + NUMBER + rb'\b(?!\s+\d+\s+R)', dictionary)
+    return int(match.group(1)) if match else default
+
+def _object(data, number):
+    """Body of indirect object number (uncompressed objects only), or None."""
+    match = re.search(rb'(?<!\d)' + str(number).encode() + rb'\s+0\s+obj\b(.*?)endobj', data, re.DOTALL)
+    return match.group(1) if match else None
+
+def _components(data, dictionary):
+    """Colour components of an image's /ColorSpace, or None if unsupported."""
+    match = re.search(rb'/ColorSpace\s*(/\w+|\[[^\]]*\]|\d+\s+\d+\s+R)', dictionary)
+    if not match:
+        return None
+    value = match.group(1)
+    ref = REFERENCE.fullmatch(value)
+    if ref:
+        value = (_object(data, int(ref.group(1))) or b"").strip()
+    if value.startswith(b"/"):
+        return COMPONENTS.get(value[1:])
+    icc = re.fullmatch(rb'\[\s*/ICCBased\s+(\d+)\s+\d+\s+R\s*\]', value)
+    if icc:
+        profile = _object(data, int(icc.group(1))) or b""
+        return _int(profile, b"N")
+    return None
+
+def _stream(data, dictionary_end):
+    """Raw bytes of the stream whose dictionary ends at dictionary_end."""
+    start = data.index(b"stream", dictionary_end) + len(b"stream")
+    if data[start:start + 2] == b"\r\n":
+        start += 2
+    elif data[start:start + 1] in (b"\n", b"\r"):
+        start += 1
+    end = data.find(b"endstream", start)
+    if end < 0:
+        return None
+    return data[start:end].rstrip(b"\r\n")
+
+def _png(width, height, components, rows):
+    """PNG file bytes from PNG-filtered scanlines (each starting with a filter byte)."""
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+    header = struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[components], 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 9)) + chunk(b"IEND", b"")
+
+def _image(data, dictionary, stream):
+    """(bytes, ext) for an image XObject in a web format, or None."""
+    filters = re.findall(rb'/(\w+Decode)\b', dictionary.split(b"/DecodeParms")[0])
+    if b"/ImageMask true" in dictionary or b"/SMask" in dictionary:
+        # Masks, and colour data meant to be seen through a soft mask
+        return None
+    components = _components(data, dictionary)
+    if filters == [b"DCTDecode"]:
+        # CMYK JPEGs (Adobe) show inverted in browsers
+        return (stream, ".jpg") if components in (1, 3) else None
+    if filters != [b"FlateDecode"] or components not in PNG_COLOR_TYPES or _int(dictionary, b"BitsPerComponent") != 8:
+        return None
+    width, height = _int(dictionary, b"Width"), _int(dictionary, b"Height")
+    try:
+        raw = zlib.decompress(stream)
+    except zlib.error:
+        return None
+    row = width * components
+    predictor = _int(dictionary, b"Predictor", 1)
+    if predictor >= 10:
+        # Already PNG-filtered scanlines
+        if len(raw) < height * (row + 1):
+            return None
+        rows = raw[:height * (row + 1)]
+    elif predictor == 1:
+        if len(raw) < height * row:
+            return None
+        rows = b"".join(b"\x00" + raw[y * row:(y + 1) * row] for y in range(height))
+    else:
+        return None
+    return _png(width, height, components, rows), ".png"
+
+def embedded_figure(data):
+    """(bytes, ext) of the first sizeable image XObject in PDF bytes, or None."""
+    if b"/Encrypt" in data[-4096:]:
+        return None
+    # Soft masks and stencil masks are images too (grayscale alpha), never the figure
+    masks = {int(number) for number in MASK_REFERENCE.findall(data)}
+    for match in IMAGE_SUBTYPE.finditer(data):
+        start = data.rfind(b" obj", 0, match.start())
+        stream_at = data.find(b"stream", match.end())
+        endobj = data.find(b"endobj", match.end())
+        if start < 0 or stream_at < 0 or (0 <= endobj < stream_at) or b"endobj" in data[start:match.start()]:
+            continue
+        number = OBJECT_NUMBER.search(data, max(0, start - 32), start)
+        if number and int(number.group(1)) in masks:
+            continue
+        dictionary = data[start:stream_at]
+        width, height = _int(dictionary, b"Width"), _int(dictionary, b"Height")
+        if not width or not height or min(width, height) < MIN_SIDE or max(width, height) > MAX_ASPECT * min(width, height):
+            continue
+        stream = _stream(data, stream_at)
+        if not stream or len(stream) < width * height * MIN_BYTES_PER_PIXEL:
+            continue
+        image = _image(data, dictionary, stream)
+        if image:
+            return image
+    return None
+
+def first_page_raster(pdf_path):
+    """(png bytes, ".png") of page 1 via PyMuPDF or pdftoppm, or None if neither works."""
+    if fitz is not None:
+        try:
+            with fitz.open(pdf_path) as document:
+                page = document[0]
+                zoom = THUMB_WIDTH / page.rect.width
+                return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png"), ".png"
+        except Exception:
+            pass
+    if shutil.which("pdftoppm"):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "page"
+            result = subprocess.run(["pdftoppm", "-png", "-f", "1", "-l", "1", "-singlefile",
+                                     "-scale-to-x", str(THUMB_WIDTH), "-scale-to-y", "-1", str(pdf_path), str(out)],
+                                    capture_output=True, timeout=60)
+            if result.returncode == 0 and out.with_suffix(".png").exists():
+                return out.with_suffix(".png").read_bytes(), ".png"
+    return None
+
+def _scaled(image, ext):
+    """Scale down to THUMB_WIDTH with Pillow, when installed."""
+    if Image is None:
+        return image, ext
+    try:
+        with Image.open(io.BytesIO(image)) as picture:
+            if picture.width <= THUMB_WIDTH:
+                return image, ext
+            picture.thumbnail((THUMB_WIDTH, THUMB_WIDTH * MAX_ASPECT))
+            out = io.BytesIO()
+            picture.save(out, "JPEG" if ext == ".jpg" else "PNG", optimize=True)
+            return out.getvalue(), ext
+    except OSError:
+        return image, ext
+
+def cache_key(digest):
+    return f"{digest[:32]}-v{EXTRACTOR_VERSION}"
+
+def miss_marker(digest):
+    """Marks a PDF with no thumbnail; separate per renderer availability, so
+    installing one retries the PDFs that had no usable figure."""
+    renderer = fitz is not None or shutil.which("pdftoppm") is not None
+    return THUMB_DIR / (cache_key(digest) + (".none" if renderer else ".none-norender"))
+
+def cached_thumbnail(digest):
+    """(True, path or None) if the PDF with this digest was processed before, else (False, None)."""
+    for ext in (".jpg", ".png"):
+        path = THUMB_DIR / (cache_key(digest) + ext)
+        if path.exists():
+            return True, path
+    if miss_marker(digest).exists():
+        return True, None
+    return False, None
+
+def make_thumbnail(pdf_path, digest):
+    """Extract a thumbnail for one PDF into the cache; returns its path or None.
+
+    Runs in a worker process.
+    """
+    try:
+        data = Path(pdf_path).read_bytes()
+        found = embedded_figure(data) or first_page_raster(pdf_path)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        found = None
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
+    if found is None:
+        atomic_write(miss_marker(digest), "")
+        return None
+    image, ext = _scaled(*found)
+    path = THUMB_DIR / (cache_key(digest) + ext)
+    atomic_write(path, image)
+    return path
+
+def ensure_thumbnails(pdf_paths, workers=None):
+    """{pdf path: (digest, cached thumbnail path or None)}; uncached PDFs go through a process pool."""
+    results = {}
+    pending = {}
+    for pdf_path in set(pdf_paths):
+        digest = file_digest(pdf_path)
+        if digest is None:
+            continue
+        hit, path = cached_thumbnail(digest)
+        if hit:
+            results[pdf_path] = (digest, path)
+        else:
+            pending[pdf_path] = digest
+    if len(pending) == 1:
+        pdf_path, digest = pending.popitem()
+        results[pdf_path] = (digest, make_thumbnail(pdf_path, digest))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pdf_path: pool.submit(make_thumbnail, pdf_path, digest) for pdf_path, digest in pending.items()}
+            for pdf_path, future in futures.items():
+                results[pdf_path] = (pending[pdf_path], future.result())
+    return results
+
+def main():
+    pdf_paths = [Path(arg) for arg in sys.argv[1:]] or sorted(FILES_DIR.glob("*.pdf"))
+    if not pdf_paths:
+        print(f"✗ No PDFs found in {FILES_DIR}")
+        sys.exit(1)
+    results = ensure_thumbnails(pdf_paths)
+    made = 0
+    for pdf_path in pdf_paths:
+        if pdf_path not in results:
+            print(f"✗ {pdf_path}: not found")
+        elif results[pdf_path][1] is None:
+            print(f"⚠ {pdf_path.name}: no usable figure (and no PDF renderer installed)")
+        else:
+            made += 1
+            print(f"✓ {pdf_path.name} -> {results[pdf_path][1].relative_to(BASE_DIR)}")
+    print(f"{made} of {len(pdf_paths)} PDFs have a thumbnail")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Write maximum-compression .gz and .br siblings for text assets in a build tree.
+
+Static hosts that support precompressed files can then serve the smallest
+encoding without compressing at request time. Brotli output needs the
+optional `brotli` package (pip install brotli); gzip always works.
+Usage: python3 precompress.py [dist]
+"""
+
+import gzip
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = {'.html', '.json', '.svg', '.css', '.js', '.xml', '.txt', '.bib', '.webmanifest'}
+
+# Below this size the compressed file plus headers is rarely smaller
+MIN_SIZE = 256
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output reproducible across builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+
+def precompress_file(path):
+    """Write path.gz / path.br when smaller than path; returns {encoding: size}."""
+    path = Path(path)
+    data = path.read_bytes()
+    sizes = {"identity": len(data)}
+    if len(data) < MIN_SIZE:
+        return sizes
+
+    encoders = [(".gz", "gzip", gzip_bytes)]
+    if brotli is not None:
+        encoders.append((".br", "br", brotli_bytes))
+
+    for suffix, encoding, encode in encoders:
+        sibling = path.with_name(path.name + suffix)
+        if sibling.exists() and sibling.stat().st_mtime >= path.stat().st_mtime:
+            sizes[encoding] = sibling.stat().st_size
+            continue
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            atomic_write(sibling, compressed)
+            sizes[encoding] = len(compressed)
+        elif sibling.exists():
+            sibling.unlink()
+
+    return sizes
+
+def precompress_tree(root):
+    """Precompress every compressible file under root; returns {path: sizes}."""
+    root = Path(root)
+    results = {}
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+            results[path] = precompress_file(path)
+    return results
+
+def print_summary(results, root):
+    if brotli is None:
+        print("⚠ brotli not installed, writing .gz only (pip install brotli)")
+    for path, sizes in results.items():
+        encoded = ", ".join(f"{enc} {size / 1024:.1f} KB" for enc, size in sizes.items() if enc != "identity")
+        if encoded:
+            print(f"  {path.relative_to(root)}: {sizes['identity'] / 1024:.1f} KB -> {encoded}")
+
+def main():
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("dist")
+    if not root.is_dir():
+        print(f"✗ {root} is not a directory")
+        sys.exit(1)
+    results = precompress_tree(root)
+    print_summary(results, root)
+    print(f"✓ Precompressed {len(results)} files under {root}")
+
+if __name__ == "__main__":
+    main()
@@ -1,157 +1,374 @@
 #!/usr/bin/env python3
 """
 Process publications JSON: download images and generate HTML with venues.
-Usage: python3 process_publications.py <json_file>
+Usage: python3 process_publications.py <json_file> [--dry-run] [--recheck-failed]
 """
 
-import json
-import urllib.request
 import base64
+import html
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
 from pathlib import Path
 
-def download_image(url, filename):
-    """Download image from URL exactly as provided"""
-    if not url or url == "":
-        return False
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            if response.status == 200:
-                with open(filename, 'wb') as out_file:
-                    out_file.write(response.read())
-                return True
-    except:
-        pass
-    return False
+from author_index import AUTHOR_INDEX_PATH, write_author_index
+from build_output import (
+    atomic_open,
+    atomic_write,
+    build_is_current,
+    build_lock,
+    inputs_digest,
+    pop_dry_run_flag,
+    record_build,
+    write_html,
+)
+from lab_members import LAB_MEMBERS_PATH, default_matcher
+from pdf_thumbnails import ensure_thumbnails, files_signature, local_pdf
+from publication_changes import diff_snapshots, load_snapshot, print_changes, save_snapshot, scan_checked
+from publication_model import Publication, Registry, records_from_data
+from publication_store import checked_pairs
+from stream_publications import iter_publications
+from url_failures import FailureCache, FetchFailed, fetch, format_wait, pop_recheck_flag
+
+# Files that change the rendered HTML besides the publication data
+RENDER_INPUTS = (Path(__file__), Path(__file__).with_name("lab_members.py"), LAB_MEMBERS_PATH)
+
+def download_image(url, filename, failures=None):
+    """Download image from URL exactly as provided; raises FetchFailed.
+
+    With a FailureCache, URLs that failed recently are skipped without a request.
+    """
+    body, _ = fetch(url, failures, timeout=10)
+    atomic_write(filename, body)
 
 def format_authors(authors_list):
-    formatted = []
-    for author in authors_list:
-        if "Kayhan" in author or "Batmanghelich" in author:
-            formatted.append(f"<b>{author}</b>")
-        else:
-            formatted.append(author)
-    return ", ".join(formatted)
-
-# Delete old images first
-images_dir = Path("images/publications")
-if images_dir.exists():
-    for img_file in images_dir.glob("pub_*"):
-        img_file.unlink()
-    print("✓ Deleted old publication images")
-
-# Read JSON
-if len(sys.argv) > 1:
-    json_file = sys.argv[1]
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-else:
-    # Try to read from stdin
-    try:
-        data = json.load(sys.stdin)
-    except:
-        print("Usage: python3 process_publications.py <json_file>")
-        print("   OR: cat publications.json | python3 process_publications.py")
-        sys.exit(1)
+    # Lab members (lab_members.json) in bold
+    return default_matcher().highlight(authors_list)
 
-# Create images directory (already created above, but ensure it exists)
-images_dir.mkdir(parents=True, exist_ok=True)
+def image_filename(img_url, year, seq_num):
+    """Thumbnail file name for the publication at position seq_num."""
+    if img_url and (img_url.endswith('.jpg') or img_url.endswith('.jpeg')):
+        return f"pub_{year}_{seq_num}.jpg"
+    return f"pub_{year}_{seq_num}.png"
 
-# Generate HTML and download images
-html_parts = []
-seq_num = 1
-downloaded = 0
-failed = 0
+def sequence_starts(year_counts):
+    """First sequence number of each year; numbering runs newest year first."""
+    starts = {}
+    seq_num = 1
+    for year in sorted(year_counts, reverse=True):
+        starts[year] = seq_num
+        seq_num += year_counts[year]
+    return starts
 
-for year in sorted(data.keys(), reverse=True):
-    html_parts.append(f'            <h4 class="mt-4 mb-3 fw-bold">{year}</h4>')
-    
-    for pub in data[year]:
-        # Download image
-        img_url = pub.get("image_icon_link", "")
-        if img_url:
-            if img_url.endswith('.jpg') or img_url.endswith('.jpeg'):
-                img_filename = f"pub_{year}_{seq_num}.jpg"
-            else:
-                img_filename = f"pub_{year}_{seq_num}.png"
-            
-            img_path = images_dir / img_filename
-            if not img_path.exists():
-                if download_image(img_url, str(img_path)):
-                    downloaded += 1
-                    print(f"✓ Downloaded: {img_filename}")
+def year_heading(year):
+    return f'            <h4 class="mt-4 mb-3 fw-bold">{year}</h4>'
+
+def render_article(pub, seq_num, images_dir, stats, download=True, failures=None, pdf_thumbnail=None):
+    """Download the thumbnail for one publication and return its <article> HTML.
+
+    pdf_thumbnail (a cached image from pdf_thumbnails.py) is used when there is no icon link.
+    """
+    year = pub.year
+
+    # Download image
+    img_url = pub.image_icon_link
+    img_filename = image_filename(img_url or (pdf_thumbnail and pdf_thumbnail.name), year, seq_num)
+    if img_url:
+        img_path = images_dir / img_filename
+        if download and not img_path.exists():
+            try:
+                download_image(img_url, str(img_path), failures)
+                stats["downloaded"] += 1
+                print(f"✓ Downloaded: {img_filename}")
+            except FetchFailed as e:
+                stats["failed"] += 1
+                if e.cached:
+                    stats["skipped"] = stats.get("skipped", 0) + 1
+                    print(f"✗ Skipped ({e}, retry in {format_wait(e.retry_at - time.time())}): {img_url[:60]}...")
                 else:
-                    failed += 1
-                    print(f"✗ Failed: {img_url[:60]}...")
-        else:
-            img_filename = f"pub_{year}_{seq_num}.png"
-        
-        # Format authors
-        authors_html = format_authors(pub["authors"])
-        
-        # Build meta links
-        meta_links = []
-        if pub.get("paper_link") and pub["paper_link"]:
-            meta_links.append(f'<a href="{pub["paper_link"]}"><i class="bi bi-file-earmark-text"></i> Paper</a>')
-        if pub.get("preprint_link") and pub["preprint_link"]:
-            meta_links.append(f'<a href="{pub["preprint_link"]}"><i class="bi bi-cloud-download"></i> Preprint</a>')
-        if pub.get("code_link") and pub["code_link"]:
-            meta_links.append(f'<a href="{pub["code_link"]}"><i class="bi bi-github"></i> Code</a>')
-        if pub.get("bibtex") and pub["bibtex"]:
-            bibtex_text = pub["bibtex"]
-            bibtex_b64 = base64.b64encode(bibtex_text.encode('utf-8')).decode('utf-8')
-            safe_title = "".join(c for c in pub["title"][:50] if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
-            meta_links.append(f'<a href="data:text/plain;base64,{bibtex_b64}" download="{safe_title}.bib"><i class="bi bi-file-text"></i> BibTeX</a>')
-        
-        meta_links_html = '<div class="meta-links mb-2">' + " ".join(meta_links) + '</div>' if meta_links else ''
-        
-        # Add venue
-        venue_html = ''
-        venue = pub.get("venue", "")
-        if venue:
-            venue_html = f'<div class="mb-2"><span class="fw-semibold">Venue:</span> <em>{venue}</em></div>'
-        
-        # Generate HTML
-        html_parts.append(f'''            <article class="item-row">
-                <img src="images/publications/{img_filename}" alt="{pub["title"]} thumbnail" onerror="this.src='images/bu-logo.png'">
+                    print(f"✗ Failed ({e}): {img_url[:60]}...")
+            except ValueError as e:
+                stats["failed"] += 1
+                print(f"✗ Failed ({e}): {img_url[:60]}...")
+    elif pdf_thumbnail is not None and download:
+        atomic_write(images_dir / img_filename, pdf_thumbnail.read_bytes())
+        stats["from_pdf"] = stats.get("from_pdf", 0) + 1
+        print(f"✓ Thumbnail from PDF: {img_filename}")
+    
+    # Format authors
+    authors_html = format_authors(pub.author_names)
+    
+    # Build meta links
+    meta_links = []
+    if pub.paper_link:
+        meta_links.append(f'<a href="{pub.paper_link}"><i class="bi bi-file-earmark-text"></i> Paper</a>')
+    if pub.preprint_link:
+        meta_links.append(f'<a href="{pub.preprint_link}"><i class="bi bi-cloud-download"></i> Preprint</a>')
+    if pub.code_link:
+        meta_links.append(f'<a href="{pub.code_link}"><i class="bi bi-github"></i> Code</a>')
+    if pub.bibtex:
+        bibtex_text = pub.bibtex
+        bibtex_b64 = base64.b64encode(bibtex_text.encode('utf-8')).decode('utf-8')
+        safe_title = "".join(c for c in pub.title[:50] if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
+        meta_links.append(f'<a href="data:text/plain;base64,{bibtex_b64}" download="{safe_title}.bib"><i class="bi bi-file-text"></i> BibTeX</a>')
+    
+    meta_links_html = '<div class="meta-links mb-2">' + " ".join(meta_links) + '</div>' if meta_links else ''
+    
+    # Add venue
+    venue_html = ''
+    venue = pub.venue_name
+    if venue:
+        venue_html = f'<div class="mb-2"><span class="fw-semibold">Venue:</span> <em>{venue}</em></div>'
+    
+    # Generate HTML
+    id_attr = f' data-pub-id="{html.escape(pub.id)}"' if pub.id else ''
+    return f'''            <article class="item-row"{id_attr}>
+                <img src="images/publications/{img_filename}" alt="{pub.title} thumbnail" onerror="this.src='images/bu-logo.png'">
                 <div>
-                    <h5 class="mb-1 fw-bold">{pub["title"]}</h5>
+                    <h5 class="mb-1 fw-bold">{pub.title}</h5>
                     <div class="muted mb-2">
                         {authors_html}
                     </div>
                     {venue_html}
                     {meta_links_html}
                 </div>
-            </article>''')
-        
-        seq_num += 1
-
-# Write HTML to file
-with open("publications_html_new.txt", "w", encoding='utf-8') as f:
-    f.write("\n".join(html_parts))
-
-print(f"\n{'='*60}")
-print(f"Summary: {downloaded} downloaded, {failed} failed, {seq_num-1} total publications")
-print(f"HTML saved to publications_html_new.txt")
-print(f"{'='*60}")
-
-# Now update index.html
-print("\nUpdating index.html...")
-with open('index.html', 'r', encoding='utf-8') as f:
-    html_content = f.read()
-
-# Find and replace publications section
-pattern = r'(<div class="d-grid gap-3">\s*)(.*?)(\s*</div>\s*</section>\s*<!-- LAB MEMBERS)'
-match = re.search(pattern, html_content, re.DOTALL)
-
-if match:
-    new_section = match.group(1) + "\n".join(html_parts) + match.group(3)
-    html_content = html_content[:match.start()] + new_section + html_content[match.end():]
-    
-    with open('index.html', 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    print("✓ Successfully updated index.html")
-else:
-    print("✗ Could not find publications section boundaries")
+            </article>'''
+
+def render_stream(records, year_counts, images_dir, download=True):
+    """Render records as they arrive (input order); returns (html_parts, stats).
+
+    year_counts ({year: n}) fixes each year's position and sequence numbers
+    up front, so records can be fetched and rendered the moment they are read
+    while the output still comes out newest year first.
+    """
+    years = sorted(year_counts, reverse=True)
+    next_seq = sequence_starts(year_counts)
+
+    sections = {year: [year_heading(year)] for year in years}
+    stats = {"downloaded": 0, "failed": 0, "total": 0}
+
+    for pub in records:
+        sections[pub.year].append(render_article(pub, next_seq[pub.year], images_dir, stats, download))
+        next_seq[pub.year] += 1
+        stats["total"] += 1
+
+    html_parts = [part for year in years for part in sections[year]]
+    return html_parts, stats
+
+def render_publications(data, images_dir, download=True):
+    """Render the publications section; returns (html_parts, stats)."""
+    year_counts = {year: len(pubs) for year, pubs in data.items()}
+    return render_stream(records_from_data(data), year_counts, images_dir, download)
+
+def splice_publications(html_content, html_parts):
+    """Replace the publications section of index.html; returns None if not found."""
+    # Find and replace publications section
+    pattern = r'(<div class="d-grid gap-3">\s*)(.*?)(\s*</div>\s*</section>\s*<!-- LAB MEMBERS)'
+    match = re.search(pattern, html_content, re.DOTALL)
+    if not match:
+        return None
+
+    # Drop the captured indentation so repeated runs produce identical output
+    new_section = match.group(1).rstrip() + "\n" + "\n".join(html_parts) + match.group(3)
+    return html_content[:match.start()] + new_section + html_content[match.end():]
+
+def plan_images(entries, previous, images_dir):
+    """Thumbnails from the last build that can be reused, possibly under a new position.
+
+    Returns (renames {old: new}, stale paths). A thumbnail is reused when its
+    publication still has the same image link (and, without one, the same
+    PDF-derived thumbnail); everything else matching pub_* is stale.
+    """
+    keep = set()
+    renames = {}
+    for pub_id, entry in entries.items():
+        old = previous.get(pub_id)
+        if old is None or not old.get("image") or old["fields"]["image_icon_link"] != entry["fields"]["image_icon_link"]:
+            continue
+        if old.get("pdf_thumbnail") != entry.get("pdf_thumbnail"):
+            continue
+        if not (images_dir / old["image"]).exists():
+            continue
+        new = f"pub_{entry['year']}_{entry['seq']}{Path(old['image']).suffix}"
+        if new == old["image"]:
+            keep.add(new)
+        else:
+            renames[old["image"]] = new
+    stale = [path for path in images_dir.glob("pub_*") if path.name not in keep and path.name not in renames]
+    return renames, stale
+
+def apply_image_plan(renames, stale, images_dir):
+    for path in stale:
+        path.unlink()
+    # Two steps so a thumbnail never lands on one that has not moved yet
+    staged = []
+    for old, new in renames.items():
+        moving = images_dir / f".{old}.moving"
+        os.replace(images_dir / old, moving)
+        staged.append((moving, images_dir / new))
+    for moving, target in staged:
+        os.replace(moving, target)
+
+def build(json_path, dry_run=False, recheck=False):
+    """Download images, write publications_html_new.txt and update index.html.
+
+    Only publications that changed since the last build (see
+    publication_changes.py) are fetched and rendered; the rest reuse their
+    thumbnail and the HTML recorded in the build snapshot. Thumbnail URLs
+    that failed recently (see url_failures.py) are skipped unless recheck.
+    Publications without an icon link get a thumbnail from their local PDF
+    (see pdf_thumbnails.py).
+
+    Returns True when the build is complete: every thumbnail was downloaded
+    and the publications section of index.html was found.
+    """
+    # Cheap streaming pass first: validates the input (schema and links),
+    # fixes the year order and hashes every record (with canonical links)
+    # before anything is deleted or fetched
+    pdfs = []  # per record in input order: its local PDF when it has no icon link
+
+    def note_pdfs(pairs):
+        for year, pub in pairs:
+            pdfs.append(None if pub.get("image_icon_link") else local_pdf([pub.get("paper_link"), pub.get("preprint_link")]))
+            yield year, pub
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        entries, year_counts = scan_checked(f, note_pdfs)
+
+    # Thumbnails from local PDFs: cached by PDF hash, new PDFs in a process pool
+    found = ensure_thumbnails(pdf for pdf in pdfs if pdf)
+    pdf_thumbnails = []
+    for entry, pdf in zip(entries.values(), pdfs):
+        digest, thumbnail = found.get(pdf, (None, None))
+        entry["pdf_thumbnail"] = digest if thumbnail else None
+        pdf_thumbnails.append(thumbnail)
+
+    snapshot = load_snapshot()
+    previous = snapshot["records"]
+    changes = diff_snapshots(previous, entries)
+    print("Changes since the last build:")
+    print_changes(changes)
+
+    # Cached HTML is only valid for the renderer (and member list) that produced it
+    renderer = inputs_digest(*RENDER_INPUTS)
+    reuse_html = snapshot.get("renderer") == renderer
+
+    starts = sequence_starts(year_counts)
+    for entry in entries.values():
+        entry["seq"] = starts[entry["year"]] + entry.pop("index")
+
+    images_dir = Path("images/publications")
+    renames, stale = plan_images(entries, previous, images_dir) if images_dir.exists() else ({}, [])
+    if not dry_run:
+        images_dir.mkdir(parents=True, exist_ok=True)
+        apply_image_plan(renames, stale, images_dir)
+        if renames or stale:
+            print(f"✓ Renumbered {len(renames)} thumbnails, deleted {len(stale)} stale ones")
+
+    # Second pass: render what changed, reuse the rest
+    sections = {year: [year_heading(year)] for year in sorted(year_counts, reverse=True)}
+    stats = {"downloaded": 0, "failed": 0, "skipped": 0, "from_pdf": 0, "total": 0, "rendered": 0}
+    failures = FailureCache(recheck=recheck)
+    registry = Registry()
+    authors = {}
+    with open(json_path, 'r', encoding='utf-8') as f:
+        # entries is in input order, so it lines up with the stream
+        for (year, pub), (pub_id, entry), pdf_thumbnail in zip(checked_pairs(iter_publications(f), []), entries.items(), pdf_thumbnails):
+            stats["total"] += 1
+            authors[pub_id] = pub.get("authors") or []
+            old = previous.get(pub_id)
+            if (reuse_html and old is not None and pub_id not in changes["modified"]
+                    and old["seq"] == entry["seq"] and old.get("html")
+                    and old.get("pdf_thumbnail") == entry["pdf_thumbnail"]
+                    and (not old.get("image") or dry_run or (images_dir / old["image"]).exists())):
+                entry["image"], entry["html"] = old.get("image"), old["html"]
+            else:
+                record = Publication.from_dict(pub, year, registry)
+                entry["html"] = render_article(record, entry["seq"], images_dir, stats, download=not dry_run,
+                                               failures=failures, pdf_thumbnail=pdf_thumbnail)
+                image_source = record.image_icon_link or (pdf_thumbnail and pdf_thumbnail.name)
+                entry["image"] = image_filename(image_source, year, entry["seq"]) if image_source else None
+                stats["rendered"] += 1
+            sections[year].append(entry["html"])
+    html_parts = [part for parts in sections.values() for part in parts]
+    failures.save()
+
+    # Write HTML to file
+    if not dry_run:
+        with atomic_open("publications_html_new.txt") as out:
+            for i, part in enumerate(html_parts):
+                out.write(part if i == 0 else "\n" + part)
+
+    print(f"\n{'='*60}")
+    print(f"Summary: {stats['downloaded']} downloaded, {stats['failed']} failed "
+          f"({stats['skipped']} known dead, skipped), {stats['from_pdf']} from PDFs, "
+          f"{stats['rendered']} rendered, {stats['total']} total publications")
+    if not dry_run:
+        print(f"HTML saved to publications_html_new.txt")
+    print(f"{'='*60}")
+
+    # Now update index.html
+    print("\nUpdating index.html...")
+    with open('index.html', 'r', encoding='utf-8') as f:
+        html_content = f.read()
+
+    html_content = splice_publications(html_content, html_parts)
+    spliced = html_content is not None
+    if spliced:
+        if write_html('index.html', html_content, dry_run):
+            print("✓ Successfully updated index.html")
+    else:
+        print("✗ Could not find publications section boundaries")
+
+    if not dry_run:
+        # Page order is the sequence order
+        page_order = sorted(entries, key=lambda pub_id: entries[pub_id]["seq"])
+        author_index = write_author_index((pub_id, authors[pub_id]) for pub_id in page_order)
+        print(f"✓ Indexed {len(author_index['authors'])} authors in {AUTHOR_INDEX_PATH.name}")
+        save_snapshot({"renderer": renderer, "records": entries})
+    return spliced and not stats["failed"]
+
+def main():
+    # --dry-run: compute the page in memory and report what would change
+    dry_run = pop_dry_run_flag()
+    # --recheck-failed: retry thumbnail URLs that failed recently
+    recheck = pop_recheck_flag()
+
+    # Read JSON; stdin is spooled to a temp file so it can be streamed twice
+    spooled = None
+    if len(sys.argv) > 1:
+        json_path = Path(sys.argv[1])
+    else:
+        spooled = tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix=".json", delete=False)
+        with spooled:
+            shutil.copyfileobj(sys.stdin, spooled)
+        json_path = Path(spooled.name)
+
+    try:
+        # Overlapping runs queue here; a run that waited can reuse the result
+        # of the one it waited for when both were given the same input
+        with build_lock():
+            digest = inputs_digest(json_path, *RENDER_INPUTS, files_signature())
+            if not dry_run and not recheck and build_is_current(digest):
+                print("✓ index.html is already built from this input, nothing to do")
+                return
+
+            complete = build(json_path, dry_run, recheck)
+            # An incomplete build is not recorded, so the next run retries the
+            # missing thumbnails (once their failure-cache entries expire)
+            if complete and not dry_run:
+                record_build(digest, ["index.html", "publications_html_new.txt", AUTHOR_INDEX_PATH.name])
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not read publications: {e}")
+        print("Usage: python3 process_publications.py <json_file>")
+        print("   OR: cat publications.json | python3 process_publications.py")
+        sys.exit(1)
+    finally:
+        if spooled is not None:
+            os.unlink(spooled.name)
+
+if __name__ == "__main__":
+    main()
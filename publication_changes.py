@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Change sets between publication snapshots.
+
+A snapshot maps each publication's stable id to a hash of every content
+field. Comparing the incoming JSON with the snapshot of the last build gives
+the publications that were added, removed or modified (and which fields
+changed), so the build only fetches and renders what an edit touched.
+Usage: python3 publication_changes.py [json_file]   # changes since the last build
+"""
+
+import hashlib
+import json
+import pickle
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+from publication_store import (
+    CACHE_DIR,
+    CANONICAL_PATH,
+    OPTIONAL_FIELDS,
+    REQUIRED_FIELDS,
+    SchemaError,
+    checked_pairs,
+    derive_id,
+)
+from stream_publications import iter_publications
+
+SNAPSHOT_PATH = CACHE_DIR / "build-snapshot.pickle"
+SNAPSHOT_VERSION = 1
+
+# Everything that can change what a publication looks like on the page
+HASHED_FIELDS = ["year"] + list(REQUIRED_FIELDS) + [f for f in OPTIONAL_FIELDS if f != "id"]
+
+def _digest(value):
+    encoded = json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+def field_hashes(pub, year):
+    """{field: hash} for every content field; missing, null and "" hash alike."""
+    values = dict(pub, year=year)
+    return {field: _digest(values.get(field) or "") for field in HASHED_FIELDS}
+
+def scan(pairs):
+    """Hash streamed (year, pub) pairs; returns ({id: entry}, {year: count}) in input order.
+
+    Each entry holds the year, the position within the year and the field
+    hashes. Publications without an id get the one the store would derive.
+    """
+    entries = {}
+    year_counts = {}
+    for year, pub in pairs:
+        base = pub.get("id") or derive_id(pub, year)
+        pub_id, n = base, 2
+        while pub_id in entries:
+            pub_id, n = f"{base}-{n}", n + 1
+        index = year_counts.get(year, 0)
+        year_counts[year] = index + 1
+        entries[pub_id] = {"year": year, "index": index, "fields": field_hashes(pub, year)}
+    return entries, year_counts
+
+def scan_checked(fp, tap=None):
+    """scan() a publication JSON file as the build sees it: validated, with canonical links.
+
+    tap, if given, wraps the checked (year, pub) stream on its way to scan().
+    Raises SchemaError after the whole file has been read if anything is malformed.
+    """
+    problems = []
+    pairs = checked_pairs(iter_publications(fp), problems)
+    result = scan(tap(pairs) if tap else pairs)
+    if problems:
+        raise SchemaError(problems)
+    return result
+
+def diff_snapshots(old, new):
+    """Change set between two {id: entry} snapshots."""
+    changes = {"added": [], "removed": [], "modified": {}, "unchanged": 0}
+    for pub_id, entry in new.items():
+        previous = old.get(pub_id)
+        if previous is None:
+            changes["added"].append(pub_id)
+            continue
+        fields = [field for field, digest in entry["fields"].items() if previous["fields"].get(field) != digest]
+        if fields:
+            changes["modified"][pub_id] = fields
+        else:
+            changes["unchanged"] += 1
+    changes["removed"] = [pub_id for pub_id in old if pub_id not in new]
+    return changes
+
+def is_empty(changes):
+    return not (changes["added"] or changes["removed"] or changes["modified"])
+
+def print_changes(changes, limit=20):
+    """Summarize a change set the way print_diff summarizes page changes."""
+    if is_empty(changes):
+        print(f"  No publication changes ({changes['unchanged']} unchanged)")
+        return
+    print(f"  {len(changes['added'])} added, {len(changes['removed'])} removed, "
+          f"{len(changes['modified'])} modified, {changes['unchanged']} unchanged")
+    lines = [f"  + {pub_id}" for pub_id in changes["added"]]
+    lines += [f"  - {pub_id}" for pub_id in changes["removed"]]
+    lines += [f"  ~ {pub_id} ({', '.join(fields)})" for pub_id, fields in changes["modified"].items()]
+    for line in lines[:limit]:
+        print(line)
+    if len(lines) > limit:
+        print(f"  ... and {len(lines) - limit} more")
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """The snapshot recorded by the last build, or an empty one."""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        snapshot = None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return {"version": SNAPSHOT_VERSION, "records": {}}
+    return snapshot
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    snapshot = dict(snapshot, version=SNAPSHOT_VERSION)
+    Path(path).parent.mkdir(exist_ok=True)
+    atomic_write(path, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else CANONICAL_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries, _ = scan_checked(f)
+    except SchemaError as e:
+        print(f"✗ {path.name}: {e}")
+        sys.exit(1)
+    previous = load_snapshot()["records"]
+    if not previous:
+        print("⚠ No build snapshot yet; everything counts as added")
+    print(f"Changes in {path.name} since the last build:")
+    print_changes(diff_snapshots(previous, entries))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Compact record types for publications held in memory.
+
+Publication, Author and Venue use __slots__ (no per-instance __dict__) and
+intern repeated strings, and authors/venues are shared through a Registry,
+so a 50k-entry corpus costs a fraction of the equivalent dicts and render
+loops read attributes instead of calling pub.get(...) repeatedly.
+Usage: python3 publication_model.py [json_file]   # prints memory comparison
+"""
+
+import sys
+
+# Link fields in the order they are rendered
+LINK_FIELDS = ("paper_link", "preprint_link", "code_link", "project_link")
+
+class Author:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = sys.intern(name)
+
+    def __repr__(self):
+        return f"Author({self.name!r})"
+
+    def __str__(self):
+        return self.name
+
+class Venue:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = sys.intern(name)
+
+    def __repr__(self):
+        return f"Venue({self.name!r})"
+
+    def __str__(self):
+        return self.name
+
+class Registry:
+    """Hands out one shared Author/Venue object per distinct name."""
+
+    __slots__ = ("authors", "venues")
+
+    def __init__(self):
+        self.authors = {}
+        self.venues = {}
+
+    def author(self, name):
+        author = self.authors.get(name)
+        if author is None:
+            author = self.authors[name] = Author(name)
+        return author
+
+    def venue(self, name):
+        if not name:
+            return None
+        venue = self.venues.get(name)
+        if venue is None:
+            venue = self.venues[name] = Venue(name)
+        return venue
+
+class Publication:
+    __slots__ = ("id", "year", "title", "authors", "venue", "paper_link", "preprint_link",
+                 "code_link", "project_link", "image_icon_link", "bibtex")
+
+    def __init__(self, id, year, title, authors, venue=None, paper_link="", preprint_link="",
+                 code_link="", project_link="", image_icon_link="", bibtex=""):
+        self.id = id
+        self.year = sys.intern(str(year))
+        self.title = title
+        self.authors = tuple(authors)
+        self.venue = venue
+        # Missing links are stored as "" (the JSON mixes null and "")
+        self.paper_link = paper_link or ""
+        self.preprint_link = preprint_link or ""
+        self.code_link = code_link or ""
+        self.project_link = project_link or ""
+        self.image_icon_link = image_icon_link or ""
+        self.bibtex = bibtex or ""
+
+    @classmethod
+    def from_dict(cls, pub, year, registry):
+        return cls(
+            id=pub.get("id") or "",
+            year=year,
+            title=pub["title"],
+            authors=[registry.author(name) for name in pub.get("authors") or ()],
+            venue=registry.venue(pub.get("venue")),
+            paper_link=pub.get("paper_link"),
+            preprint_link=pub.get("preprint_link"),
+            code_link=pub.get("code_link"),
+            project_link=pub.get("project_link"),
+            image_icon_link=pub.get("image_icon_link"),
+            bibtex=pub.get("bibtex"),
+        )
+
+    def to_dict(self):
+        """Inverse of from_dict, in the JSON store's field order."""
+        pub = {"id": self.id, "title": self.title, "authors": [a.name for a in self.authors]}
+        for field in ("paper_link", "code_link", "preprint_link", "project_link", "image_icon_link", "bibtex"):
+            value = getattr(self, field)
+            if value:
+                pub[field] = value
+        if self.venue is not None:
+            pub["venue"] = self.venue.name
+        return pub
+
+    @property
+    def author_names(self):
+        return [a.name for a in self.authors]
+
+    @property
+    def venue_name(self):
+        return self.venue.name if self.venue is not None else ""
+
+    def links(self):
+        """(field, url) for every non-empty link, in render order."""
+        return [(field, getattr(self, field)) for field in LINK_FIELDS if getattr(self, field)]
+
+    def __repr__(self):
+        return f"Publication({self.id!r}, {self.title[:40]!r})"
+
+def records_from_data(data, registry=None):
+    """Convert store data (year -> list of dicts) to Publications, newest year first."""
+    registry = registry or Registry()
+    return [Publication.from_dict(pub, year, registry)
+            for year in sorted(data, reverse=True)
+            for pub in data[year]]
+
+def group_by_year(records):
+    """year -> list of Publications, preserving order."""
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record.year, []).append(record)
+    return grouped
+
+def _deep_size(obj, seen=None):
+    """Approximate retained size of obj in bytes (shared objects counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_size(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+def main():
+    import json
+    from publication_store import CANONICAL_PATH, load_publications
+
+    path = sys.argv[1] if len(sys.argv) > 1 else CANONICAL_PATH
+    if path == CANONICAL_PATH:
+        data = load_publications()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    registry = Registry()
+    records = records_from_data(data, registry)
+    dict_size = _deep_size(data)
+    record_size = _deep_size(records)
+    print(f"{len(records)} publications, {len(registry.authors)} distinct authors, {len(registry.venues)} venues")
+    print(f"  dicts:   {dict_size / 1024:.0f} KB")
+    print(f"  records: {record_size / 1024:.0f} KB ({record_size / dict_size:.0%})")
+
+if __name__ == "__main__":
+    main()
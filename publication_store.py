@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Canonical publication store: publications_complete.json plus a compiled cache.
+
+The JSON (year -> list of publications) is the single source of truth. Every
+publication carries a stable "id"; the store validates the schema (links
+included) on load, hands out links in canonical form, and keeps a pickled
+copy in .cache/ that is rebuilt only when the JSON's mtime/size and content
+hash change, so every tool loads the same data fast.
+
+Usage:
+    python3 publication_store.py check          # validate and (re)build the cache
+    python3 publication_store.py assign-ids     # persist ids into the JSON
+    python3 publication_store.py canonicalize   # persist canonical URLs into the JSON
+    python3 publication_store.py compare        # report how the other copies diverge
+"""
+
+import hashlib
+import json
+import pickle
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+from build_output import atomic_write
+from canonical_urls import canonical_url, url_problem
+
+BASE_DIR = Path(__file__).parent
+CANONICAL_PATH = BASE_DIR / "publications_complete.json"
+CACHE_DIR = BASE_DIR / ".cache"
+CACHE_VERSION = 2
+
+# Older copies of the bibliography; compare() reports how they differ
+LEGACY_COPIES = [
+    "publications_data.json",
+    "publications_full.json",
+    "publications_new.json",
+    "publications_user_data.json",
+]
+
+REQUIRED_FIELDS = {"title": str, "authors": list}
+OPTIONAL_FIELDS = ["id", "venue", "paper_link", "preprint_link", "code_link",
+                   "project_link", "image_icon_link", "bibtex"]
+LINK_FIELDS = ["paper_link", "preprint_link", "code_link", "project_link", "image_icon_link"]
+ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+
+class SchemaError(ValueError):
+    """Raised when the publication JSON does not match the expected schema."""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__(f"{len(problems)} schema problem(s):\n  " + "\n  ".join(problems))
+
+def slugify(text, max_length=60):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r'<[^>]+>|\\[a-zA-Z]+', ' ', text)
+    slug = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+    return slug[:max_length].rstrip('-')
+
+def derive_id(pub, year):
+    """Readable id from year and title, e.g. 2024-medsyn-text-guided-anatomy-aware..."""
+    return f"{year}-{slugify(pub.get('title') or 'untitled')}"
+
+def publication_problems(pub, where):
+    """Schema problems of a single publication (uniqueness of ids is checked by validate)."""
+    if not isinstance(pub, dict):
+        return [f"{where}: must be an object"]
+    problems = []
+    for field, expected in REQUIRED_FIELDS.items():
+        if not isinstance(pub.get(field), expected) or not pub.get(field):
+            problems.append(f"{where}: '{field}' must be a non-empty {expected.__name__}")
+    if isinstance(pub.get("authors"), list) and not all(isinstance(a, str) and a.strip() for a in pub["authors"]):
+        problems.append(f"{where}: 'authors' must contain only non-empty strings")
+    for field in OPTIONAL_FIELDS:
+        value = pub.get(field)
+        if value is not None and not isinstance(value, str):
+            problems.append(f"{where}: '{field}' must be a string or null")
+        elif field in LINK_FIELDS and value:
+            problem = url_problem(value)
+            if problem:
+                problems.append(f"{where}: '{field}' {problem}")
+    unknown = set(pub) - set(REQUIRED_FIELDS) - set(OPTIONAL_FIELDS)
+    if unknown:
+        problems.append(f"{where}: unknown field(s) {', '.join(sorted(unknown))}")
+    pub_id = pub.get("id")
+    if isinstance(pub_id, str) and not ID_PATTERN.match(pub_id):
+        problems.append(f"{where}: id {pub_id!r} must be lowercase letters, digits and dashes")
+    return problems
+
+def validate(data):
+    """Return a list of schema problems (empty when data is valid)."""
+    problems = []
+    if not isinstance(data, dict):
+        return ["top level must be an object mapping year -> list of publications"]
+
+    seen_ids = {}
+    for year, pubs in data.items():
+        if not re.fullmatch(r'\d{4}', str(year)):
+            problems.append(f"{year!r}: year keys must be four digits")
+        if not isinstance(pubs, list):
+            problems.append(f"{year}: must be a list of publications")
+            continue
+        for idx, pub in enumerate(pubs, 1):
+            where = f"{year}[{idx}]"
+            problems.extend(publication_problems(pub, where))
+            pub_id = pub.get("id") if isinstance(pub, dict) else None
+            if isinstance(pub_id, str) and ID_PATTERN.match(pub_id):
+                if pub_id in seen_ids:
+                    problems.append(f"{where}: id {pub_id!r} already used by {seen_ids[pub_id]}")
+                else:
+                    seen_ids[pub_id] = where
+    return problems
+
+def canonical_publication(pub):
+    """pub with every link in canonical form (see canonical_urls.py); other fields untouched."""
+    if not any(pub.get(field) for field in LINK_FIELDS):
+        return pub
+    canonical = dict(pub)
+    for field in LINK_FIELDS:
+        if canonical.get(field):
+            canonical[field] = canonical_url(canonical[field])
+    return canonical
+
+def checked_pairs(pairs, problems):
+    """Validate and canonicalize streamed (year, pub) pairs, collecting problems as they go.
+
+    Lets a streaming reader reject bad input in its first pass, before any
+    network work, without loading the whole file.
+    """
+    positions = {}
+    for year, pub in pairs:
+        positions[year] = positions.get(year, 0) + 1
+        where = f"{year}[{positions[year]}]"
+        if positions[year] == 1 and not re.fullmatch(r'\d{4}', str(year)):
+            problems.append(f"{year!r}: year keys must be four digits")
+        found = publication_problems(pub, where)
+        if found:
+            problems.extend(found)
+            yield year, pub
+        else:
+            yield year, canonical_publication(pub)
+
+def unique_id(base, taken):
+    """base, or base-2, base-3... whichever is not in taken."""
+    candidate, n = base, 2
+    while candidate in taken:
+        candidate, n = f"{base}-{n}", n + 1
+    return candidate
+
+def assign_ids(data):
+    """Give every publication without an id a unique derived one; returns how many were added."""
+    taken = {pub["id"] for pubs in data.values() for pub in pubs if pub.get("id")}
+    added = 0
+    for year in sorted(data, reverse=True):
+        for pub in data[year]:
+            if pub.get("id"):
+                continue
+            candidate = unique_id(derive_id(pub, year), taken)
+            # Put the id first so it reads as the record's key in the JSON
+            fields = list(pub.items())
+            pub.clear()
+            pub["id"] = candidate
+            pub.update(fields)
+            taken.add(candidate)
+            added += 1
+    return added
+
+def carry_ids(pairs, existing, problems):
+    """Give streamed (year, pub) pairs without an id the one they have in existing store data.
+
+    A publication matches a stored one by derived id (year and title), or by
+    title alone when it moved year; one that matches nothing gets a new
+    unique derived id. Re-saving a pasted export (which has no ids) thus
+    keeps the ids the snapshots and the page are keyed by. Ids used twice
+    are added to problems.
+    """
+    by_derived = {}
+    by_title = {}
+    for year, pub in iter_publications(existing):
+        by_derived[derive_id(pub, year)] = pub["id"]
+        by_title.setdefault(slugify(pub.get("title") or ""), []).append(pub["id"])
+    taken = set(by_derived.values())
+    seen = {}
+    positions = {}
+    for year, pub in pairs:
+        positions[year] = positions.get(year, 0) + 1
+        where = f"{year}[{positions[year]}]"
+        if isinstance(pub, dict) and not pub.get("id"):
+            pub_id = by_derived.get(derive_id(pub, year))
+            if pub_id is None or pub_id in seen:
+                titled = [i for i in by_title.get(slugify(pub.get("title") or ""), []) if i not in seen]
+                pub_id = titled[0] if len(titled) == 1 else None
+            if pub_id is None or pub_id in seen:
+                pub_id = unique_id(derive_id(pub, year), taken | set(seen))
+            pub = {"id": pub_id, **pub}
+        pub_id = pub.get("id") if isinstance(pub, dict) else None
+        if isinstance(pub_id, str):
+            if pub_id in seen:
+                problems.append(f"{where}: id {pub_id!r} already used by {seen[pub_id]}")
+            else:
+                seen[pub_id] = where
+        yield year, pub
+
+def iter_publications(data):
+    """Yield (year, publication) newest year first, in file order within a year."""
+    for year in sorted(data, reverse=True):
+        for pub in data[year]:
+            yield year, pub
+
+def _cache_path(source):
+    key = hashlib.sha256(str(Path(source).resolve()).encode()).hexdigest()[:16]
+    return CACHE_DIR / f"publications-{key}.pickle"
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    return cache if isinstance(cache, dict) and cache.get("version") == CACHE_VERSION else None
+
+def load_publications(path=CANONICAL_PATH, use_cache=True):
+    """Load, validate and id-stamp the publication JSON; served from cache when unchanged."""
+    path = Path(path)
+    stat = path.stat()
+    cache_path = _cache_path(path)
+    cache = _read_cache(cache_path) if use_cache else None
+
+    # Fast path: same mtime and size as when the cache was built
+    if cache and cache["mtime_ns"] == stat.st_mtime_ns and cache["size"] == stat.st_size:
+        return cache["data"]
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cache and cache["sha256"] == digest:
+        # Touched but not modified: refresh the stat fields only
+        data = cache["data"]
+    else:
+        data = json.loads(raw.decode('utf-8'))
+        problems = validate(data)
+        if problems:
+            raise SchemaError(problems)
+        for year in data:
+            data[year] = [canonical_publication(pub) for pub in data[year]]
+        assign_ids(data)
+
+    if use_cache:
+        CACHE_DIR.mkdir(exist_ok=True)
+        atomic_write(cache_path, pickle.dumps({
+            "version": CACHE_VERSION,
+            "source": str(path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "data": data,
+        }, protocol=pickle.HIGHEST_PROTOCOL))
+    return data
+
+def save_publications(data, path=CANONICAL_PATH):
+    """Validate and write the store (same layout as the hand-edited JSON)."""
+    problems = validate(data)
+    if problems:
+        raise SchemaError(problems)
+    atomic_write(path, json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+
+def publication_index(data):
+    """Map id -> (year, publication)."""
+    return {pub["id"]: (year, pub) for year, pub in iter_publications(data)}
+
+def compare(canonical, other):
+    """Differences between the canonical store and another copy, matched by derived id."""
+    canonical_by_id = {derive_id(pub, year): pub for year, pub in iter_publications(canonical)}
+    report = []
+    for year, pub in iter_publications(other):
+        pub_id = derive_id(pub, year)
+        match = canonical_by_id.get(pub_id)
+        if match is None:
+            report.append(f"  only here: {pub_id}")
+            continue
+        for field in sorted(set(pub) | set(match)):
+            if field != "id" and (pub.get(field) or "") != (match.get(field) or ""):
+                report.append(f"  {pub_id}: '{field}' differs")
+    return report
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    path = Path(sys.argv[2]) if len(sys.argv) > 2 else CANONICAL_PATH
+
+    if command == "check":
+        try:
+            data = load_publications(path)
+        except SchemaError as e:
+            print(f"✗ {path.name}: {e}")
+            sys.exit(1)
+        total = sum(len(pubs) for pubs in data.values())
+        print(f"✓ {path.name}: {total} publications across {len(data)} years, schema OK")
+    elif command == "assign-ids":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        added = assign_ids(data)
+        save_publications(data, path)
+        print(f"✓ Assigned {added} new ids in {path.name}")
+    elif command == "canonicalize":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        problems = validate(data)
+        if problems:
+            print(f"✗ {path.name}: {SchemaError(problems)}")
+            sys.exit(1)
+        changed = 0
+        for year in data:
+            canonical = [canonical_publication(pub) for pub in data[year]]
+            changed += sum(1 for old, new in zip(data[year], canonical) if old != new)
+            data[year] = canonical
+        save_publications(data, path)
+        print(f"✓ Canonicalized links in {changed} publications in {path.name}")
+    elif command == "compare":
+        canonical = load_publications(path)
+        for name in LEGACY_COPIES:
+            other_path = BASE_DIR / name
+            if not other_path.exists():
+                continue
+            with open(other_path, 'r', encoding='utf-8') as f:
+                report = compare(canonical, json.load(f))
+            print(f"{name}: {'identical to the canonical store' if not report else f'{len(report)} difference(s)'}")
+            for line in report:
+                print(line)
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import urllib.request
 import base64
 from pathlib import Path
 
+from lab_members import default_matcher
+
 def download_image(url, filename):
     """Download image from URL exactly as provided"""
     if not url or url == "":
@@ -24,13 +26,8 @@ def download_image(url, filename):
     return False
 
 def format_authors(authors_list):
-    formatted = []
-    for author in authors_list:
-        if "Kayhan" in author or "Batmanghelich" in author:
-            formatted.append(f"<b>{author}</b>")
-        else:
-            formatted.append(author)
-    return ", ".join(formatted)
+    # Lab members (lab_members.json) in bold
+    return default_matcher().highlight(authors_list)
 
 # Read JSON from file (user will provide full JSON)
 import sys
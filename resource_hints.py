@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Add loading hints to the built pages, from where each resource sits.
+
+For each page:
+
+  - the first FIRST_VIEW_IMAGES images (the navigation logo and the
+    headshot on index.html) get fetchpriority="high" and a
+    <link rel="preload"> in <head>, so they are requested before the
+    stylesheets and scripts ahead of them have been parsed;
+  - the fonts the page's own @font-face rules load for Latin text (the
+    self-hosted Inter subset and the icon font, see self_host_fonts.py) are
+    preloaded, instead of being discovered only once the CSS has been
+    applied;
+  - images outside the above-the-fold sections (critical_css.ABOVE_THE_FOLD;
+    the news, publication thumbnails and the rest) get loading="lazy",
+    decoding="async" and fetchpriority="low", so the long tail of thumbnails
+    no longer competes with what is on screen.
+
+Attributes already set in the source are kept. The hints use the plain file
+names; fingerprinting later rewrites them to the hashed ones like any other
+reference.
+
+Usage: python3 resource_hints.py [--out dist]
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+from check_links import TAG_PATTERN
+from critical_css import ABOVE_THE_FOLD
+from page_weight import INLINE_STYLE, attributes, section_spans, stylesheet_fonts
+
+FIRST_VIEW_IMAGES = 2
+DEFERRED_ATTRIBUTES = {"loading": "lazy", "decoding": "async", "fetchpriority": "low"}
+FONT_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".ttf": "font/ttf", ".otf": "font/otf"}
+PRELOAD_LINK = re.compile(r'<link\b[^>]*rel=["\']preload["\'][^>]*>', re.IGNORECASE)
+
+def add_attributes(tag, values):
+    """tag with the attributes in values that it does not set already."""
+    present = attributes(tag)
+    extra = "".join(f' {name}="{value}"' for name, value in values.items() if name not in present)
+    end = len(tag) - 2 if tag.endswith("/>") else len(tag) - 1
+    return tag[:end].rstrip() + extra + tag[end:]
+
+def preload_link(url, kind, high=False):
+    if kind == "font":
+        suffix = Path(url.split("?")[0]).suffix.lower()
+        font_type = f' type="{FONT_TYPES[suffix]}"' if suffix in FONT_TYPES else ""
+        return f'<link rel="preload" href="{url}" as="font"{font_type} crossorigin>'
+    priority = ' fetchpriority="high"' if high else ""
+    return f'<link rel="preload" href="{url}" as="{kind}"{priority}>'
+
+def preloaded(page):
+    """URLs preloaded in the page's <head>, in document order."""
+    head_end = page.lower().find("</head>")
+    head = page[:head_end] if head_end >= 0 else page
+    return [attributes(tag)["href"] for tag in PRELOAD_LINK.findall(head) if attributes(tag).get("href")]
+
+def add_hints(page):
+    """(page with hints, images prioritized, images deferred, fonts preloaded)."""
+    head_end = page.lower().find("</head>")
+    if head_end < 0:
+        return page, [], 0, []
+    spans = section_spans(page)
+    first_view = []
+    deferred = 0
+
+    def image(match):
+        nonlocal deferred
+        tag = match.group(0)
+        if not re.match(r'<img\b', tag, re.IGNORECASE) or match.start() < head_end:
+            return tag
+        attrs = attributes(tag)
+        section = next((section_id for start, end, section_id in spans if start <= match.start() < end), None)
+        if len(first_view) < FIRST_VIEW_IMAGES and attrs.get("loading", "").lower() != "lazy":
+            if attrs.get("src") and not attrs.get("srcset"):
+                first_view.append(attrs["src"])
+            return add_attributes(tag, {"fetchpriority": "high"})
+        if section is not None and section not in ABOVE_THE_FOLD:
+            deferred += 1
+            return add_attributes(tag, DEFERRED_ATTRIBUTES)
+        return tag
+
+    page = TAG_PATTERN.sub(image, page)
+    head = page[:page.lower().find("</head>")]
+    fonts = [url for css in INLINE_STYLE.findall(head) for url in stylesheet_fonts(css, "")]
+    existing = set(preloaded(page))
+    links = [preload_link(url, "font") for url in fonts if url not in existing]
+    links += [preload_link(url, "image", high=True) for url in first_view if url not in existing]
+    if links:
+        # Right after the charset and viewport <meta>s, ahead of every stylesheet
+        anchor = page.lower().find("<link")
+        at = anchor if 0 <= anchor < len(head) else len(head)
+        page = page[:at] + "\n    ".join(links) + "\n    " + page[at:]
+    return page, first_view, deferred, fonts
+
+def hint_site(out_dir):
+    """Add hints to every page in out_dir; returns {page name: (prioritized, deferred, fonts)}."""
+    results = {}
+    for page_path in sorted(Path(out_dir).glob("*.html")):
+        page = page_path.read_text(encoding='utf-8')
+        hinted, first_view, deferred, fonts = add_hints(page)
+        if hinted != page:
+            atomic_write(page_path, hinted)
+        results[page_path.name] = (first_view, deferred, fonts)
+    return results
+
+def print_results(results):
+    for page, (first_view, deferred, fonts) in results.items():
+        print(f"  {page}: preloaded {', '.join(first_view + fonts) or 'nothing'}; "
+              f"{deferred} images below the fold lazy-loaded at low priority")
+
+def main():
+    parser = argparse.ArgumentParser(description="Add preload and priority hints to the built site.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    args = parser.parse_args()
+    if not Path(args.out).is_dir():
+        print(f"✗ {args.out} not found (run python3 build_site.py first)")
+        sys.exit(1)
+    print_results(hint_site(args.out))
+    print("✓ Done")
+
+if __name__ == "__main__":
+    main()
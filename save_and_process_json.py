@@ -4,32 +4,30 @@ Save JSON from stdin and process it immediately.
 Usage: paste your JSON and pipe to this script, or provide as file argument.
 """
 
-import json
 import sys
 import subprocess
 
-# Read JSON
-if len(sys.argv) > 1:
-    with open(sys.argv[1], 'r', encoding='utf-8') as f:
-        json_text = f.read()
-else:
-    json_text = sys.stdin.read()
+from publication_store import SchemaError
+from stream_publications import save_store
+
+# Read JSON (streamed straight into the store; a parse or schema error leaves the old file in place)
+source = open(sys.argv[1], 'r', encoding='utf-8') if len(sys.argv) > 1 else sys.stdin
 
 try:
-    data = json.loads(json_text)
-    
-    # Save to file
-    with open('publications_complete.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
+    with source:
+        count, years = save_store(source)
+
     print(f"✓ JSON saved to publications_complete.json")
-    print(f"  Found {sum(len(pubs) for pubs in data.values())} publications across {len(data)} years")
-    
-    # Now process it
+    print(f"  Found {count} publications across {years} years")
+
+    # Now process it (after save_store released the build lock it takes itself)
     print("\nProcessing publications...")
-    result = subprocess.run(['python3', 'process_publications.py', 'publications_complete.json'], 
+    result = subprocess.run(['python3', 'process_publications.py', 'publications_complete.json'],
                           capture_output=False)
-    
-except json.JSONDecodeError as e:
+
+except SchemaError as e:
+    print(f"✗ publications_complete.json not written: {e}")
+    sys.exit(1)
+except ValueError as e:
     print(f"✗ JSON Error: {e}")
     sys.exit(1)
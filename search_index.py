@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Compile the site search index: titles, authors, venues and PDF full text.
+
+Every publication in the store is a document; its full text comes from
+its local PDF in files/ (see pdf_text.py, cached by file hash). The
+inverted index is written to <out>/search/ as static JSON that the page
+loads lazily (js/search.js):
+
+  index.json             documents (id, title, year) and the shard table
+  terms-<key>.<hash>.json  one shard per term prefix, fetched on first use
+
+Terms are grouped into shards by their first letter, or first two letters
+when a letter's shard would exceed MAX_SHARD_BYTES. Shard names carry a
+content hash, so they can be cached for good. Within a shard, terms are
+sorted and front-coded in blocks of BLOCK_SIZE. Each block is a single
+string: the first term in full, then for every following term one
+character for the length of the prefix it shares with the previous term
+(chr(48 + n)) followed by the rest of the term, separated by spaces.
+Postings are flat [doc delta, score, doc delta, score, ...] lists, one per
+term in shard order. Scores add up field weights (title, authors, venue)
+and a damped full-text term frequency. Author and venue words and the year
+are also indexed under a field prefix ("a:ghosh", "v:miccai", "y:2024"),
+which is what queries like author:ghosh or year:2024 look up.
+
+build_site.py also tags each publication <article> in dist/ with its id
+(data-pub-id), so js/publication-filter.js can map results to articles.
+
+Usage:
+    python3 search_index.py [--out dist]            # build <out>/search/
+    python3 search_index.py --query "tensor factorization" [--out dist]
+    python3 search_index.py --query "author:ghosh year:2024"
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import math
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+from build_output import atomic_write
+from fingerprint_assets import IMMUTABLE_CACHE
+from pdf_text import pdf_texts
+from pdf_thumbnails import local_pdf
+from publication_model import records_from_data
+from publication_store import CANONICAL_PATH, load_publications
+
+INDEX_VERSION = 2
+SEARCH_DIR = "search"
+INDEX_NAME = "index.json"
+BLOCK_SIZE = 16
+MAX_SHARD_BYTES = 48 * 1024
+MIN_TERM = 2
+MAX_TERM = 24
+FIELD_WEIGHTS = {"title": 12, "authors": 10, "venue": 6, "year": 1}
+# Query qualifier -> term prefix of the field-only terms
+FIELD_PREFIXES = {"author": "a", "venue": "v", "year": "y"}
+MAX_TEXT_SCORE = 8
+MAX_SCORE = 255
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or that the
+their there these this those to was were which with we our can not also been such than
+then they via using use used between both each more most other some only over under
+""".split())
+
+def normalize(text):
+    """Lowercase ASCII: accents folded, everything else kept for tokenizing."""
+    text = unicodedata.normalize("NFKD", text)
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+def terms(text):
+    """Index terms of text: ASCII words of MIN_TERM..MAX_TERM chars, no stopwords."""
+    for word in re.findall(r'[a-z0-9]+', normalize(text)):
+        if MIN_TERM <= len(word) <= MAX_TERM and word not in STOPWORDS and not (word.isdigit() and len(word) != 4):
+            yield word
+
+def document_scores(pub, text):
+    """{term: score} for one publication."""
+    scores = {}
+    fields = {"title": pub.title, "authors": " ".join(pub.author_names), "venue": pub.venue_name}
+    for field, value in fields.items():
+        for term in set(terms(value or "")):
+            scores[term] = scores.get(term, 0) + FIELD_WEIGHTS[field]
+    counts = {}
+    for term in terms(text or ""):
+        counts[term] = counts.get(term, 0) + 1
+    for term, count in counts.items():
+        scores[term] = scores.get(term, 0) + min(MAX_TEXT_SCORE, 1 + int(math.log2(count)))
+    # Field-only terms, for qualified queries
+    qualified = {"authors": FIELD_PREFIXES["author"], "venue": FIELD_PREFIXES["venue"]}
+    for field, prefix in qualified.items():
+        for term in set(terms(fields[field] or "")):
+            scores[f"{prefix}:{term}"] = FIELD_WEIGHTS[field]
+    scores[f"{FIELD_PREFIXES['year']}:{pub.year}"] = FIELD_WEIGHTS["year"]
+    return {term: min(score, MAX_SCORE) for term, score in scores.items()}
+
+def query_terms(text):
+    """Terms of a query; words written field:value become field-only terms."""
+    words = []
+    for chunk in text.split():
+        field, _, value = chunk.partition(":")
+        prefix = FIELD_PREFIXES.get(field.lower()) if value else None
+        if prefix:
+            words.extend(f"{prefix}:{term}" for term in terms(value))
+        else:
+            words.extend(terms(chunk))
+    return words
+
+def front_code(sorted_terms):
+    """Front-coded blocks (see the module docstring)."""
+    blocks = []
+    for start in range(0, len(sorted_terms), BLOCK_SIZE):
+        block = sorted_terms[start:start + BLOCK_SIZE]
+        parts = [block[0]]
+        for previous, term in zip(block, block[1:]):
+            shared = 0
+            while shared < min(len(previous), len(term)) and previous[shared] == term[shared]:
+                shared += 1
+            parts.append(chr(48 + shared) + term[shared:])
+        blocks.append(" ".join(parts))
+    return blocks
+
+def decode_blocks(blocks):
+    """Inverse of front_code."""
+    result = []
+    for block in blocks:
+        parts = block.split(" ")
+        term = parts[0]
+        result.append(term)
+        for part in parts[1:]:
+            term = term[:ord(part[0]) - 48] + part[1:]
+            result.append(term)
+    return result
+
+def encode_postings(postings):
+    """[(doc, score)] sorted by doc -> [delta, score, ...]."""
+    flat = []
+    previous = 0
+    for doc, score in postings:
+        flat.extend((doc - previous, score))
+        previous = doc
+    return flat
+
+def compile_shard(inverted, shard_terms):
+    shard_terms = sorted(shard_terms)
+    return {
+        "blocks": front_code(shard_terms),
+        "postings": [encode_postings(inverted[term]) for term in shard_terms],
+    }
+
+def shard_json(shard):
+    return json.dumps(shard, separators=(",", ":"))
+
+def plan_shards(inverted):
+    """{shard key: [terms]}: by first letter, split by two letters when too big."""
+    by_letter = {}
+    for term in inverted:
+        by_letter.setdefault(term[0], []).append(term)
+    shards = {}
+    for letter, letter_terms in by_letter.items():
+        if len(shard_json(compile_shard(inverted, letter_terms))) <= MAX_SHARD_BYTES:
+            shards[letter] = letter_terms
+            continue
+        for term in letter_terms:
+            shards.setdefault(term[:2], []).append(term)
+    return shards
+
+def build_index(records, texts):
+    """(documents, {term: [(doc, score)]}) for publications in page order."""
+    documents = []
+    inverted = {}
+    for doc, (pub, text) in enumerate(zip(records, texts)):
+        documents.append({"id": pub.id, "title": pub.title, "year": pub.year})
+        for term, score in document_scores(pub, text).items():
+            inverted.setdefault(term, []).append((doc, score))
+    return documents, inverted
+
+def load_records(json_path=CANONICAL_PATH):
+    """Publications in page order (the index's document order)."""
+    return records_from_data(load_publications(json_path))
+
+def write_search_index(out_dir, json_path=CANONICAL_PATH):
+    """Build the index into out_dir/search/; returns (manifest, total shard bytes)."""
+    records = load_records(json_path)
+    pdfs = [local_pdf([pub.paper_link, pub.preprint_link]) for pub in records]
+    texts_by_pdf = pdf_texts({pdf for pdf in pdfs if pdf})
+    texts = [texts_by_pdf.get(pdf, "") if pdf else "" for pdf in pdfs]
+    documents, inverted = build_index(records, texts)
+
+    search_dir = Path(out_dir) / SEARCH_DIR
+    search_dir.mkdir(parents=True, exist_ok=True)
+    shard_files = {}
+    total = 0
+    for key, shard_terms in sorted(plan_shards(inverted).items()):
+        data = shard_json(compile_shard(inverted, shard_terms))
+        name = f"terms-{key}.{hashlib.sha256(data.encode()).hexdigest()[:10]}.json"
+        if not (search_dir / name).exists():
+            atomic_write(search_dir / name, data)
+        shard_files[key] = name
+        total += len(data)
+
+    manifest = {
+        "version": INDEX_VERSION,
+        "documents": documents,
+        "shards": shard_files,
+        "full_text": sum(1 for text in texts if text),
+    }
+    atomic_write(search_dir / INDEX_NAME, json.dumps(manifest, separators=(",", ":"), ensure_ascii=False))
+    # Shards from earlier builds (and their precompressed siblings)
+    keep = set(shard_files.values())
+    for path in search_dir.glob("terms-*"):
+        if path.name.split(".json")[0] + ".json" not in keep:
+            path.unlink()
+    return manifest, total
+
+ARTICLE = re.compile(r'<article class="item-row"(?P<attrs>[^>]*)>(?P<body>.*?)</article>', re.DOTALL)
+TITLE = re.compile(r'<h5\b[^>]*>(.*?)</h5>', re.DOTALL)
+
+def title_key(title):
+    """Titles compared ignoring markup, entities, case, spacing and punctuation."""
+    text = html.unescape(re.sub(r'<[^>]+>', '', title))
+    return "".join(re.findall(r'[a-z0-9]+', normalize(text)))
+
+def annotate_articles(page, records):
+    """Add data-pub-id to publication articles that lack it, matching by title.
+
+    Returns (page, tagged, unmatched titles).
+    """
+    ids = {}
+    for pub in records:
+        if pub.id:
+            ids.setdefault(title_key(pub.title), pub.id)
+    tagged = 0
+    unmatched = []
+
+    def tag(match):
+        nonlocal tagged
+        if "data-pub-id=" in match.group("attrs"):
+            return match.group(0)
+        title = TITLE.search(match.group("body"))
+        pub_id = ids.get(title_key(title.group(1))) if title else None
+        if not pub_id:
+            unmatched.append(html.unescape(title.group(1).strip()) if title else "(untitled)")
+            return match.group(0)
+        tagged += 1
+        return f'<article class="item-row" data-pub-id="{html.escape(pub_id)}"{match.group("attrs")}>{match.group("body")}</article>'
+
+    return ARTICLE.sub(tag, page), tagged, unmatched
+
+def header_rules():
+    """_headers lines: shards are content-hashed, index.json must be revalidated."""
+    return [f"/{SEARCH_DIR}/terms-*", f"  Cache-Control: {IMMUTABLE_CACHE}",
+            f"/{SEARCH_DIR}/{INDEX_NAME}", "  Cache-Control: no-cache"]
+
+def load_shard(search_dir, manifest, key):
+    with open(search_dir / manifest["shards"][key], 'r', encoding='utf-8') as f:
+        shard = json.load(f)
+    return decode_blocks(shard["blocks"]), shard["postings"]
+
+def query(search_dir, text):
+    """[(score, document)] for a query, best first: every word must match; the
+    last one may be a prefix. Mirrors js/search.js."""
+    search_dir = Path(search_dir)
+    with open(search_dir / INDEX_NAME, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    words = query_terms(text)
+    if not words:
+        return []
+    totals = None
+    for i, word in enumerate(words):
+        prefix = i == len(words) - 1
+        scores = {}
+        keys = [key for key in manifest["shards"] if word.startswith(key) or (prefix and key.startswith(word))]
+        for key in keys:
+            shard_terms, postings = load_shard(search_dir, manifest, key)
+            for term, flat in zip(shard_terms, postings):
+                if term == word or (prefix and term.startswith(word)):
+                    doc = 0
+                    for j in range(0, len(flat), 2):
+                        doc += flat[j]
+                        # A prefix matching several terms counts its best one
+                        scores[doc] = max(scores.get(doc, 0), flat[j + 1])
+        totals = scores if totals is None else {doc: totals[doc] + score for doc, score in scores.items() if doc in totals}
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, manifest["documents"][doc]) for doc, score in ranked]
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the site search index.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    parser.add_argument("--query", help="search the built index instead of building it")
+    args = parser.parse_args()
+
+    if args.query is not None:
+        search_dir = Path(args.out) / SEARCH_DIR
+        if not (search_dir / INDEX_NAME).exists():
+            print(f"✗ No index in {search_dir} (run python3 search_index.py first)")
+            sys.exit(1)
+        results = query(search_dir, args.query)
+        for score, document in results[:20]:
+            print(f"  {score:4d}  {document['year']}  {document['title']}")
+        print(f"✓ {len(results)} matches")
+        return
+
+    manifest, total = write_search_index(args.out)
+    print(f"✓ Indexed {len(manifest['documents'])} publications ({manifest['full_text']} with full text) "
+          f"in {len(manifest['shards'])} shards, {total / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main()
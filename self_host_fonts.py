@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Serve the page's fonts from the site itself, cut down to what it uses.
+
+The page loads Inter from Google Fonts and all of Bootstrap Icons (CSS and
+font) from jsDelivr, but shows a few hundred distinct characters and a
+couple of dozen icons. For each built page this:
+
+  - collects the characters it can display (its text and attributes, plus
+    printable ASCII for text that scripts add) and the bi-* icon classes
+    named in it or in the site's scripts;
+  - takes the Inter variable font (one file per Unicode subset, from
+    @fontsource-variable/inter) for the subsets those characters touch, and
+    the Bootstrap Icons font of the version the page links;
+  - subsets them to those characters and icons with fontTools when it is
+    installed (WOFF2 needs brotli as well, otherwise WOFF), or ships them
+    whole when it is not;
+  - writes them to <out>/fonts/, replaces the Google Fonts and
+    bootstrap-icons.css links (and their preconnects) with an inline
+    <style> holding the @font-face rules and the rules of the icons in use.
+
+Upstream files are downloaded once into .cache/fonts (they are versioned
+and never change); put them there by hand to build offline. Subsets are
+cached there too, by source and character set. If a source font cannot be
+had, the page keeps its third-party links.
+
+Usage: python3 self_host_fonts.py [--out dist]
+"""
+
+import argparse
+import hashlib
+import html as html_module
+import io
+import re
+import sys
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from build_output import atomic_write, file_digest
+from publication_store import CACHE_DIR
+from url_failures import FailureCache, FetchFailed, fetch
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FONT_CACHE = CACHE_DIR / "fonts"
+FONTS_DIR = "fonts"
+SUBSET_VERSION = 1
+INTER_URL = "https://cdn.jsdelivr.net/npm/@fontsource-variable/inter@5.1.0/files/inter-{subset}-wght-normal.woff2"
+# Unicode ranges of the Inter subsets (as served by Google Fonts and Fontsource)
+INTER_SUBSETS = {
+    "latin": "U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, U+0329, "
+             "U+2000-206F, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD",
+    "latin-ext": "U+0100-02BA, U+02BD-02C5, U+02C7-02CC, U+02CE-02D7, U+02DD-02FF, U+0304, U+0308, U+0329, "
+                 "U+1D00-1DBF, U+1E00-1E9F, U+1EF2-1EFF, U+2020, U+20A0-20AB, U+20AD-20C0, U+2113, U+2C60-2C7F, U+A720-A7FF",
+    "greek": "U+0370-0377, U+037A-037F, U+0384-038A, U+038C, U+038E-03A1, U+03A3-03FF",
+    "cyrillic": "U+0301, U+0400-045F, U+0490-0491, U+04B0-04B1, U+2116",
+    "vietnamese": "U+0102-0103, U+0110-0111, U+0128-0129, U+0168-0169, U+01A0-01A1, U+01AF-01B0, U+0300-0301, "
+                  "U+0303-0304, U+0308-0309, U+0323, U+0329, U+1EA0-1EF9, U+20AB",
+}
+ASCII_PRINTABLE = set(range(0x20, 0x7F))
+
+GOOGLE_FONTS_LINK = re.compile(r'<link\b[^>]*href=["\']https://fonts\.googleapis\.com/css2?\?[^"\']*family=Inter\b[^>]*>\s*', re.IGNORECASE)
+ICONS_LINK = re.compile(r'<link\b[^>]*href=["\'](https://cdn\.jsdelivr\.net/npm/bootstrap-icons@[\d.]+/font/bootstrap-icons(?:\.min)?\.css)["\'][^>]*>\s*', re.IGNORECASE)
+FONT_PRECONNECT = re.compile(r'<link\b[^>]*rel=["\'](?:preconnect|dns-prefetch)["\'][^>]*href=["\']https://fonts\.(?:googleapis|gstatic)\.com/?["\'][^>]*>\s*', re.IGNORECASE)
+ICON_CLASS = re.compile(r'\bbi-[a-z0-9]+(?:-[a-z0-9]+)*')
+ICON_RULE = re.compile(r'\.(bi-[a-z0-9-]+)::?before\s*\{\s*content:\s*"\\([0-9a-fA-F]+)"\s*;?\s*\}')
+ICON_BASE_RULE = re.compile(r'(\.bi::before,\s*\[class\^="bi-"\]::before,\s*\[class\*=" bi-"\]::before\s*\{[^}]*\})')
+FONT_URL = re.compile(r'url\((["\']?)([^)"\']+\.woff2[^)"\']*)\1\)')
+SCRIPT_OR_STYLE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.DOTALL | re.IGNORECASE)
+
+def parse_ranges(text):
+    """Code points of a CSS unicode-range value."""
+    points = set()
+    for part in text.split(","):
+        bounds = part.strip().upper().removeprefix("U+").split("-")
+        points.update(range(int(bounds[0], 16), int(bounds[-1], 16) + 1))
+    return points
+
+def page_characters(page):
+    """Code points the page may render in its text font."""
+    text = html_module.unescape(SCRIPT_OR_STYLE.sub(" ", page))
+    return {ord(char) for char in text if ord(char) >= 0x20} | ASCII_PRINTABLE
+
+def icon_classes(texts):
+    return {name for text in texts for name in ICON_CLASS.findall(text)}
+
+def source_font(url, failures):
+    """Local path of an upstream file, downloading it once; None if unavailable."""
+    name = hashlib.sha256(url.encode()).hexdigest()[:16] + "-" + Path(urlsplit(url).path).name
+    path = FONT_CACHE / name
+    if not path.exists():
+        try:
+            body, _ = fetch(url, failures, timeout=20)
+        except FetchFailed as e:
+            print(f"  ⚠ Could not download {url}: {e}")
+            return None
+        FONT_CACHE.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, body)
+    return path
+
+def subset_font(source, codepoints):
+    """(font bytes, format) of source cut down to codepoints; the whole file without fontTools."""
+    if font_subset is None:
+        return source.read_bytes(), "woff2"
+    flavor = "woff2" if brotli is not None else "woff"
+    key = hashlib.sha256(f"{file_digest(source)} {sorted(codepoints)} v{SUBSET_VERSION}".encode()).hexdigest()[:24]
+    cached = FONT_CACHE / f"subset-{key}.{flavor}"
+    if cached.exists():
+        return cached.read_bytes(), flavor
+    options = font_subset.Options()
+    options.flavor = flavor
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    font = font_subset.load_font(str(source), options)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font_subset.save_font(font, out, options)
+    atomic_write(cached, out.getvalue())
+    return out.getvalue(), flavor
+
+def text_font_faces(out_dir, characters, failures):
+    """(@font-face CSS, files written) for the Inter subsets the page needs; None if unavailable."""
+    rules = []
+    written = []
+    for subset, ranges in INTER_SUBSETS.items():
+        needed = characters & parse_ranges(ranges)
+        if not needed:
+            continue
+        source = source_font(INTER_URL.format(subset=subset), failures)
+        if source is None:
+            return None
+        data, flavor = subset_font(source, needed)
+        name = f"{FONTS_DIR}/inter-{subset}.{flavor}"
+        atomic_write(out_dir / name, data)
+        written.append((name, len(data)))
+        rules.append(f'@font-face{{font-family:"Inter";font-style:normal;font-weight:100 900;font-display:swap;'
+                     f'src:url("{name}") format("{flavor}");unicode-range:{ranges.replace(" ", "")}}}')
+    return "\n".join(rules), written
+
+def icon_font_faces(out_dir, css_url, used, failures):
+    """(icon CSS, files written, unknown classes) for the icons in use; None if unavailable."""
+    css_path = source_font(css_url, failures)
+    if css_path is None:
+        return None
+    css = css_path.read_text(encoding='utf-8')
+    codepoints = {name: int(code, 16) for name, code in ICON_RULE.findall(css)}
+    base = ICON_BASE_RULE.search(css)
+    font_url = FONT_URL.search(css)
+    if base is None or font_url is None:
+        print(f"  ⚠ Unrecognized icon stylesheet: {css_url}")
+        return None
+    source = source_font(urljoin(css_url, font_url.group(2)), failures)
+    if source is None:
+        return None
+    icons = sorted(name for name in used if name in codepoints)
+    data, flavor = subset_font(source, {codepoints[name] for name in icons})
+    name = f"{FONTS_DIR}/bootstrap-icons.{flavor}"
+    atomic_write(out_dir / name, data)
+    rules = [f'@font-face{{font-display:block;font-family:"bootstrap-icons";src:url("{name}") format("{flavor}")}}',
+             base.group(1)]
+    rules += [f'.{icon}::before{{content:"\\{codepoints[icon]:x}"}}' for icon in icons]
+    return "\n".join(rules), [(name, len(data))], sorted(used - set(codepoints))
+
+def self_host_page(page_path, out_dir, scripts, failures):
+    """Rewrite one page to self-hosted fonts; returns the files written, or None if left alone."""
+    page = page_path.read_text(encoding='utf-8')
+    icons_link = ICONS_LINK.search(page)
+    if not GOOGLE_FONTS_LINK.search(page) and not icons_link:
+        return None
+    (out_dir / FONTS_DIR).mkdir(parents=True, exist_ok=True)
+    css = []
+    written = []
+    if GOOGLE_FONTS_LINK.search(page):
+        text = text_font_faces(out_dir, page_characters(page), failures)
+        if text is None:
+            return None
+        css.append(text[0])
+        written += text[1]
+    if icons_link:
+        # Classes outside class attributes count too: scripts swap icons by name
+        icons = icon_font_faces(out_dir, icons_link.group(1), icon_classes([page, *scripts]), failures)
+        if icons is None:
+            return None
+        css.append(icons[0])
+        written += icons[1]
+        for name in icons[2]:
+            print(f"  ⚠ {page_path.name}: {name} is not a Bootstrap Icons class")
+
+    page = GOOGLE_FONTS_LINK.sub("", page)
+    page = ICONS_LINK.sub("", page)
+    page = FONT_PRECONNECT.sub("", page)
+    style = "<style>\n" + "\n".join(css) + "\n</style>\n"
+    head_end = page.lower().find("</head>")
+    first_style = page.lower().find("<style")
+    at = first_style if 0 <= first_style < head_end else head_end
+    page = page[:at] + style + page[at:]
+    atomic_write(page_path, page)
+    return written
+
+def self_host_fonts(out_dir):
+    """Self-host the fonts of every page in out_dir; returns {page name: files written or None}."""
+    out_dir = Path(out_dir)
+    scripts = [path.read_text(encoding='utf-8') for path in sorted((out_dir / "js").glob("*.js"))]
+    failures = FailureCache()
+    results = {page.name: self_host_page(page, out_dir, scripts, failures) for page in sorted(out_dir.glob("*.html"))}
+    failures.save()
+    return results
+
+def print_results(results):
+    if font_subset is None:
+        print("  ⚠ fontTools not installed, fonts shipped unsubsetted (pip install fonttools brotli)")
+    for page, written in results.items():
+        if written is None:
+            print(f"  {page}: fonts left as they are")
+            continue
+        for name, size in written:
+            print(f"  {page}: {name} {size / 1024:.1f} KB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-host subsetted fonts for the built site.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    args = parser.parse_args()
+    if not Path(args.out).is_dir():
+        print(f"✗ {args.out} not found (run python3 build_site.py first)")
+        sys.exit(1)
+    print_results(self_host_fonts(args.out))
+    print("✓ Done")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Generate a service worker for the built site from its asset manifest.
+
+dist/sw.js lists the content-hashed files of asset-manifest.json and the
+search index shards. A hashed file never changes, so the worker serves it
+from its cache and only goes to the network for files it has not seen:
+
+  - on install it precaches what the first screen needs (the fonts and
+    images preloaded in <head>, see resource_hints.py), the scripts,
+    stylesheets and search shards, the other images above the fold
+    (critical_css.ABOVE_THE_FOLD), then publication thumbnails in page order
+    (newest papers first) while the total stays within PRECACHE_BUDGET, skipping files already cached
+    by an earlier version, so after a deploy only changed assets are
+    downloaded again; other hashed files (the remaining thumbnails,
+    portraits, logos, fonts) are cached on first use;
+  - on activate it drops cached files the new build no longer references;
+  - the page and search/index.json are served stale-while-revalidate: from
+    the cache at once, refreshed in the background for the next visit. The
+    install step refetches them, so a new version never starts with a page
+    that points at the assets of the previous one.
+
+PDFs and slides (files/, presentations/) are left to the HTTP cache. The
+pages get a small script that registers sw.js; _headers keeps sw.js itself
+uncached, so browsers pick up a new version on the next visit.
+
+Usage: python3 service_worker.py [--out dist]   (after build_site.py)
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from build_output import atomic_write
+from critical_css import above_the_fold
+from fingerprint_assets import MANIFEST_NAME, find_references, is_local, load_manifest, logical_path
+from resource_hints import preloaded
+from search_index import INDEX_NAME, SEARCH_DIR
+
+WORKER_NAME = "sw.js"
+# Background download on a first visit, on top of the page weight (see page_weight.py)
+PRECACHE_BUDGET = 1536 * 1024
+# Precached after the first view, in this order: what the page and search
+# need, then (after the rest of the content above the fold) the thumbnails
+PRECACHE_DIRS = ("js/", "css/", SEARCH_DIR + "/", "images/publications/")
+# Large downloads opened one at a time; not worth keeping in the worker's cache
+UNCACHED_DIRS = ("files/", "presentations/")
+REGISTER_SCRIPT = ('<script>if("serviceWorker"in navigator)addEventListener("load",function(){'
+                   f'navigator.serviceWorker.register("{WORKER_NAME}")}})</script>')
+
+WORKER_TEMPLATE = """// Generated by service_worker.py from asset-manifest.json; do not edit.
+const PRECACHE = __PRECACHE__;
+const CACHEABLE = __CACHEABLE__;
+const REVALIDATE = __REVALIDATE__;
+const ASSETS_CACHE = "assets";
+const PAGES_CACHE = "pages";
+
+const resolve = path => new URL(path, self.location).href;
+const cacheable = new Set(CACHEABLE.map(resolve));
+// URL -> cache key; "index.html" and "./" are the same page
+const revalidate = new Map(Object.entries(REVALIDATE).map(([path, key]) => [resolve(path), resolve(key)]));
+
+self.addEventListener("install", event => {
+    event.waitUntil((async () => {
+        const assets = await caches.open(ASSETS_CACHE);
+        const cached = new Set((await assets.keys()).map(request => request.url));
+        await assets.addAll(PRECACHE.map(resolve).filter(url => !cached.has(url)));
+        const pages = await caches.open(PAGES_CACHE);
+        await pages.addAll([...new Set(revalidate.values())].map(url => new Request(url, {cache: "reload"})));
+    })());
+});
+
+self.addEventListener("activate", event => {
+    event.waitUntil((async () => {
+        const assets = await caches.open(ASSETS_CACHE);
+        for (const request of await assets.keys()) {
+            if (!cacheable.has(request.url)) {
+                await assets.delete(request);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+async function cacheFirst(request, key) {
+    const cache = await caches.open(ASSETS_CACHE);
+    const cached = await cache.match(key);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok && response.status === 200) {
+        await cache.put(key, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event, key) {
+    const cache = await caches.open(PAGES_CACHE);
+    const cached = await cache.match(key);
+    const network = fetch(event.request).then(async response => {
+        // A redirected response cannot answer a navigation later
+        if (response.ok && !response.redirected) {
+            await cache.put(key, response.clone());
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+self.addEventListener("fetch", event => {
+    if (event.request.method !== "GET" || event.request.headers.has("range")) {
+        return;
+    }
+    const url = new URL(event.request.url);
+    const path = url.origin + url.pathname;
+    if (cacheable.has(path)) {
+        event.respondWith(cacheFirst(event.request, path));
+    } else if (revalidate.has(path)) {
+        event.respondWith(staleWhileRevalidate(event, revalidate.get(path)));
+    }
+});
+"""
+
+def first_view(pages):
+    """({preloaded path}, {path referenced above the fold}) of the pages' local files, site-relative."""
+    preloads = set()
+    visible = set()
+    for page in pages:
+        preloads |= {logical_path(url) for url in preloaded(page) if is_local(url)}
+        visible |= {logical_path(url) for url in find_references(above_the_fold(page))}
+    return preloads, visible - preloads
+
+def precache_rank(logical, name, preloads, visible):
+    """Where a candidate falls in the precache order (lower first)."""
+    if name in preloads:
+        return 0
+    thumbnails = len(PRECACHE_DIRS) - 1
+    for i, prefix in enumerate(PRECACHE_DIRS[:thumbnails]):
+        if logical.startswith(prefix):
+            return 1 + i
+    if name in visible:
+        return 1 + thumbnails
+    return 2 + thumbnails
+
+def worker_lists(out_dir):
+    """({precache path: bytes}, [cacheable paths], {revalidated path: cache key}), site-relative."""
+    out_dir = Path(out_dir)
+    pages = [page.read_text(encoding='utf-8') for page in sorted(out_dir.glob("*.html"))]
+    preloads, visible = first_view(pages)
+    files = {}
+    candidates = {}
+    for logical, entry in load_manifest(out_dir)["assets"].items():
+        if logical.startswith(UNCACHED_DIRS):
+            continue
+        files[entry["file"]] = entry["size"]
+        if logical.startswith(PRECACHE_DIRS) or entry["file"] in preloads or entry["file"] in visible:
+            candidates[entry["file"]] = (logical, entry["size"])
+    revalidate = {"./": "./"}
+    for page in sorted(out_dir.glob("*.html")):
+        revalidate[page.name] = "./" if page.name == "index.html" else page.name
+    search_index = out_dir / SEARCH_DIR / INDEX_NAME
+    if search_index.exists():
+        revalidate[f"{SEARCH_DIR}/{INDEX_NAME}"] = f"{SEARCH_DIR}/{INDEX_NAME}"
+        with open(search_index, 'r', encoding='utf-8') as f:
+            for shard in json.load(f)["shards"].values():
+                name = f"{SEARCH_DIR}/{shard}"
+                files[name] = (out_dir / name).stat().st_size
+                candidates[name] = (name, files[name])
+
+    pages = "".join(pages)
+    def order(name):
+        position = pages.find(name)
+        return (precache_rank(candidates[name][0], name, preloads, visible),
+                position if position >= 0 else len(pages), name)
+
+    precache = {}
+    total = 0
+    for name in sorted(candidates, key=order):
+        size = candidates[name][1]
+        if total + size > PRECACHE_BUDGET:
+            continue
+        precache[name] = size
+        total += size
+    return precache, sorted(files), revalidate
+
+def register_worker(page_path):
+    """Add the registration script to a page; returns False if it already has it."""
+    page = page_path.read_text(encoding='utf-8')
+    if REGISTER_SCRIPT in page:
+        return False
+    body_end = page.lower().rfind("</body>")
+    at = body_end if body_end >= 0 else len(page)
+    atomic_write(page_path, page[:at] + REGISTER_SCRIPT + page[at:])
+    return True
+
+def write_service_worker(out_dir):
+    """Write out_dir/sw.js and register it in every page.
+
+    Returns ({precached path: bytes}, [cacheable paths]).
+    """
+    out_dir = Path(out_dir)
+    precache, cacheable, revalidate = worker_lists(out_dir)
+    worker = (WORKER_TEMPLATE
+              .replace("__PRECACHE__", json.dumps(sorted(precache), indent=1))
+              .replace("__CACHEABLE__", json.dumps(cacheable, indent=1))
+              .replace("__REVALIDATE__", json.dumps(revalidate, indent=1)))
+    atomic_write(out_dir / WORKER_NAME, worker)
+    for page in sorted(out_dir.glob("*.html")):
+        register_worker(page)
+    return precache, cacheable
+
+def describe(precache, cacheable):
+    return (f"{len(precache)} files precached ({sum(precache.values()) / 1024:.0f} KB on a first visit), "
+            f"{len(cacheable) - len(precache)} more cached on first use")
+
+def header_rules():
+    """_headers rules: the worker script must be revalidated to pick up new builds."""
+    return [f"/{WORKER_NAME}", "  Cache-Control: no-cache"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the service worker for the built site.")
+    parser.add_argument("--out", default="dist", help="site output directory")
+    args = parser.parse_args()
+    if not (Path(args.out) / MANIFEST_NAME).exists():
+        print(f"✗ No asset manifest in {args.out} (run python3 build_site.py first)")
+        sys.exit(1)
+    precache, cacheable = write_service_worker(args.out)
+    print(f"✓ {WORKER_NAME}: {describe(precache, cacheable)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for publication JSON (year -> list of publications).
+
+iter_publications() reads the input in chunks and yields one (year, pub)
+pair at a time, in input order, without ever building the whole tree, so a
+large export starts flowing into the fetch/render stages immediately and
+memory stays bounded by the largest single publication.
+Usage: cat export.json | python3 stream_publications.py   # prints per-year counts
+"""
+
+import json
+import sys
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\r\n"
+
+class _Reader:
+    """Character buffer over a text stream that refills on demand."""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer stays small
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or '' at end of input."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else "end of input"
+            raise ValueError(f"Expected one of {chars!r}, found {found}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number at the very end of the buffer might continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+def iter_publications(fp, chunk_size=CHUNK_SIZE, year_keys=None):
+    """Yield (year, publication_dict) from a JSON object of year -> list, streaming.
+
+    With a year_keys list, every year key is appended to it as it is read,
+    including years without publications (see write_store).
+    """
+    reader = _Reader(fp, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        year = reader.value()
+        if not isinstance(year, str):
+            raise ValueError(f"Expected a year key, found {year!r}")
+        if year_keys is not None:
+            year_keys.append(year)
+        reader.expect(":")
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.pos += 1
+        else:
+            while True:
+                pub = reader.value()
+                if not isinstance(pub, dict):
+                    raise ValueError(f"{year}: expected a publication object, found {type(pub).__name__}")
+                yield year, pub
+                if reader.expect(",]") == "]":
+                    break
+        if reader.expect(",}") == "}":
+            break
+
+    if reader.peek():
+        raise ValueError("Unexpected data after the end of the JSON object")
+
+def count_by_year(fp, chunk_size=CHUNK_SIZE):
+    """{year: publication count} in input order; a cheap first pass that also validates structure."""
+    counts = {}
+    for year, _ in iter_publications(fp, chunk_size):
+        counts[year] = counts.get(year, 0) + 1
+    return counts
+
+def iter_records(pairs, registry=None):
+    """Turn (year, dict) pairs into Publication records as they arrive."""
+    from publication_model import Publication, Registry
+
+    registry = registry or Registry()
+    for year, pub in pairs:
+        yield Publication.from_dict(pub, year, registry)
+
+def write_store(pairs, fp, year_keys=None):
+    """Stream (year, pub) pairs out in the same layout as json.dump(data, indent=2).
+
+    Returns (publication_count, year_count). Years must arrive grouped. With
+    the year_keys list iter_publications fills in, years without
+    publications are written as empty lists instead of being dropped.
+    """
+    count = 0
+    years = []
+    group_open = False
+
+    def start(year, empty=False):
+        nonlocal group_open
+        if year in years:
+            raise ValueError(f"Year {year} appears in more than one group")
+        fp.write("{\n" if not years else "\n  ],\n" if group_open else ",\n")
+        fp.write(f"  {json.dumps(year)}: " + ("[]" if empty else "[\n"))
+        years.append(year)
+        group_open = not empty
+
+    def empty_years(before=None):
+        # Keys read before the current year that got no publications
+        for year in list(year_keys or []):
+            if year == before:
+                break
+            if year not in years:
+                start(year, empty=True)
+
+    for year, pub in pairs:
+        if not years or years[-1] != year:
+            empty_years(before=year)
+            start(year)
+        else:
+            fp.write(",\n")
+        body = json.dumps(pub, indent=2, ensure_ascii=False)
+        fp.write("\n".join("    " + line for line in body.split("\n")))
+        count += 1
+    empty_years()
+    fp.write("\n  ]\n}\n" if group_open else "\n}\n" if years else "{}\n")
+    return count, len(years)
+
+def save_store(source, path=None):
+    """Validate a streamed export and write it over the store, keeping the stored ids.
+
+    Holds the build lock while writing. Raises SchemaError (the store is
+    left as it was) when a publication is malformed; returns (publication
+    count, year count).
+    """
+    from build_output import atomic_open, build_lock
+    from publication_store import CANONICAL_PATH, SchemaError, carry_ids, checked_pairs, load_publications
+
+    path = Path(path or CANONICAL_PATH)
+    with build_lock():
+        try:
+            existing = load_publications(path) if path.exists() else {}
+        except ValueError as e:
+            # A broken store is what a fresh export usually replaces
+            print(f"⚠ Existing {path.name} unreadable, ids are derived afresh: {e}")
+            existing = {}
+        problems = []
+        year_keys = []
+        with atomic_open(path) as f:
+            pairs = checked_pairs(carry_ids(iter_publications(source, year_keys=year_keys), existing, problems), problems)
+            count, years = write_store(pairs, f, year_keys)
+            if problems:
+                # Raising inside atomic_open discards the new file
+                raise SchemaError(problems)
+    return count, years
+
+def main():
+    counts = count_by_year(sys.stdin)
+    for year, n in counts.items():
+        print(f"  {year}: {n}")
+    print(f"✓ {sum(counts.values())} publications across {len(counts)} years")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for canonical_urls.py.
+Usage: python3 -m pytest test_canonical_urls.py
+"""
+
+import unittest
+
+from canonical_urls import InvalidURL, canonical_url, url_problem
+
+class CanonicalURLTest(unittest.TestCase):
+    def test_typos_case_and_aliases(self):
+        self.assertEqual(canonical_url("hhttps://Batman-Lab.com/wp-content/a.png"),
+                         "https://www.batman-lab.com/wp-content/a.png")
+        self.assertEqual(canonical_url("HTTP:/example.org"), "http://example.org/")
+        self.assertEqual(canonical_url("https//example.org/x"), "https://example.org/x")
+        self.assertEqual(canonical_url("www.example.org/x"), "https://www.example.org/x")
+
+    def test_ports(self):
+        self.assertEqual(canonical_url("https://example.org:443/x"), "https://example.org/x")
+        self.assertEqual(canonical_url("http://example.org:8080/x"), "http://example.org:8080/x")
+
+    def test_percent_encoding(self):
+        # Unreserved escapes decoded, the rest uppercased, spaces and non-ASCII encoded
+        self.assertEqual(canonical_url("https://example.org/a%7eb%2fc"), "https://example.org/a~b%2Fc")
+        self.assertEqual(canonical_url("https://example.org/a b/é?q=a b"),
+                         "https://example.org/a%20b/%C3%A9?q=a%20b")
+
+    def test_idempotent(self):
+        for url in ("hhttps://Batman-Lab.com/a%7eb c", "files/MLHC 21.pdf", "https://x.org/?a=1&b=%2f"):
+            once = canonical_url(url)
+            self.assertEqual(canonical_url(once), once)
+
+    def test_relative_and_special(self):
+        self.assertEqual(canonical_url("files/MLHC 21.pdf"), "files/MLHC%2021.pdf")
+        self.assertEqual(canonical_url("mailto:someone@example.org"), "mailto:someone@example.org")
+        self.assertEqual(canonical_url("  "), "")
+        self.assertEqual(canonical_url(None), "")
+
+    def test_invalid(self):
+        for url in ("ftp://example.org/x", "https://", "https://exa mple.org/", "http://example.org:99999/"):
+            with self.assertRaises(InvalidURL):
+                canonical_url(url)
+        self.assertIsNone(url_problem("https://example.org/"))
+        self.assertIn("unsupported scheme", url_problem("ftp://example.org/x"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for critical_css.py.
+Usage: python3 -m pytest test_critical_css.py
+"""
+
+import unittest
+
+from critical_css import (
+    above_the_fold,
+    css_rules,
+    hoist_inline_styles,
+    hoisted_class,
+    page_names,
+    rebase_urls,
+    selector_can_match,
+    split_rules,
+)
+
+NAMES = {".navbar", ".bio", "#bio", "nav", "img", "a", "section", "div"}
+
+class SelectorTest(unittest.TestCase):
+    def test_every_name_must_occur(self):
+        self.assertTrue(selector_can_match(".navbar a", NAMES))
+        self.assertTrue(selector_can_match("nav > a.navbar:hover", NAMES))
+        self.assertTrue(selector_can_match("#bio img::before", NAMES))
+        self.assertFalse(selector_can_match(".navbar .card", NAMES))
+        self.assertFalse(selector_can_match("article", NAMES))
+        self.assertTrue(selector_can_match("*", NAMES))
+
+    def test_attribute_and_pseudo_arguments_are_ignored(self):
+        self.assertTrue(selector_can_match('a[href^="https://x.org"]', NAMES))
+        self.assertTrue(selector_can_match("div:not(.card):nth-child(2n+1)", NAMES))
+        self.assertTrue(selector_can_match("A.navbar", NAMES))
+
+    def test_page_names(self):
+        names = page_names('<nav class="navbar  top"><a id="home" href="#">x</a><IMG src=a.png></nav>')
+        self.assertEqual(names, {".navbar", ".top", "#home", "nav", "a", "img"})
+
+class RulesTest(unittest.TestCase):
+    def test_css_rules(self):
+        css = '@import url("a.css");a{color:red}@media (min-width:1px){b{x:"}"}}p{}'
+        self.assertEqual(css_rules(css), [
+            ('@import url("a.css")', None),
+            ("a", "color:red"),
+            ("@media (min-width:1px)", 'b{x:"}"}'),
+            ("p", ""),
+        ])
+
+    def test_split_rules(self):
+        css = ('@import url(print.css);'
+               '@font-face{font-family:I;src:url(fonts/i.woff2)}'
+               '.navbar{color:red}.card{color:blue}.card,.bio{margin:0}'
+               '@media (max-width:600px){.navbar{display:none}.card{padding:0}}'
+               '@media print{.card{border:0}}')
+        critical, deferred = split_rules(css, NAMES)
+        self.assertEqual(critical, '@font-face{font-family:I;src:url(fonts/i.woff2)}'
+                                   '.navbar{color:red}.card,.bio{margin:0}'
+                                   '@media (max-width:600px){.navbar{display:none}}')
+        # Deferred keeps the whole cascade except the at-rules that only go inline
+        self.assertEqual(deferred, '@import url(print.css);'
+                                   '.navbar{color:red}.card{color:blue}.card,.bio{margin:0}'
+                                   '@media (max-width:600px){.navbar{display:none}.card{padding:0}}'
+                                   '@media print{.card{border:0}}')
+
+    def test_rebase_urls(self):
+        css = 'a{background:url(images/a.png)}b{background:url("/abs.png")}c{src:url(https://x.org/f.woff2)}d{x:url(data:x)}'
+        self.assertEqual(rebase_urls(css, "../"),
+                         'a{background:url(../images/a.png)}b{background:url("/abs.png")}'
+                         'c{src:url(https://x.org/f.woff2)}d{x:url(data:x)}')
+
+class PageTest(unittest.TestCase):
+    def test_above_the_fold(self):
+        page = ('<head><style>x</style></head><body><nav>n</nav>'
+                '<section id="bio">b</section><section id="publication">p</section>'
+                '<section id="research">r</section><footer>f</footer></body>')
+        fold = above_the_fold(page)
+        self.assertIn('<section id="bio">b</section>', fold)
+        self.assertIn('<section id="research">r</section>', fold)
+        self.assertNotIn("publication", fold)
+        self.assertIn("<footer>f</footer>", fold)
+        self.assertNotIn("<style>", fold)
+
+    def test_hoist_repeated_inline_styles(self):
+        page = ('<pre style="display: none; font-size: 12px">a</pre>'
+                '<pre class="bib" style="font-size:12px;display:block">b</pre>'
+                '<p style="color: red">once</p>')
+        hoisted, rules, count = hoist_inline_styles(page)
+        name = hoisted_class("font-size:12px")
+        self.assertEqual(count, 2)
+        self.assertEqual(rules, [f".{name}{{font-size:12px!important}}"])
+        # display stays inline for the scripts that toggle it
+        self.assertIn(f'<pre class="{name}" style="display: none;">a</pre>', hoisted)
+        self.assertIn(f'<pre class="bib {name}" style="display: block;">b</pre>', hoisted)
+        self.assertIn('<p style="color: red">once</p>', hoisted)
+        self.assertEqual(hoist_inline_styles('<p style="color: red">x</p>'), ('<p style="color: red">x</p>', [], 0))
+
+if __name__ == "__main__":
+    unittest.main()
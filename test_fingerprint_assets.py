@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for fingerprint_assets.py.
+Usage: python3 -m pytest test_fingerprint_assets.py
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from fingerprint_assets import (
+    find_references,
+    fingerprint_site,
+    hashed_name,
+    load_manifest,
+    rewrite_references,
+    rewrite_stylesheet,
+    stylesheet_path,
+    stylesheet_references,
+)
+
+MAPPING = {
+    "fonts/inter.woff2": "fonts/inter.1111111111.woff2",
+    "images/bg one.png": "images/bg one.2222222222.png",
+    "css/icons.svg": "css/icons.3333333333.svg",
+}
+
+class StylesheetTest(unittest.TestCase):
+    def test_paths_are_relative_to_the_sheet(self):
+        self.assertEqual(stylesheet_path("../fonts/inter.woff2", "css/index.css"), "fonts/inter.woff2")
+        self.assertEqual(stylesheet_path("icons.svg#x", "css/index.css"), "css/icons.svg")
+        self.assertEqual(stylesheet_path("/images/a.png?v=1", "css/index.css"), "images/a.png")
+        self.assertEqual(stylesheet_path("./fonts/inter.woff2", "main.css"), "fonts/inter.woff2")
+
+    def test_references(self):
+        css = ('@font-face{src:url("../fonts/inter.woff2") format("woff2")}'
+               'a{background:url(https://cdn.example.org/x.png)}b{background:url(data:image/png;base64,AA)}'
+               "c{background:url('../images/bg%20one.png')}")
+        self.assertEqual(stylesheet_references(css, "css/index.css"), {"fonts/inter.woff2", "images/bg one.png"})
+
+    def test_rewrite_stylesheet(self):
+        css = ('@font-face{src:url("../fonts/inter.woff2?v=2") format("woff2")}'
+               "a{background:url('../images/bg%20one.png')}"
+               "b{mask:url(icons.svg#star)}c{background:url(/images/bg%20one.png)}"
+               "d{background:url(../images/unknown.png)}e{background:url(https://x.org/fonts/inter.woff2)}")
+        self.assertEqual(rewrite_stylesheet(css, "css/index.css", MAPPING),
+                         '@font-face{src:url("../fonts/inter.1111111111.woff2?v=2") format("woff2")}'
+                         "a{background:url('../images/bg%20one.2222222222.png')}"
+                         "b{mask:url(icons.3333333333.svg#star)}c{background:url(/images/bg%20one.2222222222.png)}"
+                         "d{background:url(../images/unknown.png)}e{background:url(https://x.org/fonts/inter.woff2)}")
+        # A sheet at the site root sees the same files under other relative paths
+        self.assertEqual(rewrite_stylesheet("a{src:url(fonts/inter.woff2)}", "site.css", MAPPING),
+                         "a{src:url(fonts/inter.1111111111.woff2)}")
+
+class HTMLTest(unittest.TestCase):
+    def test_find_and_rewrite_references(self):
+        html = ('<img src="images/bg%20one.png" srcset="images/bg%20one.png 1x, https://x.org/a.png 2x" '
+                'onerror="this.src=\'css/icons.svg\'"><a href="#top">top</a><a href="mailto:a@b.c">m</a>'
+                '<div style="background:url(fonts/inter.woff2)"></div>')
+        self.assertEqual(find_references(html), {"images/bg%20one.png", "css/icons.svg", "fonts/inter.woff2"})
+        self.assertEqual(rewrite_references(html, MAPPING),
+                         '<img src="images/bg%20one.2222222222.png" '
+                         'srcset="images/bg%20one.2222222222.png 1x, https://x.org/a.png 2x" '
+                         'onerror="this.src=\'css/icons.3333333333.svg\'"><a href="#top">top</a>'
+                         '<a href="mailto:a@b.c">m</a><div style="background:url(fonts/inter.1111111111.woff2)"></div>')
+
+    def test_hashed_name(self):
+        self.assertEqual(hashed_name("images/a.b.png", "0123456789abcdef"), "images/a.b.0123456789.png")
+
+class SiteTest(unittest.TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.out = Path(temporary.name)
+        (self.out / "css").mkdir()
+        (self.out / "fonts").mkdir()
+        (self.out / "fonts" / "inter.woff2").write_bytes(b"font v1")
+        (self.out / "css" / "index.css").write_text("a{src:url(../fonts/inter.woff2)}", encoding='utf-8')
+
+    def build(self):
+        (self.out / "index.html").write_text('<link rel="stylesheet" href="css/index.css">', encoding='utf-8')
+        fingerprint_site(self.out)
+        return load_manifest(self.out)["assets"]
+
+    def test_stylesheet_copy_points_at_hashed_assets(self):
+        assets = self.build()
+        font = assets["fonts/inter.woff2"]["file"]
+        sheet = assets["css/index.css"]["file"]
+        self.assertEqual((self.out / sheet).read_text(encoding='utf-8'), f"a{{src:url(../{font})}}")
+        self.assertEqual((self.out / "css" / "index.css").read_text(encoding='utf-8'), "a{src:url(../fonts/inter.woff2)}")
+        self.assertIn(f'href="{sheet}"', (self.out / "index.html").read_text(encoding='utf-8'))
+
+    def test_font_change_rehashes_the_sheet_and_prunes_stale_copies(self):
+        old = self.build()
+        for entry in old.values():
+            (self.out / (entry["file"] + ".gz")).write_bytes(b"gz")
+        (self.out / "fonts" / "inter.woff2").write_bytes(b"font v2")
+        new = self.build()
+        self.assertNotEqual(new["css/index.css"]["file"], old["css/index.css"]["file"])
+        for logical, entry in old.items():
+            self.assertFalse((self.out / entry["file"]).exists(), logical)
+            self.assertFalse((self.out / (entry["file"] + ".gz")).exists(), logical)
+        for entry in new.values():
+            self.assertTrue((self.out / entry["file"]).exists())
+
+if __name__ == "__main__":
+    unittest.main()
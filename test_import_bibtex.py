@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the BibTeX parser in import_bibtex.py.
+Usage: python3 -m pytest test_import_bibtex.py
+"""
+
+import unittest
+
+from import_bibtex import BibtexError, entry_to_publication, latex_to_text, parse_bibtex, split_names
+
+SAMPLE = r"""
+@comment{exported by a reference manager}
+@string{tmi = "IEEE Transactions on Medical Imaging"}
+
+@article{ghosh2024mammo,
+  title = {{Mammo-CLIP}: A Vision Language Foundation Model},
+  author = {Ghosh, Shantanu and Poynton, Clare B. and others},
+  journal = tmi # " (TMI)",
+  year = 2024,
+  month = oct,
+  doi = {10.1109/TMI.2024.1},
+}
+
+@inproceedings(yu2022,
+  title = "Anatomy-Guided {W}eakly-Supervised Learning",
+  author = "Ke Yu and Kayhan Batmanghelich",
+  booktitle = {MICCAI},
+  year = {2022}
+)
+"""
+
+class ParseTest(unittest.TestCase):
+    def test_entries_fields_and_macros(self):
+        first, second = parse_bibtex(SAMPLE)
+        self.assertEqual((first["type"], first["key"]), ("article", "ghosh2024mammo"))
+        self.assertEqual(first["fields"]["journal"], "IEEE Transactions on Medical Imaging (TMI)")
+        self.assertEqual(first["fields"]["year"], "2024")
+        self.assertEqual(first["fields"]["month"], "Oct")
+        self.assertTrue(first["source"].startswith("@article{ghosh2024mammo,"))
+        self.assertTrue(first["source"].endswith("}"))
+        # Parenthesized entry with quoted values and no trailing comma
+        self.assertEqual((second["type"], second["key"]), ("inproceedings", "yu2022"))
+        self.assertEqual(second["fields"]["title"], "Anatomy-Guided {W}eakly-Supervised Learning")
+
+    def test_nested_braces_are_kept_in_the_raw_value(self):
+        [entry] = parse_bibtex("@misc{k, title = {A {B {C}} D}}")
+        self.assertEqual(entry["fields"]["title"], "A {B {C}} D")
+
+    def test_malformed_input_names_the_line(self):
+        with self.assertRaises(BibtexError) as raised:
+            parse_bibtex("@article{key,\n  title = {x}\n  year = 2020\n}")
+        self.assertEqual(raised.exception.line, 3)
+        for text in ('@article{k, title = {x', '@article{k, title = "x', '@string{ = 1}'):
+            with self.assertRaises(BibtexError):
+                parse_bibtex(text)
+
+class TextTest(unittest.TestCase):
+    def test_latex_to_text(self):
+        self.assertEqual(latex_to_text(r'G{\"o}del and Erd\H{o}s'), "Gödel and Erdős")
+        self.assertEqual(latex_to_text(r"Fran\c{c}ois \& {M}ar\'{\i}a"), "François & María")
+        self.assertEqual(latex_to_text(r"Stra\ss e~{50\%}"), "Straße 50%")
+
+    def test_split_names(self):
+        self.assertEqual(split_names("Ghosh, Shantanu and Ke Yu and others"), ["Shantanu Ghosh", "Ke Yu"])
+        self.assertEqual(split_names("{Barnes and Noble} and van Gogh, Jr, Vincent"),
+                         ["Barnes and Noble", "Vincent van Gogh Jr"])
+
+    def test_entry_to_publication(self):
+        year, pub = entry_to_publication(parse_bibtex(SAMPLE)[0])
+        self.assertEqual(year, "2024")
+        self.assertEqual(pub["title"], "Mammo-CLIP: A Vision Language Foundation Model")
+        self.assertEqual(pub["authors"], ["Shantanu Ghosh", "Clare B. Poynton"])
+        self.assertEqual(pub["venue"], "IEEE Transactions on Medical Imaging (TMI)")
+        self.assertEqual(pub["paper_link"], "https://doi.org/10.1109/TMI.2024.1")
+
+    def test_entry_without_year_is_skipped(self):
+        [entry] = parse_bibtex("@misc{k, title = {Untitled draft}}")
+        self.assertEqual(entry_to_publication(entry), (None, None))
+
+if __name__ == "__main__":
+    unittest.main()
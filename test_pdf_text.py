@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the built-in extractor in pdf_text.py.
+Usage: python3 -m pytest test_pdf_text.py
+"""
+
+import tempfile
+import unittest
+import zlib
+from base64 import a85encode
+from pathlib import Path
+from unittest import mock
+
+import pdf_text
+from pdf_text import Name, Ref, _literal_string, builtin_text, decode_stream, parse_cmap, parse_value, tokens
+
+def literal(data):
+    """Bytes of the literal string data (without its opening parenthesis)."""
+    return _literal_string(data, 0)[0]
+
+def make_pdf(content, font="<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+             extra=b""):
+    """A minimal one-page PDF; content is the page's uncompressed content stream."""
+    stream = zlib.compress(content)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Type /Page /Parent 2 0 R /Contents 4 0 R >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        font.encode() if isinstance(font, str) else font,
+    ]
+    body = b"".join(b"%d 0 obj\n" % (i + 1) + obj + b"\nendobj\n" for i, obj in enumerate(objects))
+    return b"%PDF-1.4\n" + body + extra + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+class LiteralStringTest(unittest.TestCase):
+    def test_escapes(self):
+        self.assertEqual(literal(rb"a\nb\tc\(d\)\\e)"), b"a\nb\tc(d)\\e")
+        self.assertEqual(literal(b"nested (parens) ok)"), b"nested (parens) ok")
+        self.assertEqual(literal(b"line \\\ncontinued)"), b"line continued")
+        self.assertEqual(literal(b"crlf \\\r\ncontinued)"), b"crlf continued")
+        self.assertEqual(literal(rb"unknown \q escape)"), b"unknown q escape")
+
+    def test_octal(self):
+        self.assertEqual(literal(rb"\101\102C)"), b"ABC")
+        # At most three digits; fewer when a non-octal character follows
+        self.assertEqual(literal(rb"\0121)"), b"\n1")
+        self.assertEqual(literal(rb"\7x)"), b"\x07x")
+        self.assertEqual(literal(rb"\777)"), b"\xff")
+
+    def test_backslash_before_8_or_9_is_the_digit(self):
+        self.assertEqual(literal(rb"page \8 and \9)"), b"page 8 and 9")
+        self.assertEqual(literal(rb"\18)"), b"\x018")
+        self.assertEqual(_literal_string(b"xx(\\9)rest", 3), (b"9", 6))
+
+    def test_unterminated(self):
+        self.assertEqual(_literal_string(b"open (never closed", 0), (b"open (never closed", 18))
+
+class ParserTest(unittest.TestCase):
+    def test_objects(self):
+        value, _ = parse_value(b"<< /Type /Page /Kids [3 0 R 4 0 R] /Name#20X (str) /Hex <4142 4> /N -1.5 /B true /Z null >>")
+        self.assertEqual(value["Type"], "Page")
+        self.assertIsInstance(value["Type"], Name)
+        self.assertEqual(value["Kids"], [Ref((3, 0)), Ref((4, 0))])
+        self.assertEqual(value["Name X"], b"str")
+        self.assertEqual(value["Hex"], b"AB@")
+        self.assertEqual((value["N"], value["B"], value["Z"]), (-1.5, True, None))
+        self.assertEqual(parse_value(b"  12 0 R")[0], Ref((12, 0)))
+        with self.assertRaises(ValueError):
+            parse_value(b"<< /Open [1 2")
+
+    def test_tokens_skip_comments(self):
+        kinds = [(kind, value) for kind, value, _ in tokens(b"% comment\n/F1 12 Tf (a\\8) Tj")]
+        self.assertEqual(kinds, [("name", "F1"), ("number", 12), ("keyword", b"Tf"), ("string", b"a8"), ("keyword", b"Tj")])
+
+class StreamTest(unittest.TestCase):
+    def test_filters(self):
+        data = b"BT (Hello) Tj ET"
+        self.assertEqual(decode_stream({"Filter": Name("FlateDecode")}, zlib.compress(data)), data)
+        self.assertEqual(decode_stream({"Filter": [Name("ASCIIHexDecode")]}, data.hex().encode() + b">"), data)
+        self.assertEqual(decode_stream({"Filter": Name("ASCII85Decode")}, a85encode(data) + b"~>"), data)
+        chained = a85encode(zlib.compress(data)) + b"~>"
+        self.assertEqual(decode_stream({"Filter": [Name("A85"), Name("Fl")]}, chained), data)
+        self.assertEqual(decode_stream({}, data), data)
+        self.assertIsNone(decode_stream({"Filter": Name("DCTDecode")}, data))
+        self.assertIsNone(decode_stream({"Filter": Name("FlateDecode")}, b"not zlib"))
+
+    def test_png_up_predictor(self):
+        rows = [b"\x02\x01\x01\x01", b"\x02\x01\x02\x03"]  # "up" filter, 3 columns
+        decoded = decode_stream({"Filter": Name("FlateDecode"), "DecodeParms": {"Predictor": 12, "Columns": 3}},
+                                zlib.compress(b"".join(rows)))
+        self.assertEqual(decoded, b"\x01\x01\x01\x02\x03\x04")
+
+    def test_cmap(self):
+        width, mapping = parse_cmap(b"""
+            begincodespacerange <0000> <FFFF> endcodespacerange
+            2 beginbfchar <0003> <0020> <0011> <00660069> endbfchar
+            1 beginbfrange <0024> <0026> <0041> endbfrange
+            1 beginbfrange <0030> <0031> [<0078> <0079>] endbfrange""")
+        self.assertEqual(width, 2)
+        self.assertEqual(mapping[b"\x00\x03"], " ")
+        self.assertEqual(mapping[b"\x00\x11"], "fi")
+        self.assertEqual([mapping[bytes([0, c])] for c in (0x24, 0x25, 0x26, 0x30, 0x31)], list("ABCxy"))
+
+class BuiltinTextTest(unittest.TestCase):
+    def test_page_text(self):
+        content = b"BT /F1 12 Tf 72 700 Td (Hello) Tj [(W) 20 (orld) -500 (again)] TJ 0 -14 Td (Next \\8 line) Tj ET"
+        self.assertEqual(builtin_text(make_pdf(content)), "HelloWorld again\nNext 8 line")
+
+    def test_differences_and_tounicode(self):
+        font = "<< /Type /Font /Subtype /Type1 /Encoding << /Differences [65 /fi /endash] >> >>"
+        self.assertEqual(builtin_text(make_pdf(b"BT /F1 10 Tf (AB) Tj ET", font)), "fi–")
+        cmap = b"begincodespacerange <00> <FF> endcodespacerange 1 beginbfchar <01> <00E9> endbfchar"
+        font = b"<< /Type /Font /Subtype /Type1 /ToUnicode 6 0 R >>"
+        extra = b"6 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (len(cmap), cmap)
+        self.assertEqual(builtin_text(make_pdf(b"BT /F1 10 Tf <01> Tj ET", font, extra)), "é")
+
+    def test_unreadable_input_gives_no_text(self):
+        self.assertEqual(builtin_text(b"not a pdf"), "")
+        self.assertEqual(builtin_text(make_pdf(b"BT ET") + b"/Encrypt 9 0 R"), "")
+
+class ExtractToCacheTest(unittest.TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.dir = Path(temporary.name)
+        patcher = mock.patch.object(pdf_text, "TEXT_DIR", self.dir / "text")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_any_extractor_error_falls_back_to_no_text(self):
+        pdf = self.dir / "odd.pdf"
+        pdf.write_bytes(make_pdf(b"BT ET"))
+        with mock.patch.object(pdf_text, "extract_text", side_effect=AttributeError("boom")), \
+                mock.patch("builtins.print"):
+            self.assertEqual(pdf_text.extract_to_cache(pdf, "ab" * 32), "")
+        self.assertEqual(pdf_text.cache_path("ab" * 32).read_text(encoding='utf-8'), "")
+
+    def test_built_in_extractor_end_to_end(self):
+        pdf = self.dir / "hello.pdf"
+        pdf.write_bytes(make_pdf(b"BT /F1 12 Tf (Full \\9 text) Tj ET"))
+        with mock.patch.object(pdf_text.shutil, "which", return_value=None), \
+                mock.patch.multiple(pdf_text, fitz=None, pdfminer_text=None, PdfReader=None):
+            self.assertEqual(pdf_text.pdf_texts([pdf]), {pdf: "Full 9 text"})
+
+if __name__ == "__main__":
+    unittest.main()
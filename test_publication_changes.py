@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for publication_changes.py.
+Usage: python3 -m pytest test_publication_changes.py
+"""
+
+import io
+import json
+import unittest
+
+from publication_changes import diff_snapshots, field_hashes, is_empty, scan, scan_checked
+from publication_store import SchemaError, derive_id
+
+def store(*pubs, year="2024"):
+    return io.StringIO(json.dumps({year: list(pubs)}))
+
+PAPER = {"id": "2024-paper", "title": "A paper", "authors": ["Ke Yu"], "paper_link": "https://www.batman-lab.com/a.pdf"}
+
+class DiffSnapshotsTest(unittest.TestCase):
+    def test_added_removed_modified(self):
+        old, _ = scan([("2024", PAPER), ("2024", {"title": "Gone", "authors": ["X"]})])
+        new, _ = scan([("2024", dict(PAPER, venue="MICCAI", title="A paper, revised")),
+                       ("2023", {"title": "New", "authors": ["Y"]})])
+        changes = diff_snapshots(old, new)
+        self.assertEqual(changes["added"], [derive_id({"title": "New"}, "2023")])
+        self.assertEqual(changes["removed"], [derive_id({"title": "Gone"}, "2024")])
+        self.assertEqual(changes["modified"], {"2024-paper": ["title", "venue"]})
+        self.assertEqual(changes["unchanged"], 0)
+        self.assertFalse(is_empty(changes))
+
+    def test_identical_snapshots(self):
+        entries, _ = scan([("2024", PAPER)])
+        changes = diff_snapshots(entries, entries)
+        self.assertTrue(is_empty(changes))
+        self.assertEqual(changes["unchanged"], 1)
+        self.assertTrue(is_empty(diff_snapshots({}, {})))
+
+    def test_missing_null_and_empty_fields_hash_alike(self):
+        self.assertEqual(field_hashes(dict(PAPER, code_link=None), "2024"), field_hashes(dict(PAPER, code_link=""), "2024"))
+        self.assertEqual(field_hashes(PAPER, "2024"), field_hashes(dict(PAPER, code_link=""), "2024"))
+        self.assertNotEqual(field_hashes(PAPER, "2024"), field_hashes(PAPER, "2023"))
+
+class ScanTest(unittest.TestCase):
+    def test_positions_counts_and_duplicate_ids(self):
+        untitled = {"title": "Same", "authors": ["A"]}
+        entries, year_counts = scan([("2024", PAPER), ("2024", untitled), ("2024", untitled), ("2023", untitled)])
+        base = derive_id(untitled, "2024")
+        self.assertEqual(list(entries), ["2024-paper", base, f"{base}-2", derive_id(untitled, "2023")])
+        self.assertEqual([entry["index"] for entry in entries.values()], [0, 1, 2, 0])
+        self.assertEqual(year_counts, {"2024": 3, "2023": 1})
+
+    def test_checked_scan_hashes_canonical_links(self):
+        # The preview and the build both see the canonical spelling
+        respelled = dict(PAPER, paper_link="HTTPS://Batman-Lab.com:443/a.pdf")
+        canonical, _ = scan_checked(store(PAPER))
+        checked, _ = scan_checked(store(respelled))
+        raw, _ = scan([("2024", respelled)])
+        self.assertTrue(is_empty(diff_snapshots(canonical, checked)))
+        self.assertEqual(diff_snapshots(canonical, raw)["modified"], {"2024-paper": ["paper_link"]})
+
+    def test_checked_scan_rejects_malformed_input(self):
+        with self.assertRaises(SchemaError) as raised:
+            scan_checked(store(PAPER, {"title": "", "authors": "Ke Yu"}))
+        self.assertTrue(all(problem.startswith("2024[2]") for problem in raised.exception.problems))
+        seen = []
+        with self.assertRaises(SchemaError):
+            scan_checked(store(dict(PAPER, paper_link="ftp://example.org/a.pdf")),
+                         tap=lambda pairs: (seen.append(pub["title"]) or (year, pub) for year, pub in pairs))
+        self.assertEqual(seen, ["A paper"])
+
+if __name__ == "__main__":
+    unittest.main()
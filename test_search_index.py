@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for search_index.py: front coding, shards and queries.
+Usage: python3 -m pytest test_search_index.py
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import search_index
+from publication_model import records_from_data
+from search_index import INDEX_NAME, SEARCH_DIR, build_index, decode_blocks, front_code, query, query_terms
+
+DATA = {
+    "2024": [
+        {"id": "2024-tensor", "title": "Tensor factorization for imaging genetics",
+         "authors": ["Shantanu Ghosh", "Kayhan Batmanghelich"], "venue": "MICCAI"},
+        {"id": "2024-mammo", "title": "Mammography vision language model",
+         "authors": ["Shantanu Ghosh"], "venue": "Medical Image Analysis"},
+    ],
+    "2022": [
+        {"id": "2022-anatomy", "title": "Anatomy guided weakly supervised learning",
+         "authors": ["Ke Yu", "Kayhan Batmanghelich"], "venue": "MICCAI"},
+    ],
+}
+
+class FrontCodingTest(unittest.TestCase):
+    def test_round_trip(self):
+        words = sorted({"a", "ab", "abc", "abd", "b", "tensor", "tensors", "tenth", "x" * 24}
+                       | {f"term{i:03d}" for i in range(40)})
+        blocks = front_code(words)
+        self.assertEqual(len(blocks), -(-len(words) // search_index.BLOCK_SIZE))
+        self.assertEqual(decode_blocks(blocks), words)
+
+    def test_shared_prefix_encoding(self):
+        self.assertEqual(front_code(["tensor", "tensors", "tenth"]), ["tensor 6s 3th"])
+        self.assertEqual(decode_blocks([]), [])
+
+class QueryTest(unittest.TestCase):
+    def build(self, max_shard_bytes=search_index.MAX_SHARD_BYTES):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        out_dir = Path(temporary.name)
+        with mock.patch.object(search_index, "load_records", return_value=records_from_data(DATA)), \
+                mock.patch.object(search_index, "MAX_SHARD_BYTES", max_shard_bytes):
+            manifest, _ = search_index.write_search_index(out_dir)
+        return out_dir / SEARCH_DIR, manifest
+
+    def ids(self, search_dir, text):
+        return [document["id"] for _, document in query(search_dir, text)]
+
+    def test_words_prefixes_and_fields(self):
+        search_dir, manifest = self.build()
+        self.assertEqual([document["id"] for document in manifest["documents"]],
+                         ["2024-tensor", "2024-mammo", "2022-anatomy"])
+        self.assertEqual(self.ids(search_dir, "tensor factorization"), ["2024-tensor"])
+        self.assertEqual(self.ids(search_dir, "tensor fac"), ["2024-tensor"])
+        # Only the last word may be a prefix
+        self.assertEqual(self.ids(search_dir, "tens factorization"), [])
+        self.assertEqual(self.ids(search_dir, "author:ghosh"), ["2024-tensor", "2024-mammo"])
+        self.assertEqual(self.ids(search_dir, "author:batmanghelich year:2022"), ["2022-anatomy"])
+        self.assertEqual(self.ids(search_dir, "venue:miccai"), ["2024-tensor", "2022-anatomy"])
+        self.assertEqual(self.ids(search_dir, "the of"), [])
+
+    def test_two_letter_shards_answer_the_same(self):
+        search_dir, manifest = self.build(max_shard_bytes=64)
+        self.assertTrue(any(len(key) == 2 for key in manifest["shards"]))
+        self.assertEqual(self.ids(search_dir, "ma"), ["2024-mammo"])
+        self.assertEqual(self.ids(search_dir, "author:ghosh mam"), ["2024-mammo"])
+        for key, name in manifest["shards"].items():
+            with open(search_dir / name, 'r', encoding='utf-8') as f:
+                shard = json.load(f)
+            shard_terms = decode_blocks(shard["blocks"])
+            self.assertEqual(shard_terms, sorted(shard_terms))
+            self.assertTrue(all(term.startswith(key) for term in shard_terms))
+            self.assertEqual(len(shard["postings"]), len(shard_terms))
+        with open(search_dir / INDEX_NAME, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["shards"], manifest["shards"])
+
+    def test_full_text_ranks_below_title(self):
+        records = records_from_data(DATA)
+        _, inverted = build_index(records, ["", "", "tensor tensor tensor"])
+        self.assertGreater(dict(inverted["tensor"])[0], dict(inverted["tensor"])[2])
+
+    def test_query_terms(self):
+        self.assertEqual(query_terms("Author:Ghosh Tensor-Fac year:2024"), ["a:ghosh", "tensor", "fac", "y:2024"])
+        self.assertEqual(query_terms("unknown:field"), ["unknown", "field"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for stream_publications.py.
+Usage: python3 -m pytest test_stream_publications.py
+"""
+
+import io
+import json
+import unittest
+
+from stream_publications import count_by_year, iter_publications, write_store
+
+DATA = {
+    "2025": [
+        {"title": "Ünïcode \"quoted\" title, with {braces} and [brackets]", "authors": ["A. Author"],
+         "bibtex": "@article{k,\n  title={x}\n}"},
+        {"title": "Numbers", "authors": ["B"], "pages": 12345678901234567890, "score": -1.5e-3},
+    ],
+    "2024": [],
+    "2023": [{"title": "Last", "authors": [], "nested": {"list": [1, 2, {"deep": None}], "flag": True}}],
+}
+
+def pairs_of(data):
+    return [(year, pub) for year, pubs in data.items() for pub in pubs]
+
+class IterPublicationsTest(unittest.TestCase):
+    def test_every_chunk_size_gives_the_same_pairs(self):
+        # Splits land inside strings, escapes, numbers and between tokens
+        for text in (json.dumps(DATA), json.dumps(DATA, indent=2, ensure_ascii=False)):
+            for chunk_size in range(1, 40):
+                with self.subTest(chunk_size=chunk_size):
+                    self.assertEqual(list(iter_publications(io.StringIO(text), chunk_size)), pairs_of(DATA))
+
+    def test_number_at_a_chunk_boundary_is_not_cut(self):
+        text = '{"2020": [{"n": 1234567890}]}'
+        for chunk_size in range(1, len(text) + 1):
+            self.assertEqual(list(iter_publications(io.StringIO(text), chunk_size)), [("2020", {"n": 1234567890})])
+
+    def test_year_keys_include_empty_years(self):
+        year_keys = []
+        list(iter_publications(io.StringIO(json.dumps(DATA)), 7, year_keys=year_keys))
+        self.assertEqual(year_keys, ["2025", "2024", "2023"])
+        self.assertEqual(count_by_year(io.StringIO(json.dumps(DATA)), 5), {"2025": 2, "2023": 1})
+
+    def test_malformed_input(self):
+        for text in ('[]', '{"2020": {}}', '{"2020": [1]}', '{"2020": [{"a": 1}', '{"2020": []} x', '{2020: []}'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(iter_publications(io.StringIO(text), 3))
+        self.assertEqual(list(iter_publications(io.StringIO(" { } "))), [])
+
+class WriteStoreTest(unittest.TestCase):
+    def test_round_trip_matches_json_dump(self):
+        year_keys = []
+        out = io.StringIO()
+        counts = write_store(iter_publications(io.StringIO(json.dumps(DATA)), 11, year_keys), out, year_keys)
+        self.assertEqual(counts, (3, 3))
+        self.assertEqual(out.getvalue(), json.dumps(DATA, indent=2, ensure_ascii=False) + "\n")
+
+    def test_without_year_keys_empty_years_are_dropped(self):
+        out = io.StringIO()
+        write_store(iter_publications(io.StringIO(json.dumps(DATA))), out)
+        self.assertEqual(json.loads(out.getvalue()), {year: pubs for year, pubs in DATA.items() if pubs})
+
+    def test_empty_and_ungrouped(self):
+        out = io.StringIO()
+        self.assertEqual(write_store([], out), (0, 0))
+        self.assertEqual(out.getvalue(), "{}\n")
+        with self.assertRaises(ValueError):
+            write_store([("2020", {}), ("2021", {}), ("2020", {})], io.StringIO())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the negative cache in url_failures.py.
+Usage: python3 -m pytest test_url_failures.py
+"""
+
+import http.client
+import io
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from urllib.error import HTTPError, URLError
+
+import url_failures
+from url_failures import (
+    CLIENT_ERROR_TTL,
+    DAY,
+    GONE_TTL,
+    HOUR,
+    MAX_TTL,
+    TRANSIENT_TTL,
+    FailureCache,
+    FetchFailed,
+    failure_ttl,
+    fetch,
+    format_wait,
+)
+
+URL = "https://example.org/thumb.png"
+
+class TTLTest(unittest.TestCase):
+    def test_base_ttl_by_status(self):
+        self.assertEqual(failure_ttl(404, 1), GONE_TTL)
+        self.assertEqual(failure_ttl(410, 1), GONE_TTL)
+        self.assertEqual(failure_ttl(403, 1), CLIENT_ERROR_TTL)
+        self.assertEqual(failure_ttl(429, 1), TRANSIENT_TTL)
+        self.assertEqual(failure_ttl(503, 1), TRANSIENT_TTL)
+        self.assertEqual(failure_ttl(None, 1), TRANSIENT_TTL)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual([failure_ttl(None, n) for n in (1, 2, 3, 4)], [HOUR, 2 * HOUR, 4 * HOUR, 8 * HOUR])
+        self.assertEqual(failure_ttl(404, 2), 14 * DAY)
+        self.assertEqual(failure_ttl(404, 3), 28 * DAY)
+        self.assertEqual(failure_ttl(404, 4), MAX_TTL)
+        self.assertEqual(failure_ttl(None, 50), MAX_TTL)
+
+    def test_format_wait(self):
+        self.assertEqual([format_wait(s) for s in (2 * DAY, 3 * HOUR, 90, -5)], ["2d", "3h", "2m", "0m"])
+
+class FailureCacheTest(unittest.TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.path = Path(temporary.name) / "failed-urls.json"
+
+    def test_skip_until_retry_at(self):
+        cache = FailureCache(self.path)
+        entry = cache.record_failure(URL, 404, "Not Found", now=1000)
+        self.assertEqual(entry["retry_at"], 1000 + GONE_TTL)
+        self.assertIs(cache.lookup(URL, now=1000 + GONE_TTL - 1), entry)
+        self.assertIsNone(cache.lookup(URL, now=1000 + GONE_TTL))
+        # Looked up under its canonical spelling
+        self.assertIs(cache.lookup("HTTPS://Example.org:443/thumb.png", now=1001), entry)
+        self.assertIsNone(FailureCache(self.path, recheck=True).lookup(URL))
+
+    def test_repeated_failures_back_off_and_success_clears(self):
+        cache = FailureCache(self.path)
+        cache.record_failure(URL, None, "timed out", now=0)
+        entry = cache.record_failure(URL, None, "timed out", now=HOUR)
+        self.assertEqual((entry["failures"], entry["retry_at"]), (2, HOUR + 2 * HOUR))
+        cache.record_success(URL)
+        self.assertEqual(cache.entries, {})
+        self.assertEqual(cache.record_failure(URL, 500, "error", now=0)["failures"], 1)
+
+    def test_save_load_and_prune(self):
+        cache = FailureCache(self.path)
+        cache.record_failure(URL, 404, "Not Found")
+        cache.record_failure("https://example.org/old.png", 500, "error", now=0)
+        cache.save()
+        loaded = FailureCache(self.path)
+        self.assertEqual(list(loaded.entries), [URL])
+        self.assertFalse(loaded.dirty)
+
+    def test_unreadable_file_is_an_empty_cache(self):
+        self.path.write_text("{not json", encoding='utf-8')
+        self.assertEqual(FailureCache(self.path).entries, {})
+
+class FakeResponse(io.BytesIO):
+    headers = {"content-type": "image/png"}
+
+class FetchTest(unittest.TestCase):
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.cache = FailureCache(Path(temporary.name) / "failed-urls.json")
+
+    def fetch_with(self, outcome):
+        """fetch(URL) with urlopen returning or raising outcome."""
+        side_effect = outcome if isinstance(outcome, Exception) else None
+        with mock.patch.object(url_failures.urllib.request, "urlopen", side_effect=side_effect,
+                               return_value=outcome) as urlopen:
+            try:
+                return fetch(URL, self.cache)
+            finally:
+                self.calls = urlopen.call_count
+
+    def test_success_clears_the_entry(self):
+        self.cache.record_failure(URL, 500, "error", now=0)
+        self.assertEqual(self.fetch_with(FakeResponse(b"png")), (b"png", "image/png"))
+        self.assertEqual(self.cache.entries, {})
+
+    def test_failures_are_recorded_and_then_skipped(self):
+        cases = [
+            (HTTPError(URL, 404, "Not Found", {}, None), 404, GONE_TTL),
+            (URLError("Name or service not known"), None, TRANSIENT_TTL),
+            (socket.timeout(), None, TRANSIENT_TTL),
+            (ConnectionResetError("reset"), None, TRANSIENT_TTL),
+        ]
+        for error, status, ttl in cases:
+            with self.subTest(error=type(error).__name__):
+                self.cache.entries = {}
+                with self.assertRaises(FetchFailed) as raised:
+                    self.fetch_with(error)
+                self.assertEqual((raised.exception.status, raised.exception.cached), (status, False))
+                entry = self.cache.entries[URL]
+                self.assertAlmostEqual(entry["retry_at"] - entry["last_failed"], ttl)
+                with self.assertRaises(FetchFailed) as raised:
+                    self.fetch_with(FakeResponse(b"png"))
+                self.assertTrue(raised.exception.cached)
+                self.assertEqual(self.calls, 0)
+
+    def test_incomplete_read_is_a_transient_failure(self):
+        response = mock.MagicMock()
+        response.__enter__.return_value.read.side_effect = http.client.IncompleteRead(b"abc", 7)
+        with self.assertRaises(FetchFailed) as raised:
+            self.fetch_with(response)
+        self.assertIsNone(raised.exception.status)
+        self.assertIn("IncompleteRead", raised.exception.reason)
+        entry = self.cache.entries[URL]
+        self.assertEqual(entry["retry_at"] - entry["last_failed"], TRANSIENT_TTL)
+
+    def test_other_http_client_errors(self):
+        with self.assertRaises(FetchFailed) as raised:
+            self.fetch_with(http.client.BadStatusLine("garbage"))
+        self.assertEqual(self.cache.entries[URL]["reason"], raised.exception.reason)
+
+    def test_invalid_url_is_never_fetched_or_cached(self):
+        with mock.patch.object(url_failures.urllib.request, "urlopen") as urlopen:
+            with self.assertRaises(ValueError):
+                fetch("ftp://example.org/x", self.cache)
+        urlopen.assert_not_called()
+        self.assertEqual(self.cache.entries, {})
+
+if __name__ == "__main__":
+    unittest.main()
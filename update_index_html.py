@@ -6,7 +6,10 @@ Script to update index.html with the correct publications HTML.
 from pathlib import Path
 import re
 
+from build_output import build_lock, pop_dry_run_flag, write_html
+
 def main():
+    dry_run = pop_dry_run_flag()
     base_dir = Path(__file__).parent
     
     # Read the generated HTML
@@ -25,18 +28,17 @@ def main():
     
     if match:
         # Replace the content between the div tags
-        replacement = match.group(1) + "\n" + new_publications_html + "\n" + match.group(3)
+        replacement = match.group(1).rstrip() + "\n" + new_publications_html + match.group(3)
         html_content = html_content[:match.start()] + replacement + html_content[match.end():]
         
         # Write back
-        with open(base_dir / "index.html", 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print("✓ Successfully updated index.html with new publications")
+        if write_html(base_dir / "index.html", html_content, dry_run):
+            print("✓ Successfully updated index.html with new publications")
         print(f"  Replaced publications section with {new_publications_html.count('<article')} publications")
     else:
         print("✗ Could not find publications section boundaries")
         print("  Looking for pattern: <div class=\"d-grid gap-3\"> ... </div> </section> <!-- LAB MEMBERS")
 
 if __name__ == "__main__":
-    main()
+    with build_lock():
+        main()
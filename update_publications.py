@@ -12,6 +12,9 @@ import requests
 from pathlib import Path
 from urllib.parse import urlparse
 
+from build_output import build_lock, pop_dry_run_flag, write_html
+from canonical_urls import canonical_url
+
 # Papers that need image icons downloaded
 PAPERS_TO_UPDATE_IMAGES = [
     "Mammo-CLIP: A Vision Language Foundation Model to Enhance Data Efficiency and Robustness in Mammography",
@@ -28,6 +31,10 @@ PAPERS_TO_UPDATE_IMAGES = [
 def download_image(url, save_path):
     """Download an image from URL to save_path."""
     try:
+        # Canonical form (fixes 'hhttps', host aliases, encoding); InvalidURL is a ValueError
+        url = canonical_url(url)
+        if not url:
+            return None
         response = requests.get(url, timeout=30, stream=True)
         response.raise_for_status()
         
@@ -70,7 +77,7 @@ def find_paper_in_html(html_content, title):
     # Escape special regex characters in title
     escaped_title = re.escape(title)
     # Match the article block containing this title
-    pattern = rf'(<article class="item-row">.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
+    pattern = rf'(<article class="item-row"[^>]*>.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
     match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
     return match
 
@@ -144,6 +151,7 @@ def update_code_link_in_html(html_content, title, code_link):
     return html_content
 
 def main():
+    dry_run = pop_dry_run_flag()
     # Load JSON data
     json_data = {
         "2024": [
@@ -237,9 +245,6 @@ def main():
         title = paper["title"]
         if title in PAPERS_TO_UPDATE_IMAGES and paper.get("image_icon_link"):
             img_url = paper["image_icon_link"]
-            # Fix URL if it has double 'h' (like in Anatomy-Guided)
-            if img_url.startswith('hhttps'):
-                img_url = img_url[1:]
             
             # Create filename
             safe_title = sanitize_filename(title)
@@ -255,10 +260,12 @@ def main():
             # Download if not exists
             if not img_path.exists():
                 downloaded_path = download_image(img_url, str(img_path))
-                if downloaded_path:
-                    # Update path to use downloaded filename
-                    img_path = Path(downloaded_path)
-                    relative_path = f"images/publications/{img_path.name}"
+                if not downloaded_path:
+                    # Unusable link or failed download: leave this paper's image as it is
+                    continue
+                # Update path to use downloaded filename
+                img_path = Path(downloaded_path)
+                relative_path = f"images/publications/{img_path.name}"
             
             # Update HTML
             html_content = update_image_in_html(html_content, title, relative_path)
@@ -298,12 +305,13 @@ def main():
                 html_content = update_code_link_in_html(html_content, title, code_link)
     
     # Write updated HTML
-    with open(index_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    if not write_html(index_html_path, html_content, dry_run):
+        return
     
     print("\n" + "=" * 60)
     print("✓ Successfully updated index.html")
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    with build_lock():
+        main()
@@ -5,7 +5,6 @@ Complete script to update publications:
 2. Update code links for ALL papers from JSON
 """
 
-import json
 import re
 import os
 from pathlib import Path
@@ -13,6 +12,10 @@ from urllib.parse import urlparse
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
+from build_output import build_lock, pop_dry_run_flag, write_html
+from canonical_urls import canonical_url
+from publication_store import CANONICAL_PATH, load_publications
+
 # Papers that need image icons downloaded
 PAPERS_TO_UPDATE_IMAGES = [
     "Mammo-CLIP: A Vision Language Foundation Model to Enhance Data Efficiency and Robustness in Mammography",
@@ -29,9 +32,10 @@ PAPERS_TO_UPDATE_IMAGES = [
 def download_image(url, save_path):
     """Download an image from URL to save_path."""
     try:
-        # Fix URL if it has double 'h' (like in Anatomy-Guided)
-        if url.startswith('hhttps'):
-            url = url[1:]
+        # Canonical form (fixes 'hhttps', host aliases, encoding)
+        url = canonical_url(url)
+        if not url:
+            return None
         
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
@@ -78,7 +82,7 @@ def find_paper_in_html(html_content, title):
     # The title in HTML might have slight variations
     escaped_title = re.escape(title)
     # Match the article block containing this title (case insensitive)
-    pattern = rf'(<article class="item-row">.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
+    pattern = rf'(<article class="item-row"[^>]*>.*?<h5[^>]*>{escaped_title}</h5>.*?</article>)'
     match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
     return match
 
@@ -159,35 +163,19 @@ def update_code_link_in_html(html_content, title, code_link):
     return html_content
 
 def main():
+    dry_run = pop_dry_run_flag()
     base_dir = Path(__file__).parent
     index_html_path = base_dir / "index.html"
     images_dir = base_dir / "images" / "publications"
     images_dir.mkdir(parents=True, exist_ok=True)
     
-    # Try to load JSON from various possible files
-    json_files = [
-        base_dir / "publications_complete.json",
-        base_dir / "publications_full.json",
-        base_dir / "publications_data.json",
-        base_dir / "publications_new.json",
-        base_dir / "publications_user_data.json"
-    ]
-    
-    full_json_data = None
-    for json_file in json_files:
-        if json_file.exists():
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    full_json_data = json.load(f)
-                print(f"✓ Loaded JSON from {json_file.name}")
-                break
-            except Exception as e:
-                print(f"⚠ Error loading {json_file.name}: {e}")
-                continue
-    
-    if not full_json_data:
-        print("✗ No valid JSON file found. Please ensure publications_full.json exists.")
+    # Load the canonical publication store
+    try:
+        full_json_data = load_publications()
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not load {CANONICAL_PATH.name}: {e}")
         return
+    print(f"✓ Loaded JSON from {CANONICAL_PATH.name}")
     
     # Read HTML
     print(f"\nReading {index_html_path}...")
@@ -284,12 +272,13 @@ def main():
     
     # Write updated HTML
     print(f"\nWriting updated HTML to {index_html_path}...")
-    with open(index_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    if not write_html(index_html_path, html_content, dry_run):
+        return
     
     print("\n" + "=" * 60)
     print("✓ Successfully updated index.html")
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    with build_lock():
+        main()
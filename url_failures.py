@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Negative cache for URLs that keep failing.
+
+Fetchers record every failed download in .cache/failed-urls.json, keyed by
+canonical URL, with the HTTP status (or the network error) and an expiry
+time. Until that expires, a known-dead URL is skipped at once instead of
+waiting out another timeout. How long depends on the failure: a 404/410 is
+unlikely to come back soon, a timeout or a 5xx may be gone within the hour.
+Each consecutive failure doubles the wait (up to MAX_TTL), and a successful
+fetch clears the entry. Fetchers accept --recheck-failed to try every URL
+again for one run; the results update the cache as usual.
+
+Usage:
+    python3 url_failures.py                # list cached failures
+    python3 url_failures.py --clear [url]  # forget every failure (or one URL)
+"""
+
+import http.client
+import json
+import socket
+import sys
+import time
+import urllib.request
+from urllib.error import HTTPError, URLError
+
+from build_output import atomic_write
+from canonical_urls import canonical_url
+from publication_store import CACHE_DIR
+
+FAILURES_PATH = CACHE_DIR / "failed-urls.json"
+RECHECK_FLAG = "--recheck-failed"
+USER_AGENT = 'Mozilla/5.0'
+
+HOUR = 3600
+DAY = 24 * HOUR
+GONE_STATUSES = {404, 410}
+GONE_TTL = 7 * DAY         # the resource was removed
+CLIENT_ERROR_TTL = DAY     # 401/403 and friends: may be a hotlinking rule that changes
+TRANSIENT_TTL = HOUR       # 5xx, 429, timeouts, DNS and connection errors
+MAX_TTL = 30 * DAY
+
+class FetchFailed(Exception):
+    """A fetch failed now, or failed recently and was skipped (cached=True)."""
+
+    def __init__(self, url, status, reason, cached=False, retry_at=None):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.cached = cached
+        self.retry_at = retry_at
+        super().__init__(describe(status, reason))
+
+def describe(status, reason):
+    return f"HTTP {status}" if status else reason
+
+def failure_ttl(status, failures):
+    """Seconds to skip a URL after its failures-th consecutive failure."""
+    if status in GONE_STATUSES:
+        base = GONE_TTL
+    elif status is not None and 400 <= status < 500 and status != 429:
+        base = CLIENT_ERROR_TTL
+    else:
+        base = TRANSIENT_TTL
+    return min(base * 2 ** (failures - 1), MAX_TTL)
+
+def format_wait(seconds):
+    if seconds >= DAY:
+        return f"{seconds / DAY:.0f}d"
+    if seconds >= HOUR:
+        return f"{seconds / HOUR:.0f}h"
+    return f"{max(seconds, 0) / 60:.0f}m"
+
+def pop_recheck_flag(argv=None):
+    """Remove --recheck-failed from argv (sys.argv by default); True if present."""
+    argv = sys.argv if argv is None else argv
+    found = False
+    while RECHECK_FLAG in argv:
+        argv.remove(RECHECK_FLAG)
+        found = True
+    return found
+
+class FailureCache:
+    """Failed URLs -> {"status", "reason", "failures", "last_failed", "retry_at"}."""
+
+    def __init__(self, path=FAILURES_PATH, recheck=False):
+        self.path = path
+        self.recheck = recheck
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lookup(self, url, now=None):
+        """The failure entry if url should be skipped right now, else None."""
+        if self.recheck:
+            return None
+        entry = self.entries.get(canonical_url(url))
+        now = time.time() if now is None else now
+        if entry is not None and entry["retry_at"] > now:
+            return entry
+        return None
+
+    def record_failure(self, url, status, reason, now=None):
+        key = canonical_url(url)
+        now = time.time() if now is None else now
+        failures = self.entries.get(key, {}).get("failures", 0) + 1
+        entry = self.entries[key] = {
+            "status": status,
+            "reason": reason,
+            "failures": failures,
+            "last_failed": now,
+            "retry_at": now + failure_ttl(status, failures),
+        }
+        self.dirty = True
+        return entry
+
+    def record_success(self, url):
+        if self.entries.pop(canonical_url(url), None) is not None:
+            self.dirty = True
+
+    def prune(self, now=None):
+        """Drop entries that expired more than MAX_TTL ago (their backoff has run out)."""
+        now = time.time() if now is None else now
+        for key in [key for key, entry in self.entries.items() if entry["retry_at"] + MAX_TTL < now]:
+            del self.entries[key]
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.prune()
+        CACHE_DIR.mkdir(exist_ok=True)
+        atomic_write(self.path, json.dumps(self.entries, indent=2, sort_keys=True) + "\n")
+        self.dirty = False
+
+def fetch(url, failures=None, timeout=10, headers=None):
+    """GET url and return (body, content_type), consulting the negative cache.
+
+    Raises FetchFailed for failures, including URLs skipped because they
+    failed recently. A URL that cannot be canonicalized is never fetched or
+    cached.
+    """
+    url = canonical_url(url)
+    if failures is not None:
+        entry = failures.lookup(url)
+        if entry is not None:
+            raise FetchFailed(url, entry["status"], entry["reason"], cached=True, retry_at=entry["retry_at"])
+
+    request = urllib.request.Request(url, headers=headers or {'User-Agent': USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            content_type = response.headers.get('content-type', '')
+    except HTTPError as e:
+        status, reason = e.code, str(e.reason)
+    except URLError as e:
+        status, reason = None, str(e.reason)
+    except (socket.timeout, TimeoutError):
+        status, reason = None, "timed out"
+    except OSError as e:
+        status, reason = None, str(e)
+    except http.client.HTTPException as e:
+        # IncompleteRead, a malformed status line...: retried like a dropped connection
+        status, reason = None, str(e) or type(e).__name__
+    else:
+        if failures is not None:
+            failures.record_success(url)
+        return body, content_type
+
+    if failures is not None:
+        failures.record_failure(url, status, reason)
+    raise FetchFailed(url, status, reason)
+
+def main():
+    failures = FailureCache()
+    if "--clear" in sys.argv[1:]:
+        urls = [arg for arg in sys.argv[1:] if arg != "--clear"]
+        if urls:
+            for url in urls:
+                failures.record_success(url)
+        else:
+            failures.dirty = bool(failures.entries)
+            failures.entries = {}
+        failures.save()
+        print(f"✓ Cleared {', '.join(urls) if urls else 'all cached failures'}")
+        return
+
+    if not failures.entries:
+        print("✓ No cached URL failures")
+        return
+    now = time.time()
+    active = 0
+    for url, entry in sorted(failures.entries.items(), key=lambda item: item[1]["retry_at"]):
+        wait = entry["retry_at"] - now
+        if wait > 0:
+            active += 1
+            state = f"skipped for {format_wait(wait)}"
+        else:
+            state = "expired, retried next run"
+        print(f"✗ {describe(entry['status'], entry['reason'])} x{entry['failures']}, {state}: {url}")
+    print(f"{active} of {len(failures.entries)} URLs are currently skipped "
+          f"(use {RECHECK_FLAG} to retry them)")
+
+if __name__ == "__main__":
+    main()